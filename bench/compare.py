@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Compare two ``bench/run.lua --json`` reports.
+
+Prints the change in net ns/op and net bytes/op for every scenario present
+in both reports. With ``--fail-above`` the exit status is 1 when any
+scenario got slower by more than that many percent, so it can gate CI::
+
+    luajit bench/run.lua --json before.json
+    git checkout my-branch
+    luajit bench/run.lua --json after.json
+    python bench/compare.py before.json after.json --fail-above 10
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    results = {(r["plugin"], r["scenario"], r["payload_bytes"]): r for r in report["results"]}
+    return report, results
+
+
+def change(before, after):
+    if before == 0:
+        return 0.0 if after == 0 else float("inf")
+    return (after - before) / before * 100
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two plugin benchmark reports")
+    parser.add_argument("before", help="baseline report (JSON from bench/run.lua --json)")
+    parser.add_argument("after", help="report to compare against the baseline")
+    parser.add_argument("--fail-above", type=float, metavar="PCT", help="exit 1 if any net ns/op regressed by more than PCT percent")
+    args = parser.parse_args(argv)
+
+    before_report, before = load(args.before)
+    after_report, after = load(args.after)
+    for key in ("runtime", "json"):
+        if before_report.get(key) != after_report.get(key):
+            print(f"⚠️  {key} differs: {before_report.get(key)} vs {after_report.get(key)}; numbers are not comparable")
+
+    print(f"{'plugin':<18} {'scenario':<22} {'payload':>9} {'net ns/op':>21} {'change':>8} {'net B/op':>19}")
+    regressions = []
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        ns = change(old["net_ns_per_op"], new["net_ns_per_op"])
+        print(
+            f"{key[0]:<18} {key[1]:<22} {key[2]:>9} "
+            f"{old['net_ns_per_op']:>10.1f} {new['net_ns_per_op']:>10.1f} {ns:>+7.1f}% "
+            f"{old['net_bytes_per_op']:>9.0f} {new['net_bytes_per_op']:>9.0f}"
+        )
+        if args.fail_above is not None and ns > args.fail_above:
+            regressions.append(key)
+
+    for key in sorted(before.keys() ^ after.keys()):
+        side = "baseline" if key in before else "new report"
+        print(f"  only in {side}: {key[0]}/{key[1]} ({key[2]} bytes)")
+
+    if regressions:
+        print(f"❌ {len(regressions)} scenarios slower by more than {args.fail_above}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+-- json.lua - Small pure-Lua JSON codec for the benchmark PDK stub
+--
+-- Used as cjson / kong.json when lua-cjson is not installed. It is much
+-- slower than cjson, so results for JSON-heavy scenarios are only
+-- comparable between runs that used the same codec (see "json" in the
+-- report).
+
+local byte, char, sub, find, format = string.byte, string.char, string.sub, string.find, string.format
+local concat = table.concat
+
+local json = { null = setmetatable({}, { __tostring = function() return "null" end }) }
+
+local ok, cjson = pcall(require, "cjson.safe")
+if ok and cjson then
+  cjson.null = cjson.null or json.null
+  cjson.codec = "cjson"
+  return cjson
+end
+json.codec = "pure-lua"
+
+local escapes = {
+  ['"'] = '\\"', ["\\"] = "\\\\", ["\b"] = "\\b", ["\f"] = "\\f",
+  ["\n"] = "\\n", ["\r"] = "\\r", ["\t"] = "\\t",
+}
+
+local function escape(s)
+  if not find(s, '[%c"\\]') then
+    return s
+  end
+  return (s:gsub('[%c"\\]', function(c)
+    return escapes[c] or format("\\u%04x", byte(c))
+  end))
+end
+
+local encode_value
+
+local function encode_table(t, out)
+  local n = #t
+  if n > 0 or next(t) == nil then
+    out[#out + 1] = "["
+    for i = 1, n do
+      if i > 1 then out[#out + 1] = "," end
+      encode_value(t[i], out)
+    end
+    out[#out + 1] = "]"
+    return
+  end
+  out[#out + 1] = "{"
+  local first = true
+  for k, v in pairs(t) do
+    if not first then out[#out + 1] = "," end
+    first = false
+    out[#out + 1] = '"' .. escape(tostring(k)) .. '":'
+    encode_value(v, out)
+  end
+  out[#out + 1] = "}"
+end
+
+encode_value = function(v, out)
+  local kind = type(v)
+  if v == nil or v == json.null then
+    out[#out + 1] = "null"
+  elseif kind == "string" then
+    out[#out + 1] = '"' .. escape(v) .. '"'
+  elseif kind == "number" then
+    out[#out + 1] = (v == math.floor(v) and v < 1e15 and v > -1e15) and format("%d", v) or format("%.14g", v)
+  elseif kind == "boolean" then
+    out[#out + 1] = v and "true" or "false"
+  elseif kind == "table" then
+    encode_table(v, out)
+  else
+    error("cannot encode " .. kind)
+  end
+end
+
+function json.encode(v)
+  local out = {}
+  local ok, err = pcall(encode_value, v, out)
+  if not ok then
+    return nil, err
+  end
+  return concat(out)
+end
+
+local decode_value
+
+local function skip(s, i)
+  local b = byte(s, i)
+  if b and b ~= 32 and b ~= 9 and b ~= 10 and b ~= 13 then
+    return i
+  end
+  return find(s, "[^ \t\r\n]", i) or #s + 1
+end
+
+local function decode_string(s, i)
+  local close = find(s, '["\\]', i + 1)
+  if close and byte(s, close) == 34 then -- no escapes
+    return sub(s, i + 1, close - 1), close + 1
+  end
+  local parts, start = {}, i + 1
+  while true do
+    local j = find(s, '["\\]', start)
+    if not j then error("unterminated string") end
+    parts[#parts + 1] = sub(s, start, j - 1)
+    if byte(s, j) == 34 then -- "
+      return concat(parts), j + 1
+    end
+    local e = sub(s, j + 1, j + 1)
+    if e == "u" then
+      local code = tonumber(sub(s, j + 2, j + 5), 16)
+      if not code then error("bad unicode escape") end
+      if code < 0x80 then
+        parts[#parts + 1] = char(code)
+      elseif code < 0x800 then
+        parts[#parts + 1] = char(0xC0 + math.floor(code / 64), 0x80 + code % 64)
+      else
+        parts[#parts + 1] = char(0xE0 + math.floor(code / 4096), 0x80 + math.floor(code / 64) % 64, 0x80 + code % 64)
+      end
+      start = j + 6
+    else
+      local map = { b = "\b", f = "\f", n = "\n", r = "\r", t = "\t" }
+      parts[#parts + 1] = map[e] or e
+      start = j + 2
+    end
+  end
+end
+
+decode_value = function(s, i)
+  i = skip(s, i)
+  local c = sub(s, i, i)
+  if c == "{" then
+    local obj = {}
+    i = skip(s, i + 1)
+    if sub(s, i, i) == "}" then return obj, i + 1 end
+    while true do
+      if sub(s, i, i) ~= '"' then error("expected key at " .. i) end
+      local key
+      key, i = decode_string(s, i)
+      i = skip(s, i)
+      if sub(s, i, i) ~= ":" then error("expected ':' at " .. i) end
+      obj[key], i = decode_value(s, i + 1)
+      i = skip(s, i)
+      c = sub(s, i, i)
+      if c == "}" then return obj, i + 1 end
+      if c ~= "," then error("expected ',' at " .. i) end
+      i = skip(s, i + 1)
+    end
+  elseif c == "[" then
+    local arr, n = {}, 0
+    i = skip(s, i + 1)
+    if sub(s, i, i) == "]" then return arr, i + 1 end
+    while true do
+      n = n + 1
+      arr[n], i = decode_value(s, i)
+      i = skip(s, i)
+      c = sub(s, i, i)
+      if c == "]" then return arr, i + 1 end
+      if c ~= "," then error("expected ',' at " .. i) end
+      i = i + 1
+    end
+  elseif c == '"' then
+    return decode_string(s, i)
+  elseif sub(s, i, i + 3) == "true" then
+    return true, i + 4
+  elseif sub(s, i, i + 4) == "false" then
+    return false, i + 5
+  elseif sub(s, i, i + 3) == "null" then
+    return json.null, i + 4
+  end
+  local num = s:match("^-?%d+%.?%d*[eE]?[-+]?%d*", i)
+  if not num or num == "" then error("unexpected character at " .. i) end
+  return tonumber(num), i + #num
+end
+
+function json.decode(s)
+  if type(s) ~= "string" then
+    return nil, "expected a string"
+  end
+  local ok, value, i = pcall(decode_value, s, 1)
+  if not ok then
+    return nil, value
+  end
+  if skip(s, i) <= #s then
+    return nil, "trailing garbage"
+  end
+  return value
+end
+
+return json
@@ -0,0 +1,306 @@
+-- pdk_stub.lua - Minimal kong/ngx PDK stand-in for offline plugin benchmarks
+--
+-- Installs `kong` and `ngx` globals that behave enough like the real PDK
+-- for the plugins in this repo to run their access, header_filter,
+-- body_filter and log phases outside of Kong. State is reset per request
+-- with stub.new_request(); time is simulated and advanced by the driver.
+
+local json = require "json"
+
+local lower = string.lower
+local concat = table.concat
+
+local stub = {}
+
+-- Simulated clock (seconds), advanced by stub.advance()
+local now = 1700000000.000
+
+-- Per-request state
+local request, response, ctx_plugin, ctx_shared, body_buffer
+
+-- ngx.shared dicts ----------------------------------------------------------
+
+local SharedDict = {}
+SharedDict.__index = SharedDict
+
+function SharedDict:get(key) return self.data[key] end
+function SharedDict:set(key, value) self.data[key] = value return true, nil, false end
+function SharedDict:add(key, value)
+  if self.data[key] ~= nil then return false, "exists" end
+  self.data[key] = value
+  return true
+end
+function SharedDict:incr(key, value, init)
+  local current = self.data[key]
+  if current == nil then
+    if init == nil then return nil, "not found" end
+    current = init
+  end
+  current = current + value
+  self.data[key] = current
+  return current
+end
+function SharedDict:delete(key) self.data[key] = nil end
+function SharedDict:flush_all() self.data = {} end
+function SharedDict:get_keys()
+  local keys = {}
+  for key in pairs(self.data) do keys[#keys + 1] = key end
+  return keys
+end
+
+-- Only declared dicts exist, as with lua_shared_dict. plugin_phase_latency
+-- is left out so phase_timer does not wrap the handlers being measured;
+-- api_version_body_cache is only used by scenarios that set body_cache.
+local shared = {}
+
+function stub.declare_dict(name)
+  shared[name] = shared[name] or setmetatable({ data = {} }, SharedDict)
+  return shared[name]
+end
+
+stub.declare_dict("custom_plugin_counters")
+stub.declare_dict("api_version_body_cache")
+
+-- timers -----------------------------------------------------------------
+
+local pending_timers, every_timers = {}, {}
+
+local timer = {
+  at = function(delay, fn, ...)
+    pending_timers[#pending_timers + 1] = { at = now + delay, fn = fn, args = { ... } }
+    return true
+  end,
+  every = function(interval, fn, ...)
+    every_timers[#every_timers + 1] = { interval = interval, next = now + interval, fn = fn, args = { ... } }
+    return true
+  end,
+}
+
+-- Run timers that are due at the current simulated time
+function stub.run_timers()
+  if #pending_timers > 0 then
+    local due = pending_timers
+    pending_timers = {}
+    for _, t in ipairs(due) do
+      if t.at <= now then
+        t.fn(false, unpack(t.args))
+      else
+        pending_timers[#pending_timers + 1] = t
+      end
+    end
+  end
+  for _, t in ipairs(every_timers) do
+    if t.next <= now then
+      t.next = now + t.interval
+      t.fn(false, unpack(t.args))
+    end
+  end
+end
+
+function stub.advance(seconds)
+  now = now + seconds
+end
+
+-- ngx ----------------------------------------------------------------------
+
+local var = setmetatable({}, {
+  __index = function(_, name)
+    if name == "request_id" then return request.id end
+    local value = request.vars and request.vars[name]
+    if name == "upstream_uri" then
+      return request.upstream_path or value or request.path
+    end
+    return value
+  end,
+})
+
+_G.ngx = {
+  arg = {},
+  var = var,
+  shared = shared,
+  timer = timer,
+  null = json.null,
+  now = function() return now end,
+  time = function() return math.floor(now) end,
+  update_time = function() end,
+  worker = { id = function() return 0 end, exiting = function() return false end },
+  socket = {
+    udp = function()
+      return {
+        setpeername = function() return true end,
+        send = function() return true end,
+        close = function() return true end,
+      }
+    end,
+  },
+  log = function() end,
+  DEBUG = 8, INFO = 7, NOTICE = 6, WARN = 5, ERR = 4,
+}
+
+-- kong ---------------------------------------------------------------------
+
+local function noop() end
+
+local log = {
+  debug = noop, info = noop, notice = noop, warn = noop, err = noop, crit = noop,
+}
+
+local function get_header(headers, name)
+  return headers[lower(name)]
+end
+
+_G.kong = {
+  version = "3.7.0-bench",
+  log = log,
+  json = json,
+  ctx = setmetatable({}, {
+    __index = function(_, key)
+      if key == "plugin" then return ctx_plugin end
+      if key == "shared" then return ctx_shared end
+    end,
+  }),
+  request = {
+    get_method = function() return request.method end,
+    get_path = function() return request.path end,
+    get_path_with_query = function()
+      return request.raw_query and request.path .. "?" .. request.raw_query or request.path
+    end,
+    get_header = function(name) return get_header(request.headers, name) end,
+    get_headers = function() return request.headers end,
+    get_query_arg = function(name) return request.query[name] end,
+    get_query = function() return request.query end,
+    get_raw_query = function() return request.raw_query or "" end,
+  },
+  service = {
+    request = {
+      set_header = function(name, value) request.upstream_headers[lower(name)] = value end,
+      clear_header = function(name) request.upstream_headers[lower(name)] = nil end,
+      set_path = function(path) request.upstream_path = path end,
+    },
+  },
+  response = {
+    get_status = function() return response.status end,
+    get_header = function(name) return get_header(response.headers, name) end,
+    get_headers = function() return response.headers end,
+    set_header = function(name, value) response.headers[lower(name)] = value end,
+    add_header = function(name, value) response.headers[lower(name)] = value end,
+    clear_header = function(name) response.headers[lower(name)] = nil end,
+    -- Like the PDK: buffer chunks until eof, then hand out the whole body
+    get_raw_body = function()
+      local chunk, eof = ngx.arg[1], ngx.arg[2]
+      if chunk and chunk ~= "" then
+        body_buffer[#body_buffer + 1] = chunk
+      end
+      if not eof then
+        ngx.arg[1] = nil
+        return nil
+      end
+      return concat(body_buffer)
+    end,
+    set_raw_body = function(body)
+      ngx.arg[1] = body
+      ngx.arg[2] = true
+    end,
+    exit = function(status, body, headers)
+      response.status = status
+      response.exit_body = body
+      return status
+    end,
+  },
+  router = {
+    get_route = function() return request.route end,
+    get_service = function() return request.service end,
+  },
+  client = {
+    get_consumer = function() return request.consumer end,
+    get_ip = function() return "127.0.0.1" end,
+  },
+}
+
+-- Start a new request. `spec` fields: method, path, headers, query, vars,
+-- route, service, consumer, status, response_headers.
+function stub.new_request(spec)
+  request = {
+    id = spec.id or "0123456789abcdef",
+    method = spec.method or "GET",
+    path = spec.path or "/",
+    headers = spec.headers or {},
+    query = spec.query or {},
+    raw_query = spec.raw_query,
+    vars = spec.vars,
+    route = spec.route,
+    service = spec.service,
+    consumer = spec.consumer,
+    upstream_headers = {},
+  }
+  local headers = {}
+  for name, value in pairs(spec.response_headers or {}) do
+    headers[lower(name)] = value
+  end
+  response = { status = spec.status or 200, headers = headers }
+  ctx_plugin, ctx_shared, body_buffer = {}, {}, {}
+end
+
+function stub.response()
+  return response
+end
+
+function stub.upstream_request()
+  return request
+end
+
+-- Resolve `kong.plugins.<name>.<module>` to `<dir>/<module>.lua`
+function stub.add_plugin_path(name, dir)
+  local prefix = "kong.plugins." .. name .. "."
+  table.insert(package.loaders, 2, function(module)
+    if module:sub(1, #prefix) ~= prefix then
+      return nil
+    end
+    local path = dir .. "/" .. module:sub(#prefix + 1):gsub("%.", "/") .. ".lua"
+    local chunk, err = loadfile(path)
+    if not chunk then
+      return "\n\t" .. tostring(err)
+    end
+    return chunk
+  end)
+end
+
+-- Modules Kong bundles that plugins may require
+package.preload["cjson.safe"] = function() return json end
+package.preload["cjson"] = function() return json end
+package.preload["resty.http"] = function()
+  return {
+    new = function()
+      return { request_uri = function() return { status = 200, body = "" } end }
+    end,
+  }
+end
+-- Bounded cache with the resty.lrucache get/set interface; when full it
+-- starts over instead of evicting the least recently used entry
+package.preload["resty.lrucache"] = function()
+  local cache = {}
+  cache.__index = cache
+  function cache:get(key)
+    return self.items[key]
+  end
+  function cache:set(key, value)
+    if self.items[key] == nil then
+      if self.count >= self.size then
+        self.items, self.count = {}, 0
+      end
+      self.count = self.count + 1
+    end
+    self.items[key] = value
+  end
+  return {
+    new = function(size)
+      return setmetatable({ items = {}, count = 0, size = size }, cache)
+    end,
+  }
+end
+package.preload["kong.db.schema.typedefs"] = function()
+  local typedef = setmetatable({}, { __call = function(_, field) return field or {} end })
+  return setmetatable({}, { __index = function() return typedef end })
+end
+
+return stub
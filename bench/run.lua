@@ -0,0 +1,246 @@
+-- run.lua - Offline per-request benchmarks for the plugins in this repo
+--
+-- Loads each plugin's handler.lua under LuaJIT with the PDK stub from
+-- pdk_stub.lua and replays synthetic requests through access,
+-- header_filter, body_filter and log. For every scenario it reports the
+-- time per request, bytes allocated per request and requests per second,
+-- both raw and net of the driver itself (an empty handler run over the
+-- same request and body). Run from anywhere:
+--
+--   luajit bench/run.lua [--filter PATTERN] [--duration SECONDS]
+--                        [--rounds N] [--json FILE]
+--
+-- --json writes a report that bench/compare.py can diff between commits.
+
+local bench_dir = (arg and arg[0] or ""):match("^(.*)/[^/]*$") or "."
+local root = bench_dir .. "/.."
+package.path = bench_dir .. "/?.lua;" .. package.path
+
+local json = require "json"
+local stub = require "pdk_stub"
+local plugins = require "scenarios"
+
+local clock = os.clock
+local format = string.format
+
+local CHUNK_SIZE = 8192                -- body_filter chunk size, like proxy buffers
+local CALIBRATE_SECONDS = 0.05
+local ALLOC_BUDGET_BYTES = 64 * 1024 * 1024
+
+local options = { duration = 0.5, rounds = 3 }
+
+local function usage(message)
+  if message then
+    io.stderr:write(message, "\n")
+  end
+  io.stderr:write("usage: luajit bench/run.lua [--filter PATTERN] [--duration SECONDS] [--rounds N] [--json FILE]\n")
+  os.exit(message and 2 or 0)
+end
+
+local i = 1
+while arg and arg[i] do
+  local flag, value = arg[i], arg[i + 1]
+  if flag == "--filter" and value then
+    options.filter = value
+  elseif flag == "--duration" and tonumber(value) then
+    options.duration = tonumber(value)
+  elseif flag == "--rounds" and tonumber(value) then
+    options.rounds = math.max(1, math.floor(tonumber(value)))
+  elseif flag == "--json" and value then
+    options.json = value
+  elseif flag == "-h" or flag == "--help" then
+    usage()
+  else
+    usage("unknown or incomplete option: " .. flag)
+  end
+  i = i + 2
+end
+
+-- Plugin configuration: schema defaults overlaid with the scenario's conf
+local function schema_defaults(schema)
+  local defaults = {}
+  for _, field in ipairs(schema.fields or {}) do
+    local config = field.config
+    if config then
+      for _, entry in ipairs(config.fields or {}) do
+        local name, spec = next(entry)
+        if spec.default ~= nil then
+          defaults[name] = spec.default
+        end
+      end
+    end
+  end
+  return defaults
+end
+
+local function merge(base, overrides)
+  local result = {}
+  for k, v in pairs(base or {}) do result[k] = v end
+  for k, v in pairs(overrides or {}) do result[k] = v end
+  return result
+end
+
+local function split_chunks(body)
+  local chunks = {}
+  for offset = 1, #body, CHUNK_SIZE do
+    chunks[#chunks + 1] = body:sub(offset, offset + CHUNK_SIZE - 1)
+  end
+  return chunks
+end
+
+-- One request through every phase the handler implements
+local function make_driver(handler, conf, request, chunks)
+  local access = handler.access
+  local header_filter = handler.header_filter
+  local body_filter = chunks and handler.body_filter
+  local log = handler.log
+  local n_chunks = chunks and #chunks or 0
+  local arg = ngx.arg
+  local new_request, advance, run_timers = stub.new_request, stub.advance, stub.run_timers
+
+  return function(iterations)
+    for _ = 1, iterations do
+      new_request(request)
+      if access then access(handler, conf) end
+      if header_filter then header_filter(handler, conf) end
+      for c = 1, n_chunks do
+        arg[1], arg[2] = chunks[c], c == n_chunks
+        if body_filter then body_filter(handler, conf) end
+      end
+      if log then log(handler, conf) end
+      advance(0.001)
+      run_timers()
+    end
+  end
+end
+
+local function time(run, iterations)
+  local started = clock()
+  run(iterations)
+  return clock() - started
+end
+
+-- Best-of-rounds seconds per request, plus the iteration count used
+local function measure_time(run)
+  local iterations = 1
+  while time(run, iterations) < CALIBRATE_SECONDS do
+    iterations = iterations * 2
+  end
+  iterations = math.max(1, math.floor(iterations * options.duration / CALIBRATE_SECONDS))
+
+  local best = math.huge
+  for _ = 1, options.rounds do
+    best = math.min(best, time(run, iterations) / iterations)
+  end
+  return best, iterations
+end
+
+-- Bytes allocated per request, with the collector stopped
+local function measure_alloc(run)
+  local function allocated(iterations)
+    collectgarbage("collect")
+    collectgarbage("stop")
+    local before = collectgarbage("count")
+    run(iterations)
+    local after = collectgarbage("count")
+    collectgarbage("restart")
+    return (after - before) * 1024
+  end
+
+  local single = math.max(allocated(1), 1)
+  local iterations = math.max(1, math.min(1000, math.floor(ALLOC_BUDGET_BYTES / single)))
+  return allocated(iterations) / iterations
+end
+
+local empty_handler = {
+  access = function() end,
+  header_filter = function() end,
+  body_filter = function() end,
+  log = function() end,
+}
+
+local function bench(handler, conf, request, chunks)
+  local run = make_driver(handler, conf, request, chunks)
+  run(100) -- warm up caches and JIT traces
+  local seconds, iterations = measure_time(run)
+  return { seconds = seconds, iterations = iterations, bytes = measure_alloc(run) }
+end
+
+local results = {}
+
+print(format("%-18s %-22s %9s %12s %12s %12s %12s", "plugin", "scenario", "payload", "ns/op", "net ns/op", "B/op", "ops/s"))
+
+for _, plugin in ipairs(plugins) do
+  local dir = root .. "/" .. plugin.dir
+  local handler_file = io.open(dir .. "/handler.lua")
+  if not handler_file then
+    print(format("%-18s skipped: %s/handler.lua not found%s", plugin.name, plugin.dir,
+                 plugin.hint and " (" .. plugin.hint .. ")" or ""))
+  else
+    handler_file:close()
+    stub.add_plugin_path(plugin.name, dir)
+    local handler = require("kong.plugins." .. plugin.name .. ".handler")
+    local defaults = schema_defaults(require("kong.plugins." .. plugin.name .. ".schema"))
+
+    for _, scenario in ipairs(plugin.scenarios) do
+      local label = plugin.name .. "/" .. scenario.name
+      if not options.filter or label:find(options.filter, 1, true) then
+        local conf = merge(defaults, scenario.conf)
+        local request = merge(plugins.base_request, scenario.request)
+
+        for _, size in ipairs(scenario.payloads or { 0 }) do
+          local chunks
+          if size > 0 then
+            local body = plugins.json_body(size)
+            chunks = split_chunks(body)
+            request.response_headers = merge(request.response_headers, { ["Content-Length"] = tostring(#body) })
+          end
+
+          local measured = bench(scenario.handler and scenario.handler(handler) or handler, conf, request, chunks)
+          local baseline = bench(empty_handler, conf, request, chunks)
+          local result = {
+            plugin = plugin.name,
+            scenario = scenario.name,
+            payload_bytes = size,
+            iterations = measured.iterations,
+            ns_per_op = measured.seconds * 1e9,
+            net_ns_per_op = math.max(0, measured.seconds - baseline.seconds) * 1e9,
+            bytes_per_op = measured.bytes,
+            net_bytes_per_op = math.max(0, measured.bytes - baseline.bytes),
+            ops_per_sec = 1 / measured.seconds,
+          }
+          results[#results + 1] = result
+          print(format("%-18s %-22s %9d %12.1f %12.1f %12.0f %12.0f", result.plugin, result.scenario, size,
+                       result.ns_per_op, result.net_ns_per_op, result.bytes_per_op, result.ops_per_sec))
+        end
+      end
+    end
+  end
+end
+
+-- Fixed key order and one result per line, so reports diff cleanly
+if options.json then
+  local fields = {
+    "plugin", "scenario", "payload_bytes", "iterations",
+    "ns_per_op", "net_ns_per_op", "bytes_per_op", "net_bytes_per_op", "ops_per_sec",
+  }
+  local lines = {}
+  for n, result in ipairs(results) do
+    local parts = {}
+    for k, name in ipairs(fields) do
+      local value = result[name]
+      parts[k] = format("%q: %s", name, type(value) == "string" and format("%q", value)
+                                                         or format(value % 1 == 0 and "%d" or "%.1f", value))
+    end
+    lines[n] = "    {" .. table.concat(parts, ", ") .. "}"
+  end
+
+  local file = assert(io.open(options.json, "w"))
+  file:write("{\n")
+  file:write(format('  "runtime": %q,\n', jit and jit.version or _VERSION))
+  file:write(format('  "json": %q,\n', json.codec or "cjson"))
+  file:write(format('  "duration": %.3f,\n  "rounds": %d,\n', options.duration, options.rounds))
+  file:write('  "results": [\n', table.concat(lines, ",\n"), "\n  ]\n}\n")
+  file:close()
+  print("wrote " .. options.json)
+end
@@ -0,0 +1,148 @@
+-- scenarios.lua - Plugins, configurations and traffic the benchmark runs
+--
+-- Each plugin entry names the directory holding its handler.lua (relative
+-- to the repository root) and a list of scenarios. A scenario gives the
+-- plugin configuration (merged over the schema defaults), the request to
+-- replay and, for body_filter work, the response body sizes to try. A
+-- scenario's `handler`, if set, builds the handler to drive from the
+-- plugin's own, to compare an alternative implementation.
+
+local concat = table.concat
+
+-- Request shared by every scenario unless it overrides fields
+local base_request = {
+  method = "GET",
+  path = "/api/v1/users/42",
+  headers = {
+    host = "api.example.com",
+    accept = "application/json",
+    ["user-agent"] = "bench/1.0",
+  },
+  route = { id = "6f0f8e4e-7d5b-4c1d-9a56-6f4b0a3f2c11", name = "users" },
+  service = { id = "0b7c4a2e-1d2f-4d43-8a67-3c5e9f1d2a10", name = "users-api" },
+  consumer = { id = "e3b5d2f1-9c84-4b7a-a1f6-2d8c7e5b4a93", username = "bench" },
+  status = 200,
+  response_headers = { ["Content-Type"] = "application/json" },
+}
+
+local bodies = {}
+
+-- A JSON object of roughly `size` bytes: {"items":[{...},{...}]}
+local function json_body(size)
+  if bodies[size] then
+    return bodies[size]
+  end
+  local items, length, i = {}, 12, 0
+  while length < size do
+    i = i + 1
+    local item = string.format('{"id":%d,"name":"item-%06d","active":true,"tags":["a","b"]}', i, i)
+    items[i] = item
+    length = length + #item + 1
+  end
+  bodies[size] = '{"items":[' .. concat(items, ",") .. "]}"
+  return bodies[size]
+end
+
+-- The largest stays under the default max_buffered_body_size (1 MiB)
+local PAYLOADS = { 1024, 65536, 524288 }
+
+-- api-version's header_filter as shipped in 0.1.0, which ignores
+-- custom_header_name and header_prefix; compare with "headers", which
+-- runs the precomputed header plan
+local function api_version_0_1_0(handler)
+  return {
+    header_filter = function(_, conf)
+      kong.response.set_header("X-API-Version", conf.version)
+      kong.response.set_header("X-Plugin-Version", handler.VERSION)
+      if conf.add_server_header then
+        kong.response.set_header("X-Server", "Kong-Gateway")
+      end
+      if conf.add_timestamp then
+        kong.response.set_header("X-Response-Time", tostring(ngx.now()))
+      end
+    end,
+  }
+end
+
+-- The same logic honouring the header fields, evaluated per request
+local function api_version_inline(handler)
+  return {
+    header_filter = function(_, conf)
+      kong.response.set_header(conf.custom_header_name, conf.header_prefix .. conf.version)
+      kong.response.set_header("X-Plugin-Version", handler.VERSION)
+      if conf.add_server_header then
+        kong.response.set_header("X-Server", "Kong-Gateway")
+      end
+      if conf.add_timestamp then
+        kong.response.set_header("X-Response-Time", tostring(ngx.now()))
+      end
+    end,
+  }
+end
+
+return {
+  {
+    name = "api-version",
+    dir = "kong-hybrid-setup/custom-plugins/api-version/kong/plugins/api-version",
+    hint = "run python kong-hybrid-setup/generate.py first",
+    scenarios = {
+      { name = "headers", conf = {} },
+      { name = "headers-0.1.0", conf = {}, handler = api_version_0_1_0 },
+      { name = "headers-inline", conf = {}, handler = api_version_inline },
+      { name = "headers-no-timestamp", conf = { add_timestamp = false, add_server_header = false } },
+      { name = "log-queue", conf = { enable_logging = true } },
+      { name = "log-sampled", conf = { enable_logging = true, log_sampling = "ratio", log_sample_ratio = 0.01 } },
+      {
+        name = "negotiate-header",
+        conf = { version_sources = { "header", "path" }, supported_versions = { "1.0.0", "2.0.0", "2.1.0" } },
+        request = { headers = { host = "api.example.com", ["accept-version"] = "2" } },
+      },
+      {
+        name = "negotiate-path",
+        conf = { version_sources = { "header", "path" }, upstream_path_prefix = "/internal/${major}" },
+      },
+      {
+        name = "body-skipped",
+        conf = { modify_body = true },
+        request = { response_headers = { ["Content-Type"] = "text/html" } },
+        payloads = PAYLOADS,
+      },
+      { name = "body-buffered", conf = { modify_body = true, body_mode = "buffered" }, payloads = PAYLOADS },
+      { name = "body-streaming", conf = { modify_body = true, body_mode = "streaming" }, payloads = PAYLOADS },
+      {
+        name = "body-cached",
+        conf = { modify_body = true, body_mode = "buffered", body_cache = true, body_cache_max_entry_size = 1048576 },
+        request = { response_headers = { ["Content-Type"] = "application/json", ETag = '"bench-1"' } },
+        payloads = PAYLOADS,
+      },
+    },
+  },
+  {
+    name = "my-custom-plugin",
+    dir = "kong-hybrid-local/custom-plugins/kong/plugins/my-custom-plugin",
+    scenarios = {
+      { name = "static-header", conf = { header_name = "X-Custom-Header", header_value = "hello" } },
+      {
+        name = "template-rules",
+        conf = {
+          rules = {
+            { header = "X-Consumer", value = "${consumer_username} (${consumer_id})" },
+            { header = "X-Route", value = "${service_name}/${route_name}", methods = { "GET", "POST" } },
+            { header = "X-Trace", value = "req=${request_id}", path_prefix = "/api/" },
+            { header = "X-Skipped", value = "${path}", path_prefix = "/admin/" },
+          },
+        },
+      },
+    },
+  },
+  {
+    name = "custom-plugin",
+    dir = "kong-hybrid-local-mtls/plugins/custom-plugin",
+    scenarios = {
+      { name = "access-log", conf = {} },
+    },
+  },
+
+  base_request = base_request,
+  json_body = json_body,
+}
@@ -0,0 +1,56 @@
+-- Per-route / per-status request counters for custom-plugin, kept in an
+-- ngx.shared dict so every worker increments the same lock-free counters.
+-- The dict must be declared in the nginx config, e.g. with
+-- KONG_NGINX_HTTP_LUA_SHARED_DICT="custom_plugin_counters 1m".
+
+local DICT_NAME = "custom_plugin_counters"
+local METRIC = "custom_plugin_requests_total"
+
+local dict = ngx.shared[DICT_NAME]
+local warned = false
+
+local Counters = {}
+
+function Counters.incr(route, status)
+  if not dict then
+    if not warned then
+      kong.log.err("custom-plugin: lua_shared_dict '", DICT_NAME, "' is not configured")
+      warned = true
+    end
+    return
+  end
+
+  local _, err = dict:incr(route .. "|" .. status, 1, 0)
+  if err then
+    kong.log.warn("custom-plugin: failed to increment counter: ", err)
+  end
+end
+
+local function escape_label(value)
+  return (value:gsub("[\\\"\n]", { ["\\"] = "\\\\", ['"'] = '\\"', ["\n"] = "\\n" }))
+end
+
+-- Prometheus text exposition of all counters
+function Counters.prometheus()
+  local lines = {
+    "# HELP " .. METRIC .. " Requests seen by custom-plugin, by route and status",
+    "# TYPE " .. METRIC .. " counter",
+  }
+  if not dict then
+    return table.concat(lines, "\n") .. "\n"
+  end
+
+  local keys = dict:get_keys(0)
+  table.sort(keys)
+  for _, key in ipairs(keys) do
+    local value = dict:get(key)
+    if value then
+      local route, status = key:match("^(.*)|(%d+)$")
+      lines[#lines + 1] = string.format('%s{route="%s",status="%s"} %d',
+                                        METRIC, escape_label(route), status, value)
+    end
+  end
+  return table.concat(lines, "\n") .. "\n"
+end
+
+return Counters
@@ -1,11 +1,21 @@
+local counters = require "kong.plugins.custom-plugin.counters"
+local phase_timer = require "kong.plugins.custom-plugin.phase_timer"
+
 local CustomHandler = {
   PRIORITY = 1000,
   VERSION = "1.0",
 }
 
 function CustomHandler:access(conf)
-  kong.log.info("custom-plugin: access phase")
   kong.response.set_header("x-custom-plugin", "ok")
 end
 
-return CustomHandler
+-- Count requests instead of writing a log line per request;
+-- see GET /custom-plugin/metrics on the status listener
+function CustomHandler:log(conf)
+  local route = kong.router.get_route()
+  counters.incr(route and (route.name or route.id) or "none", kong.response.get_status())
+end
+
+-- Phases are timed when the plugin_phase_latency shared dict is declared
+return phase_timer.wrap(CustomHandler, "custom-plugin")
@@ -0,0 +1,14 @@
+-- Exposes custom-plugin counters, and phase latency histograms when enabled,
+-- on the status listener (KONG_STATUS_LISTEN)
+local counters = require "kong.plugins.custom-plugin.counters"
+local phase_timer = require "kong.plugins.custom-plugin.phase_timer"
+
+return {
+  ["/custom-plugin/metrics"] = {
+    GET = function()
+      return kong.response.exit(200, counters.prometheus() .. phase_timer.prometheus("custom-plugin"), {
+        ["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8",
+      })
+    end,
+  },
+}
@@ -1,6 +1,123 @@
 #!/usr/bin/env bash
+# Build the Kong image with custom-plugin and load it into the kind cluster.
+#
+#   scripts/build-plugin.sh                          # plugin shipped as Lua source
+#   PLUGIN_FORMAT=bytecode scripts/build-plugin.sh   # precompiled LuaJIT bytecode
+#   scripts/build-plugin.sh --compare                # build both, compare size and load time
+#
+# Images are content-addressed: the tag is a hash of the plugin sources, the
+# Dockerfile, the bytecode compiler script and PLUGIN_FORMAT. When every kind
+# node already holds that image, nothing is built or loaded; the nodes' copy
+# is just retagged as IMAGE_NAME. FORCE=1 rebuilds and reloads regardless.
 set -euo pipefail
+ROOT="$(cd "$(dirname "$0")/.." && pwd)"
 IMAGE_NAME=${IMAGE_NAME:-kong-custom:local}
-docker build -t ${IMAGE_NAME} -f ../Dockerfile .
-kind load docker-image ${IMAGE_NAME} --name kong-hybrid || true
-echo "Built and loaded image ${IMAGE_NAME}"
+PLUGIN_FORMAT=${PLUGIN_FORMAT:-source}
+CLUSTER=${CLUSTER:-kong-hybrid}
+PLUGIN_DIR=/usr/local/share/lua/5.1/kong/plugins/custom-plugin
+source "$ROOT/scripts/step-trace.sh"
+
+build() { # IMAGE FORMAT
+  docker build -t "$1" --build-arg PLUGIN_FORMAT="$2" -f "$ROOT/Dockerfile" "$ROOT"
+}
+
+# Microseconds to load every custom-plugin module, as each worker does at init
+load_time_us() { # IMAGE
+  docker run --rm --entrypoint resty "$1" -e "
+    local dir = '$PLUGIN_DIR'
+    local modules = {}
+    for file in io.popen('ls ' .. dir):lines() do
+      local name = file:match('^(.+)%.lua$')
+      if name then modules[#modules + 1] = 'kong.plugins.custom-plugin.' .. name end
+    end
+    local rounds = 200
+    local started = os.clock()
+    for _ = 1, rounds do
+      for _, m in ipairs(modules) do package.loaded[m] = nil end
+      for _, m in ipairs(modules) do require(m) end
+    end
+    print(string.format('%.1f', (os.clock() - started) / rounds * 1e6))
+  "
+}
+
+plugin_bytes() { # IMAGE
+  docker run --rm --entrypoint du "$1" -sb "$PLUGIN_DIR" | cut -f1
+}
+
+if [ "${1:-}" = "--compare" ]; then
+  repo=${IMAGE_NAME%:*}
+  printf "%-10s %14s %14s %18s\n" format image_bytes plugin_bytes "load_us/worker"
+  for format in source bytecode; do
+    build "$repo:$format" "$format" >/dev/null
+    printf "%-10s %14s %14s %18s\n" "$format" \
+      "$(docker image inspect -f '{{.Size}}' "$repo:$format")" \
+      "$(plugin_bytes "$repo:$format")" \
+      "$(load_time_us "$repo:$format")"
+  done
+  exit 0
+fi
+
+case "$PLUGIN_FORMAT" in
+  source|bytecode) ;;
+  *) echo "PLUGIN_FORMAT must be source or bytecode, not '$PLUGIN_FORMAT'" >&2; exit 1 ;;
+esac
+
+# Hash of everything that goes into the image
+content_hash() {
+  (
+    cd "$ROOT"
+    find plugins/custom-plugin Dockerfile scripts/compile-bytecode.sh -type f -print0 \
+      | sort -z | xargs -0 sha256sum
+    echo "PLUGIN_FORMAT=$PLUGIN_FORMAT"
+  ) | sha256sum | cut -c1-12
+}
+
+# Image reference as containerd on the kind nodes names it
+node_ref() { # IMAGE
+  local repo=${1%:*} tag=${1##*:} first=${1%%/*}
+  if [[ "$1" != */* ]]; then
+    repo="docker.io/library/$repo"
+  elif [[ "$first" != *.* && "$first" != *:* && "$first" != localhost ]]; then
+    repo="docker.io/$repo"
+  fi
+  echo "$repo:$tag"
+}
+
+HASH=$(content_hash)
+HASH_IMAGE="${IMAGE_NAME%:*}:$HASH"
+echo "Plugin content hash: $HASH"
+
+nodes=$(kind get nodes --name "$CLUSTER" 2>/dev/null || true)
+missing=()
+for node in $nodes; do
+  if [ -n "${FORCE:-}" ] || ! docker exec "$node" crictl inspecti "$(node_ref "$HASH_IMAGE")" >/dev/null 2>&1; then
+    missing+=("$node")
+  fi
+done
+
+built=0
+if [ -n "${FORCE:-}" ] || ! docker image inspect "$HASH_IMAGE" >/dev/null 2>&1; then
+  if [ -z "${FORCE:-}" ] && [ -n "$nodes" ] && [ ${#missing[@]} -eq 0 ]; then
+    : # every node has it already; no need for a local copy
+  else
+    trace_step "docker build" build "$HASH_IMAGE" "$PLUGIN_FORMAT"
+    built=1
+  fi
+fi
+if docker image inspect "$HASH_IMAGE" >/dev/null 2>&1; then
+  docker tag "$HASH_IMAGE" "$IMAGE_NAME"
+fi
+
+if [ ${#missing[@]} -gt 0 ]; then
+  trace_step "kind load" kind load docker-image "$HASH_IMAGE" --name "$CLUSTER" --nodes "$(IFS=,; echo "${missing[*]}")"
+fi
+for node in $nodes; do
+  docker exec "$node" ctr -n k8s.io images tag --force "$(node_ref "$HASH_IMAGE")" "$(node_ref "$IMAGE_NAME")" >/dev/null
+done
+
+node_count=$(echo $nodes | wc -w)
+if [ $built -eq 0 ] && [ ${#missing[@]} -eq 0 ]; then
+  echo "Cache hit: ${HASH_IMAGE} already built and on ${node_count} node(s); tagged as ${IMAGE_NAME} (plugin as ${PLUGIN_FORMAT})"
+else
+  echo "Built: $([ $built -eq 1 ] && echo yes || echo "no (cached)"), loaded into ${#missing[@]}/${node_count} node(s): ${HASH_IMAGE} tagged as ${IMAGE_NAME} (plugin as ${PLUGIN_FORMAT})"
+fi
@@ -0,0 +1,47 @@
+#!/usr/bin/env bash
+# Compile every .lua file under SRC to LuaJIT bytecode in DEST, keeping the
+# .lua names so Kong's package.path finds them unchanged (LuaJIT's loader
+# accepts bytecode whatever the extension). Each output is then checked for
+# the bytecode header and loaded once to make sure it is valid.
+#
+# Bytecode is tied to the LuaJIT build that produced it, so run this with
+# the luajit from the Kong image the plugin will run in (the Dockerfile does).
+#
+#   scripts/compile-bytecode.sh plugins/custom-plugin build/custom-plugin
+#
+# LUAJIT_BCFLAGS defaults to -g (keep line numbers for error logs); use -s
+# to strip debug info for the smallest output.
+set -euo pipefail
+SRC=${1:?usage: compile-bytecode.sh SRC_DIR DEST_DIR}
+DEST=${2:?usage: compile-bytecode.sh SRC_DIR DEST_DIR}
+LUAJIT_BCFLAGS=${LUAJIT_BCFLAGS:--g}
+LUAJIT=${LUAJIT:-$(command -v luajit || echo /usr/local/openresty/luajit/bin/luajit)}
+
+mkdir -p "$DEST"
+files=()
+while IFS= read -r -d '' src; do
+  rel=${src#"$SRC"/}
+  out="$DEST/$rel"
+  mkdir -p "$(dirname "$out")"
+  "$LUAJIT" -b $LUAJIT_BCFLAGS "$src" "$out"
+  files+=("$out")
+done < <(find "$SRC" -name '*.lua' -print0 | sort -z)
+
+if [ ${#files[@]} -eq 0 ]; then
+  echo "No .lua files under $SRC" >&2
+  exit 1
+fi
+
+"$LUAJIT" - "${files[@]}" <<'LUA'
+for _, path in ipairs(arg) do
+  local f = assert(io.open(path, "rb"))
+  local header = f:read(3)
+  f:close()
+  if header ~= "\27LJ" then
+    error(path .. " is not LuaJIT bytecode")
+  end
+  assert(loadfile(path))
+end
+LUA
+
+echo "Compiled ${#files[@]} modules from $SRC to bytecode in $DEST"
@@ -1,7 +1,8 @@
 #!/usr/bin/env bash
 set -euo pipefail
 CLUSTER=${CLUSTER:-kong-hybrid}
-cat <<EOF | kind create cluster --name "$CLUSTER" --config=-
+source "$(dirname "$0")/step-trace.sh"
+trace_step "kind create cluster" kind create cluster --name "$CLUSTER" --config=- <<EOF
 kind: Cluster
 apiVersion: kind.x-k8s.io/v1alpha4
 nodes:
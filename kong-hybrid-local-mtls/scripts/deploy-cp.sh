@@ -1,7 +1,10 @@
 #!/usr/bin/env bash
 set -euo pipefail
-helm repo add kong https://charts.konghq.com || true
-helm repo update
-kubectl create ns kong || true
+source "$(dirname "$0")/step-trace.sh"
+# Pinned chart from ../charts (charts.lock); fetched only if not vendored yet
+source "$(dirname "$0")/helm-charts.sh"
+trace_step "vendor charts" charts_vendor
+KONG_CHART="$(chart_ref kong/kong)"
+trace_step "create namespace" kubectl create ns kong || true
 
-helm upgrade --install kong-cp kong/kong   --namespace kong   -f ../helm-values/cp-values.yaml   --wait --timeout 5m
+trace_step "helm upgrade kong-cp" helm upgrade --install kong-cp "$KONG_CHART"   --namespace kong   -f ../helm-values/cp-values.yaml   --wait --timeout 5m
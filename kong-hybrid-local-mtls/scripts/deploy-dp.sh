@@ -1,6 +1,13 @@
 #!/usr/bin/env bash
 set -euo pipefail
-helm repo add kong https://charts.konghq.com || true
-helm repo update
+source "$(dirname "$0")/step-trace.sh"
+# Pinned chart from ../charts (charts.lock); fetched only if not vendored yet
+source "$(dirname "$0")/helm-charts.sh"
+trace_step "vendor charts" charts_vendor
+KONG_CHART="$(chart_ref kong/kong)"
+# nginx snippets the DP can include (KONG_NGINX_HTTP_INCLUDE in dp-values.yaml)
+kubectl -n kong create configmap kong-dp-nginx-include \
+  --from-file="$(dirname "$0")/../helm-values/phase-latency.conf" \
+  --dry-run=client -o yaml | kubectl apply -f -
 
-helm upgrade --install kong-dp kong/kong   --namespace kong   -f ../helm-values/dp-values.yaml   --wait --timeout 5m
+trace_step "helm upgrade kong-dp" helm upgrade --install kong-dp "$KONG_CHART"   --namespace kong   -f ../helm-values/dp-values.yaml   --wait --timeout 5m
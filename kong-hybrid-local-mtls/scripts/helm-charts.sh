@@ -0,0 +1,187 @@
+#!/usr/bin/env bash
+
+# helm-charts.sh - Pinned Helm charts vendored into a local chart directory
+#
+#   source "$SCRIPT_DIR/helm-charts.sh"
+#   charts_vendor                                  # instead of helm repo add/update
+#   helm upgrade --install kong-cp "$(chart_ref kong/kong)" ...
+#
+#   ./scripts/helm-charts.sh vendor                # fetch pinned charts not cached yet
+#   ./scripts/helm-charts.sh refresh [--latest]    # fetch every pin again (--latest: bump pins first)
+#   ./scripts/helm-charts.sh list
+#
+# charts/charts.lock (next to scripts/) pins each chart as NAME VERSION
+# REPOSITORY. Fetched archives are stored under charts/sha256/ by the
+# SHA-256 of their bytes and listed in charts/index as NAME VERSION
+# sha256:DIGEST. chart_ref resolves a chart to its verified archive, so
+# once a pin is cached no run talks to a chart repository again; only a
+# missing pin is fetched (with helm pull --repo, no helm repo add), and
+# cached ones only with refresh. Set CHARTS_OFFLINE=1 to fail instead of
+# fetching; CHARTS_DIR points at another chart directory.
+
+CHARTS_DIR="${CHARTS_DIR:-$(dirname "$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)")/charts}"
+CHARTS_LOCK="${CHARTS_LOCK:-$CHARTS_DIR/charts.lock}"
+
+_charts_sha256() {
+    if command -v sha256sum > /dev/null; then
+        sha256sum "$@" | cut -d' ' -f1
+    else
+        shasum -a 256 "$@" | cut -d' ' -f1
+    fi
+}
+
+# Pins as "NAME VERSION REPOSITORY" lines
+_charts_pins() {
+    if [[ ! -f "$CHARTS_LOCK" ]]; then
+        echo "❌ $CHARTS_LOCK not found" >&2
+        return 1
+    fi
+    awk '!/^[[:space:]]*(#|$)/ { print $1, $2, $3 }' "$CHARTS_LOCK"
+}
+
+_charts_pin() {
+    _charts_pins | awk -v name="$1" '$1 == name { print; exit }'
+}
+
+# Cached archive of NAME VERSION whose bytes still match the index
+_charts_cached() {
+    local name="$1" version="$2" digest file
+    digest="$(awk -v name="$name" -v version="$version" \
+        '$1 == name && $2 == version { sub(/^sha256:/, "", $3); print $3; exit }' "$CHARTS_DIR/index" 2> /dev/null)"
+    file="$CHARTS_DIR/sha256/$digest.tgz"
+    if [[ -n "$digest" && -f "$file" && "$(_charts_sha256 "$file")" == "$digest" ]]; then
+        echo "$file"
+    else
+        return 1
+    fi
+}
+
+# helm pull NAME VERSION from REPOSITORY into the chart directory
+_charts_fetch() {
+    local name="$1" version="$2" repository="$3" chart="${1#*/}" tmp archive digest
+    tmp="$(mktemp -d)"
+    echo "⬇️  $name $version from $repository" >&2
+    if [[ "$repository" == oci://* ]]; then
+        helm pull "$repository/$chart" --version "$version" --destination "$tmp" > /dev/null
+    else
+        helm pull "$chart" --repo "$repository" --version "$version" --destination "$tmp" > /dev/null
+    fi || { rm -rf "$tmp"; return 1; }
+    archive="$tmp/${name##*/}-$version.tgz"
+    if [[ ! -f "$archive" ]]; then
+        echo "❌ helm pull did not write ${archive##*/} for $name $version" >&2
+        rm -rf "$tmp"
+        return 1
+    fi
+    digest="$(_charts_sha256 "$archive")"
+    mkdir -p "$CHARTS_DIR/sha256"
+    mv "$archive" "$CHARTS_DIR/sha256/$digest.tgz"
+    rm -rf "$tmp"
+    {
+        awk -v name="$name" -v version="$version" '!($1 == name && $2 == version)' "$CHARTS_DIR/index" 2> /dev/null
+        echo "$name $version sha256:$digest"
+    } | sort > "$CHARTS_DIR/index.tmp"
+    mv "$CHARTS_DIR/index.tmp" "$CHARTS_DIR/index"
+}
+
+# Fetch every pin that is not cached (or whose archive no longer verifies)
+charts_vendor() {
+    local name version repository pins
+    pins="$(_charts_pins)" || return
+    while read -r name version repository; do
+        if [[ -n "$name" ]] && ! _charts_cached "$name" "$version" > /dev/null; then
+            if [[ -n "${CHARTS_OFFLINE:-}" ]]; then
+                echo "❌ $name $version is not in $CHARTS_DIR and CHARTS_OFFLINE is set" >&2
+                return 1
+            fi
+            _charts_fetch "$name" "$version" "$repository" || return
+        fi
+    done <<< "$pins"
+}
+
+# Fetch every pin again, drop index entries and archives no pin uses;
+# with --latest, first move each pin to the newest version in its repository
+charts_refresh() {
+    local name version repository latest pins
+    pins="$(_charts_pins)" || return
+    if [[ "${1:-}" == "--latest" ]]; then
+        while read -r name version repository; do
+            [[ -n "$name" ]] || continue
+            if [[ "$repository" == oci://* ]]; then
+                latest="$(helm show chart "$repository/${name#*/}" | awk '/^version:/ { print $2 }')"
+            else
+                latest="$(helm show chart "${name#*/}" --repo "$repository" | awk '/^version:/ { print $2 }')"
+            fi
+            if [[ -n "$latest" && "$latest" != "$version" ]]; then
+                echo "📌 $name $version -> $latest" >&2
+                awk -v name="$name" -v from="$version" -v to="$latest" '
+                    !/^[[:space:]]*#/ && $1 == name && $2 == from {
+                        i = index($0, $1) + length($1); i += index(substr($0, i), from) - 1
+                        $0 = substr($0, 1, i - 1) to substr($0, i + length(from))
+                    }
+                    { print }' \
+                    "$CHARTS_LOCK" > "$CHARTS_LOCK.tmp" && mv "$CHARTS_LOCK.tmp" "$CHARTS_LOCK"
+            fi
+        done <<< "$pins"
+        pins="$(_charts_pins)"
+    fi
+
+    while read -r name version repository; do
+        if [[ -n "$name" ]]; then
+            _charts_fetch "$name" "$version" "$repository" || return
+        fi
+    done <<< "$pins"
+
+    awk 'NR == FNR { pinned[$1 " " $2] = 1; next } ($1 " " $2) in pinned' \
+        <(echo "$pins") "$CHARTS_DIR/index" > "$CHARTS_DIR/index.tmp"
+    mv "$CHARTS_DIR/index.tmp" "$CHARTS_DIR/index"
+    local file
+    for file in "$CHARTS_DIR"/sha256/*.tgz; do
+        if [[ -f "$file" ]] && ! grep -q "sha256:$(basename "$file" .tgz)\$" "$CHARTS_DIR/index"; then
+            rm -f "$file"
+        fi
+    done
+}
+
+# Chart reference for helm upgrade/template: the verified archive of NAME's
+# pinned version, fetched first if it is not cached yet
+chart_ref() {
+    local name="$1" pin version repository file
+    pin="$(_charts_pin "$name")"
+    if [[ -z "$pin" ]]; then
+        echo "❌ $name is not pinned in $CHARTS_LOCK" >&2
+        return 1
+    fi
+    read -r name version repository <<< "$pin"
+    if ! file="$(_charts_cached "$name" "$version")"; then
+        if [[ -n "${CHARTS_OFFLINE:-}" ]]; then
+            echo "❌ $name $version is not in $CHARTS_DIR and CHARTS_OFFLINE is set" >&2
+            return 1
+        fi
+        _charts_fetch "$name" "$version" "$repository" || return
+        file="$(_charts_cached "$name" "$version")" || return
+    fi
+    echo "$file"
+}
+
+charts_list() {
+    local name version repository file pins
+    pins="$(_charts_pins)" || return
+    while read -r name version repository; do
+        [[ -n "$name" ]] || continue
+        file="$(_charts_cached "$name" "$version")" || file="(not cached)"
+        printf '%-20s %-10s %s\n' "$name" "$version" "$file"
+    done <<< "$pins"
+}
+
+if [[ "${BASH_SOURCE[0]}" == "$0" ]]; then
+    set -euo pipefail
+    case "${1:-}" in
+        vendor) charts_vendor ;;
+        refresh) charts_refresh "${2:-}" ;;
+        list) charts_list ;;
+        *)
+            echo "usage: $0 vendor | refresh [--latest] | list" >&2
+            exit 2
+            ;;
+    esac
+fi
@@ -0,0 +1,170 @@
+#!/usr/bin/env bash
+
+# step-trace.sh - Step timing for the deployment scripts
+#
+# With STEP_TRACE=FILE set, every traced step appends a Chrome trace event
+# (open FILE in chrome://tracing or https://ui.perfetto.dev) and the script
+# prints a timing table when it exits (unless STEP_TRACE_QUIET is set).
+# Without STEP_TRACE steps just run.
+#
+# In a script:   source "$SCRIPT_DIR/step-trace.sh"
+#                trace_step "helm upgrade kong-cp" helm upgrade --install ...
+# From make:     step-trace.sh run TARGET COMMAND [ARGS...]
+# Afterwards:    step-trace.sh summary FILE [BASELINE_FILE]
+#
+# FILE uses the trace-event JSON array format without the closing "]",
+# which the trace viewers accept, so parallel steps and nested scripts can
+# append to the same file.
+
+# Steps opened by this shell and not yet finished (a stack)
+TRACE_OPEN_NAMES=()
+TRACE_OPEN_STARTS=()
+# Finished steps, for the table printed at exit
+TRACE_DONE=()
+
+# Microseconds since the epoch (whole seconds where bash lacks EPOCHREALTIME)
+_trace_now() {
+    if [[ -n "${EPOCHREALTIME:-}" ]]; then
+        echo "${EPOCHREALTIME/[.,]/}"
+    else
+        echo "$(date +%s)000000"
+    fi
+}
+
+_trace_escape() {
+    local text="${1//\\/\\\\}"
+    echo "${text//\"/\\\"}"
+}
+
+_trace_event() {
+    # Creating the file with noclobber is atomic, so only one writer adds "["
+    ( set -C; printf '[\n' > "$STEP_TRACE" ) 2> /dev/null || true
+    printf '%s,\n' "$1" >> "$STEP_TRACE"
+}
+
+_trace_begin() {
+    TRACE_OPEN_NAMES+=("$1")
+    TRACE_OPEN_STARTS+=("$(_trace_now)")
+    if [[ ${#TRACE_OPEN_NAMES[@]} -eq 1 && ${#TRACE_DONE[@]} -eq 0 ]]; then
+        # Label this shell's lane in the viewer
+        _trace_event "{\"name\":\"thread_name\",\"ph\":\"M\",\"pid\":1,\"tid\":$$,\"args\":{\"name\":\"$(_trace_escape "$TRACE_SCRIPT")\"}}"
+    fi
+}
+
+_trace_end() {
+    local status="$1" last=$((${#TRACE_OPEN_NAMES[@]} - 1))
+    local name="${TRACE_OPEN_NAMES[$last]}" start="${TRACE_OPEN_STARTS[$last]}"
+    local end
+    end="$(_trace_now)"
+    unset "TRACE_OPEN_NAMES[$last]" "TRACE_OPEN_STARTS[$last]"
+    TRACE_DONE+=("$name|$((end - start))|$status")
+    _trace_event "{\"name\":\"$(_trace_escape "$name")\",\"cat\":\"$(_trace_escape "$TRACE_SCRIPT")\",\"ph\":\"X\",\"ts\":$start,\"dur\":$((end - start)),\"pid\":1,\"tid\":$$,\"args\":{\"status\":$status}}"
+}
+
+_trace_table() {
+    local entry name us status total=0
+    printf '%-40s %10s  %s\n' "step ($TRACE_SCRIPT)" "seconds" "status"
+    for entry in "${TRACE_DONE[@]}"; do
+        IFS='|' read -r name us status <<< "$entry"
+        printf '%-40s %10s  %s\n' "$name" "$(awk -v us="$us" 'BEGIN { printf "%.1f", us / 1e6 }')" \
+            "$([[ "$status" == 0 ]] && echo ok || echo "failed ($status)")"
+    done
+}
+
+# Close steps left open by `exit` or errexit, then print the table
+_trace_exit() {
+    local status=$?
+    while [[ ${#TRACE_OPEN_NAMES[@]} -gt 0 ]]; do
+        _trace_end "$status"
+    done
+    if [[ ${#TRACE_DONE[@]} -gt 0 && -z "${STEP_TRACE_QUIET:-}" ]]; then
+        _trace_table >&2
+    fi
+    return "$status"
+}
+
+# trace_step NAME COMMAND [ARGS...] - run COMMAND as the step NAME. A
+# failure under errexit ends the script as usual; the EXIT trap records it.
+trace_step() {
+    local name="$1"
+    shift
+    if [[ -z "${STEP_TRACE:-}" ]]; then
+        "$@"
+        return
+    fi
+    _trace_begin "$name"
+    "$@"
+    local status=$?
+    _trace_end "$status"
+    return "$status"
+}
+
+# Per-step totals from a trace file, optionally next to a baseline run
+trace_summary() {
+    awk '
+        function field(line, key,    m) {
+            if (!match(line, "\"" key "\":(\"([^\"\\\\]|\\\\.)*\"|-?[0-9]+)"))
+                return ""
+            m = substr(line, RSTART + length(key) + 3, RLENGTH - length(key) - 3)
+            if (m ~ /^"/) {
+                m = substr(m, 2, length(m) - 2)
+                gsub(/\\"/, "\"", m)
+                gsub(/\\\\/, "\\", m)
+            }
+            return m
+        }
+        FNR == 1 { run++ }
+        /"ph":"X"/ {
+            name = field($0, "name")
+            if (!(name in seen)) { seen[name] = 1; order[++n] = name }
+            dur[run, name] += field($0, "dur")
+            if (field($0, "status") != 0) failed[run, name] = 1
+        }
+        function cell(r, name) {
+            if (!((r, name) in dur)) return sprintf("%10s ", "-")
+            return sprintf("%9.1fs", dur[r, name] / 1e6) (failed[r, name] ? "!" : " ")
+        }
+        END {
+            if (run > 1) printf "%-40s %11s %11s %8s\n", "step", "baseline", "this run", "change"
+            else printf "%-40s %11s\n", "step", "seconds"
+            for (i = 1; i <= n; i++) {
+                name = order[i]
+                if (run > 1) {
+                    change = ((2, name) in dur) && dur[2, name] > 0 && ((1, name) in dur) ? sprintf("%+7.0f%%", 100 * (dur[1, name] / dur[2, name] - 1)) : ""
+                    printf "%-40s %11s %11s %8s\n", name, cell(2, name), cell(1, name), change
+                } else {
+                    printf "%-40s %11s\n", name, cell(1, name)
+                }
+            }
+            print "(! = failed; nested steps are included in their parents)"
+        }
+    ' "$@"
+}
+
+if [[ "${BASH_SOURCE[0]}" == "$0" ]]; then
+    # Executed rather than sourced
+    case "${1:-}" in
+        run)
+            [[ $# -ge 3 ]] || { echo "usage: $0 run NAME COMMAND [ARGS...]" >&2; exit 2; }
+            shift
+            TRACE_SCRIPT="${TRACE_SCRIPT:-make}"
+            if [[ -n "${STEP_TRACE:-}" ]]; then
+                trap _trace_exit EXIT
+            fi
+            trace_step "$@"
+            ;;
+        summary)
+            [[ $# -ge 2 && $# -le 3 ]] || { echo "usage: $0 summary FILE [BASELINE_FILE]" >&2; exit 2; }
+            trace_summary "${@:2}"
+            ;;
+        *)
+            echo "usage: $0 run NAME COMMAND [ARGS...] | summary FILE [BASELINE_FILE]" >&2
+            exit 2
+            ;;
+    esac
+else
+    TRACE_SCRIPT="${TRACE_SCRIPT:-$(basename "$0")}"
+    if [[ -n "${STEP_TRACE:-}" ]]; then
+        trap _trace_exit EXIT
+    fi
+fi
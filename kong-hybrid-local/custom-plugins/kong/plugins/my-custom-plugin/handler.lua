@@ -1,10 +1,73 @@
+local phase_timer = require "kong.plugins.my-custom-plugin.phase_timer"
+local template = require "kong.plugins.my-custom-plugin.template"
+
 local CustomPluginHandler = {}
 
 CustomPluginHandler.PRIORITY = 1000
-CustomPluginHandler.VERSION = "0.1.0"
+CustomPluginHandler.VERSION = "0.2.0"
+
+-- Compiled rule sets per plugin configuration. Kong passes the same conf
+-- table until the configuration changes; weak keys drop stale entries.
+local compiled_rules = setmetatable({}, { __mode = "k" })
+
+-- render is a constant string or a compiled template (see template.compile)
+local function compile_rule(header, render, methods, path_prefix)
+  local constant = type(render) == "string"
+  local set_header = kong.service.request.set_header
+
+  local method_set
+  if methods and #methods > 0 then
+    method_set = {}
+    for _, method in ipairs(methods) do
+      method_set[method] = true
+    end
+  end
+  local prefix_len = path_prefix and #path_prefix
+
+  return function(method, path)
+    if method_set and not method_set[method] then
+      return
+    end
+    if prefix_len and path:sub(1, prefix_len) ~= path_prefix then
+      return
+    end
+    set_header(header, constant and render or render())
+  end, (method_set ~= nil), (prefix_len ~= nil)
+end
+
+local function compile(conf)
+  local rules = { n = 0 }
+  local function add(rule, needs_method, needs_path)
+    rules.n = rules.n + 1
+    rules[rules.n] = rule
+    rules.needs_method = rules.needs_method or needs_method
+    rules.needs_path = rules.needs_path or needs_path
+  end
+
+  -- header_value is sent as-is; only rule values are templates
+  if conf.header_name then
+    add(compile_rule(conf.header_name, conf.header_value or "", nil, nil))
+  end
+  for _, rule in ipairs(conf.rules or {}) do
+    local render = assert(template.compile(rule.value))
+    add(compile_rule(rule.header, render, rule.methods, rule.path_prefix))
+  end
+  return rules
+end
 
 function CustomPluginHandler:access(conf)
-  kong.service.request.set_header(conf.header_name, conf.header_value)
+  local rules = compiled_rules[conf]
+  if not rules then
+    rules = compile(conf)
+    compiled_rules[conf] = rules
+  end
+
+  local method = rules.needs_method and kong.request.get_method()
+  local path = rules.needs_path and kong.request.get_path()
+  for i = 1, rules.n do
+    rules[i](method, path)
+  end
 end
 
-return CustomPluginHandler
+-- Phases are timed when the plugin_phase_latency shared dict is declared
+return phase_timer.wrap(CustomPluginHandler, "my-custom-plugin")
@@ -0,0 +1,183 @@
+-- phase_timer.lua - Opt-in per-phase latency histograms for Kong plugins
+-- (rendered by kong-hybrid-setup/generate.py from script_6.py into each
+-- plugin that uses it; edit it there)
+--
+-- wrap() replaces the handler's access, header_filter, body_filter and log
+-- methods with versions that time each call on a monotonic clock. Each
+-- worker counts observations into fixed buckets in a local table and adds
+-- them to a shared dict once a second, so requests never take the dict
+-- lock. body_filter is timed per chunk.
+--
+-- Enabled only when the dict is declared, e.g. with
+-- KONG_NGINX_HTTP_LUA_SHARED_DICT="plugin_phase_latency 1m";
+-- otherwise wrap() returns the handler untouched.
+
+local ffi = require "ffi"
+
+local ngx = ngx
+local pairs = pairs
+local fmt = string.format
+local concat = table.concat
+
+local DICT_NAME = "plugin_phase_latency"
+local METRIC = "kong_plugin_phase_duration_ms"
+local PHASES = { "access", "header_filter", "body_filter", "log" }
+local FLUSH_INTERVAL = 1
+
+-- Bucket upper bounds in milliseconds; the last bucket is +Inf
+local BUCKETS = { 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100 }
+local N_BUCKETS = #BUCKETS
+
+local dict = ngx.shared[DICT_NAME]
+
+local _M = {}
+
+-- Monotonic milliseconds. ngx.now() is cached per event loop iteration and
+-- would read most phases as 0 ms; fall back to it (after update_time) only
+-- if clock_gettime cannot be declared.
+local now_ms
+do
+  -- Fails harmlessly when another plugin's copy already declared these
+  pcall(ffi.cdef, [[
+    typedef struct { long tv_sec; long tv_nsec; } phase_timer_timespec_t;
+    int clock_gettime(int clk_id, phase_timer_timespec_t *tp);
+  ]])
+  local ok, ts = pcall(ffi.new, "phase_timer_timespec_t")
+  if ok and pcall(ffi.C.clock_gettime, 1, ts) then
+    local clock_gettime = ffi.C.clock_gettime
+    local CLOCK_MONOTONIC = 1
+    now_ms = function()
+      clock_gettime(CLOCK_MONOTONIC, ts)
+      return tonumber(ts.tv_sec) * 1000 + tonumber(ts.tv_nsec) / 1e6
+    end
+  else
+    now_ms = function()
+      ngx.update_time()
+      return ngx.now() * 1000
+    end
+  end
+end
+_M.now_ms = now_ms
+
+-- Observations not yet added to the dict, by dict key
+local pending = {}
+local timer_started = false
+
+local function flush(premature)
+  if premature then
+    return
+  end
+  local batch = pending
+  pending = {}
+  for key, value in pairs(batch) do
+    local _, err = dict:incr(key, value, 0)
+    if err then
+      kong.log.warn("phase_timer: failed to update ", key, ": ", err)
+    end
+  end
+end
+
+-- Dict keys for one plugin phase: "<plugin>|<phase>|<bucket>" and "...|sum"
+local function phase_keys(plugin, phase)
+  local keys = {}
+  for i = 1, N_BUCKETS + 1 do
+    keys[i] = plugin .. "|" .. phase .. "|" .. i
+  end
+  keys.sum = plugin .. "|" .. phase .. "|sum"
+  return keys
+end
+
+local function record(keys, elapsed)
+  local i = 1
+  while i <= N_BUCKETS and elapsed > BUCKETS[i] do
+    i = i + 1
+  end
+  local key = keys[i]
+  pending[key] = (pending[key] or 0) + 1
+  pending[keys.sum] = (pending[keys.sum] or 0) + elapsed
+
+  if not timer_started then
+    timer_started = true
+    local ok, err = ngx.timer.every(FLUSH_INTERVAL, flush)
+    if not ok then
+      kong.log.err("phase_timer: failed to start flush timer: ", err)
+    end
+  end
+end
+
+-- Record a phase's duration and pass its results through
+local function finish(keys, started, ...)
+  record(keys, now_ms() - started)
+  return ...
+end
+
+function _M.enabled()
+  return dict ~= nil
+end
+
+-- Time the handler's phases under the given plugin name
+function _M.wrap(handler, plugin)
+  if not dict then
+    return handler
+  end
+
+  for _, phase in ipairs(PHASES) do
+    local fn = handler[phase]
+    if fn then
+      local keys = phase_keys(plugin, phase)
+      handler[phase] = function(self, conf)
+        local started = now_ms()
+        return finish(keys, started, fn(self, conf))
+      end
+    end
+  end
+  return handler
+end
+
+-- Prometheus histograms for one plugin, or for every plugin in the dict
+function _M.prometheus(plugin)
+  local lines = {
+    "# HELP " .. METRIC .. " Time spent in each plugin phase",
+    "# TYPE " .. METRIC .. " histogram",
+  }
+  if not dict then
+    return concat(lines, "\n") .. "\n"
+  end
+
+  local series, names = {}, {}
+  for _, key in ipairs(dict:get_keys(0)) do
+    local name, phase, slot = key:match("^(.+)|([%w_]+)|(%w+)$")
+    if name and (not plugin or name == plugin) then
+      local id = name .. "|" .. phase
+      local s = series[id]
+      if not s then
+        s = { plugin = name, phase = phase, counts = {}, sum = 0 }
+        series[id] = s
+        names[#names + 1] = id
+      end
+      local value = dict:get(key) or 0
+      if slot == "sum" then
+        s.sum = value
+      else
+        s.counts[tonumber(slot)] = value
+      end
+    end
+  end
+  table.sort(names)
+
+  for _, id in ipairs(names) do
+    local s = series[id]
+    local labels = fmt('plugin="%s",phase="%s"', s.plugin, s.phase)
+    local cumulative = 0
+    for i = 1, N_BUCKETS + 1 do
+      cumulative = cumulative + (s.counts[i] or 0)
+      local le = BUCKETS[i] and fmt("%g", BUCKETS[i]) or "+Inf"
+      lines[#lines + 1] = fmt('%s_bucket{%s,le="%s"} %d', METRIC, labels, le, cumulative)
+    end
+    lines[#lines + 1] = fmt("%s_sum{%s} %.3f", METRIC, labels, s.sum)
+    lines[#lines + 1] = fmt("%s_count{%s} %d", METRIC, labels, cumulative)
+  end
+  return concat(lines, "\n") .. "\n"
+end
+
+return _M
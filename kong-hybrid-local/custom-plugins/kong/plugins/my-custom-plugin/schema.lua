@@ -1,7 +1,34 @@
+local typedefs = require "kong.db.schema.typedefs"
+local template = require "kong.plugins.my-custom-plugin.template"
+
 return {
-  no_consumer = true, -- can be configured on a Service or Route
+  name = "my-custom-plugin",
   fields = {
-    header_name = { type = "string", default = "X-My-Plugin" },
-    header_value = { type = "string", default = "Hello from Custom Plugin" }
-  }
+    { consumer = typedefs.no_consumer }, -- can be configured on a Service or Route
+    { config = {
+        type = "record",
+        fields = {
+          { header_name = { type = "string", default = "X-My-Plugin" } },
+          -- Sent literally, "${" included; use rules for templated values
+          { header_value = { type = "string", default = "Hello from Custom Plugin" } },
+          -- Extra headers, e.g. { header = "X-Consumer", value = "${consumer_id}",
+          --                       methods = { "GET" }, path_prefix = "/api" }
+          { rules = {
+              type = "array",
+              default = {},
+              elements = {
+                type = "record",
+                fields = {
+                  { header = typedefs.header_name { required = true } },
+                  { value = { type = "string", required = true, custom_validator = template.validate } },
+                  { methods = { type = "set", elements = typedefs.http_method } },
+                  { path_prefix = { type = "string", starts_with = "/" } },
+                },
+              },
+            },
+          },
+        },
+      },
+    },
+  },
 }
@@ -0,0 +1,15 @@
+-- status_api.lua - my-custom-plugin endpoints on the status listener
+-- (KONG_STATUS_LISTEN). GET /my-custom-plugin/phases returns the per-phase
+-- latency histograms from phase_timer in Prometheus text format.
+
+local phase_timer = require "kong.plugins.my-custom-plugin.phase_timer"
+
+return {
+  ["/my-custom-plugin/phases"] = {
+    GET = function()
+      return kong.response.exit(200, phase_timer.prometheus("my-custom-plugin"), {
+        ["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8",
+      })
+    end,
+  },
+}
@@ -0,0 +1,110 @@
+-- Header value templates for my-custom-plugin.
+-- A template such as "consumer=${consumer_id}; req=${request_id}" is split
+-- once into literal and variable segments, so rendering it per request is
+-- a loop over prebuilt parts with no string parsing.
+
+local Template = {}
+
+-- Per-request values a template can reference
+Template.variables = {
+  consumer_id = function()
+    local consumer = kong.client.get_consumer()
+    return consumer and consumer.id
+  end,
+  consumer_username = function()
+    local consumer = kong.client.get_consumer()
+    return consumer and consumer.username
+  end,
+  route_id = function()
+    local route = kong.router.get_route()
+    return route and route.id
+  end,
+  route_name = function()
+    local route = kong.router.get_route()
+    return route and route.name
+  end,
+  service_name = function()
+    local service = kong.router.get_service()
+    return service and service.name
+  end,
+  request_id = function()
+    return ngx.var.request_id
+  end,
+  method = function()
+    return kong.request.get_method()
+  end,
+  path = function()
+    return kong.request.get_path()
+  end,
+}
+
+-- Split a template into { literal, resolver, literal, ... } segments.
+-- Returns nil and an error for unknown variables.
+function Template.parse(source)
+  local segments = {}
+  local pos = 1
+  while true do
+    local start, finish, name = source:find("%${([%w_]+)}", pos)
+    if not start then
+      break
+    end
+    local resolver = Template.variables[name]
+    if not resolver then
+      return nil, "unknown template variable '" .. name .. "'"
+    end
+    if start > pos then
+      segments[#segments + 1] = source:sub(pos, start - 1)
+    end
+    segments[#segments + 1] = resolver
+    pos = finish + 1
+  end
+  if pos <= #source then
+    segments[#segments + 1] = source:sub(pos)
+  end
+  return segments
+end
+
+-- Compile a template into a function returning the rendered value.
+-- Constant templates return the string itself without a call per request.
+function Template.compile(source)
+  local segments, err = Template.parse(source)
+  if not segments then
+    return nil, err
+  end
+
+  local n = #segments
+  if n == 0 then
+    return ""
+  elseif n == 1 and type(segments[1]) == "string" then
+    return segments[1]
+  elseif n == 1 then
+    local resolver = segments[1]
+    return function()
+      return resolver() or ""
+    end
+  end
+
+  return function()
+    local parts = {}
+    for i = 1, n do
+      local segment = segments[i]
+      if type(segment) == "string" then
+        parts[i] = segment
+      else
+        parts[i] = segment() or ""
+      end
+    end
+    return table.concat(parts)
+  end
+end
+
+-- Schema custom_validator for template fields
+function Template.validate(source)
+  local _, err = Template.parse(source)
+  if err then
+    return nil, err
+  end
+  return true
+end
+
+return Template
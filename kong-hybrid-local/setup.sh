@@ -2,9 +2,11 @@
 
 # --- Configuration ---
 KONG_NAMESPACE="kong"
-CHART_VERSION="2.35.0"
 KONG_IMAGE_VERSION="3.7"
 
+# Chart versions are pinned in charts/charts.lock and vendored into charts/
+source "$(dirname "$0")/scripts/helm-charts.sh"
+
 # --- 1. Setup Namespace ---
 echo ">>> Creating Kubernetes namespace: $KONG_NAMESPACE"
 kubectl get ns $KONG_NAMESPACE > /dev/null 2>&1 || kubectl create namespace $KONG_NAMESPACE
@@ -33,15 +35,16 @@ kubectl create configmap kong-custom-plugins \
     --from-file=custom-plugins/kong/plugins/my-custom-plugin/ \
     -n $KONG_NAMESPACE --dry-run=client -o yaml | kubectl apply -f -
 
-# --- 4. Add Helm Repos ---
-echo ">>> Adding Kong and Bitnami Helm repositories..."
-helm repo add kong https://charts.konghq.com
-helm repo add bitnami https://charts.bitnami.com/bitnami
-helm repo update
+# --- 4. Vendor Helm Charts ---
+# Only pins missing from charts/ are fetched; bash scripts/helm-charts.sh refresh fetches them again
+echo ">>> Vendoring pinned Kong and PostgreSQL Helm charts..."
+charts_vendor || exit 1
+KONG_CHART="$(chart_ref kong/kong)" || exit 1
+POSTGRES_CHART="$(chart_ref bitnami/postgresql)" || exit 1
 
 # --- 5. Deploy PostgreSQL Database ---
 echo ">>> Deploying PostgreSQL for Kong CP..."
-helm upgrade --install kong-postgresql bitnami/postgresql \
+helm upgrade --install kong-postgresql "$POSTGRES_CHART" \
     --set auth.database=kong \
     --set auth.username=kong \
     --set auth.password=kong \
@@ -52,8 +55,7 @@ kubectl wait --for=condition=ready pod -l app.kubernetes.io/name=postgresql -n $
 
 # --- 6. Run Kong Migrations ---
 echo ">>> Running Kong database migrations..."
-helm upgrade --install kong-migrations kong/kong \
-    --version $CHART_VERSION \
+helm upgrade --install kong-migrations "$KONG_CHART" \
     --set-string image.tag=$KONG_IMAGE_VERSION \
     --set runMigrations=true \
     -f values/cp-values.yaml \
@@ -65,16 +67,14 @@ helm uninstall kong-migrations -n $KONG_NAMESPACE
 
 # --- 7. Deploy Kong Control Plane (CP) ---
 echo ">>> Deploying Kong Control Plane..."
-helm upgrade --install kong-cp kong/kong \
-    --version $CHART_VERSION \
+helm upgrade --install kong-cp "$KONG_CHART" \
     --set-string image.tag=$KONG_IMAGE_VERSION \
     -f values/cp-values.yaml \
     -n $KONG_NAMESPACE
 
 # --- 8. Deploy Kong Data Plane (DP) ---
 echo ">>> Deploying Kong Data Plane..."
-helm upgrade --install kong-dp kong/kong \
-    --version $CHART_VERSION \
+helm upgrade --install kong-dp "$KONG_CHART" \
     --set-string image.tag=$KONG_IMAGE_VERSION \
     -f values/dp-values.yaml \
     -n $KONG_NAMESPACE
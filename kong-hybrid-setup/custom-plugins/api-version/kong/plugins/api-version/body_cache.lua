@@ -0,0 +1,109 @@
+-- body_cache.lua - Shared cache of rewritten JSON bodies for api-version
+-- Buffered modify_body decodes and re-encodes every response. When the
+-- upstream marks its responses with an ETag or Last-Modified, the
+-- re-encoded body is stored in the api_version_body_cache shared dict so
+-- the next response with the same validator skips the JSON round trip.
+-- Entries are stored without _meta, which carries a per-request timestamp;
+-- the handler splices it in when serving a hit. The dict's own LRU
+-- eviction bounds memory; entries also expire after body_cache_ttl.
+
+local kong = kong
+local ngx = ngx
+local concat = table.concat
+
+local DICT_NAME = "api_version_body_cache"
+
+local _M = {}
+
+-- Per-worker counters, see _M.stats()
+local counters = { hits = 0, misses = 0, stores = 0, evictions = 0, oversized = 0, failed = 0 }
+
+local dict, checked
+
+-- The shared dict, or nil (logged once per worker) when it is not declared
+local function get_dict()
+  if not checked then
+    checked = true
+    dict = ngx.shared[DICT_NAME]
+    if not dict then
+      kong.log.warn("body_cache is enabled but lua_shared_dict ", DICT_NAME,
+                    " is not declared; rewritten bodies are not cached")
+    end
+  end
+  return dict
+end
+
+function _M.enabled()
+  return get_dict() ~= nil
+end
+
+-- Cache key for the current response under one plugin configuration
+-- (scope), or nil when the upstream gave no validator to key on or sent
+-- Vary. ETags identify one representation of one resource, so the path is
+-- part of the key as well as the route and the request method, and so is
+-- Content-Encoding: a weak ETag may be shared by the gzip and identity
+-- variants. With Vary the representation depends on request headers the
+-- key does not cover.
+function _M.key(version, scope)
+  if kong.response.get_header("Vary") then
+    return nil
+  end
+  local validator = kong.response.get_header("ETag")
+  if not validator then
+    local last_modified = kong.response.get_header("Last-Modified")
+    if not last_modified then
+      return nil
+    end
+    validator = "lm:" .. last_modified
+  end
+  local route = kong.router.get_route()
+  return concat({
+    version,
+    scope,
+    route and route.id or "",
+    kong.request.get_method(),
+    kong.response.get_status(),
+    kong.request.get_path_with_query(),
+    kong.response.get_header("Content-Encoding") or "",
+    validator,
+  }, "|")
+end
+
+function _M.get(key)
+  local body = get_dict():get(key)
+  if body then
+    counters.hits = counters.hits + 1
+  else
+    counters.misses = counters.misses + 1
+  end
+  return body
+end
+
+function _M.set(key, body, ttl, max_size)
+  if #body > max_size then
+    counters.oversized = counters.oversized + 1
+    return
+  end
+  local ok, err, forcible = get_dict():set(key, body, ttl)
+  if not ok then
+    counters.failed = counters.failed + 1
+    kong.log.warn("failed to cache rewritten body: ", err)
+    return
+  end
+  counters.stores = counters.stores + 1
+  if forcible then
+    -- Least recently used entries were evicted to make room
+    counters.evictions = counters.evictions + 1
+  end
+end
+
+-- Per-worker cache counters
+function _M.stats()
+  local stats = {}
+  for name, value in pairs(counters) do
+    stats[name] = value
+  end
+  return stats
+end
+
+return _M
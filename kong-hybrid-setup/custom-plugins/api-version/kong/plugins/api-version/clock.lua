@@ -0,0 +1,65 @@
+-- clock.lua - Cached coarse timestamps for the api-version plugin
+-- Formatting a timestamp (os.date, string.format) on every request is
+-- wasted work when the value only changes once per second, or once per
+-- ngx.update_time tick at millisecond precision. Each worker keeps the
+-- last formatted strings and rebuilds them only when the clock moved on.
+
+local ngx = ngx
+local floor = math.floor
+local min = math.min
+local fmt = string.format
+local sub = string.sub
+local os_date = os.date
+
+local _M = {}
+
+local iso_sec_key, iso_sec
+local iso_ms_key, iso_ms
+local epoch_sec_key, epoch_sec
+local epoch_ms_key, epoch_ms
+
+local function iso_seconds(sec)
+  if sec ~= iso_sec_key then
+    iso_sec = os_date("!%Y-%m-%dT%H:%M:%SZ", sec)
+    iso_sec_key = sec
+  end
+  return iso_sec
+end
+
+-- ISO 8601 UTC timestamp, e.g. 2024-05-01T12:00:00Z or, with
+-- "millisecond" precision, 2024-05-01T12:00:00.123Z
+function _M.iso8601(precision)
+  local now = ngx.now()
+  local sec = floor(now)
+  if precision ~= "millisecond" then
+    return iso_seconds(sec)
+  end
+
+  if now ~= iso_ms_key then
+    local ms = min(999, floor((now - sec) * 1000 + 0.5))
+    iso_ms = sub(iso_seconds(sec), 1, -2) .. fmt(".%03dZ", ms)
+    iso_ms_key = now
+  end
+  return iso_ms
+end
+
+-- Seconds since the epoch as a string, e.g. 1714564800 or 1714564800.123
+function _M.epoch(precision)
+  local now = ngx.now()
+  if precision ~= "millisecond" then
+    local sec = floor(now)
+    if sec ~= epoch_sec_key then
+      epoch_sec = fmt("%d", sec)
+      epoch_sec_key = sec
+    end
+    return epoch_sec
+  end
+
+  if now ~= epoch_ms_key then
+    epoch_ms = fmt("%.3f", now)
+    epoch_ms_key = now
+  end
+  return epoch_ms
+end
+
+return _M
@@ -0,0 +1,343 @@
+-- handler.lua - API Version Plugin Handler
+-- This plugin adds API version information to responses
+
+local body_cache = require "kong.plugins.api-version.body_cache"
+local clock = require "kong.plugins.api-version.clock"
+local log_queue = require "kong.plugins.api-version.log_queue"
+local log_sampler = require "kong.plugins.api-version.log_sampler"
+local negotiate = require "kong.plugins.api-version.negotiate"
+local phase_timer = require "kong.plugins.api-version.phase_timer"
+
+local kong = kong
+local ngx = ngx
+local plugin = {
+  PRIORITY = 1000, -- set the plugin priority, which determines plugin execution order
+  VERSION = "0.1.0", -- version in X.Y.Z format. Check hybrid-mode compatibility requirements.
+}
+
+-- Initialize plugin
+function plugin:init_worker()
+  -- Your custom code here
+  kong.log.debug("api-version plugin initialized")
+end
+
+-- Access phase - runs for every request
+function plugin:access(plugin_conf)
+  -- Add request processing logic here
+  kong.log.debug("api-version plugin access phase")
+  
+  -- Add custom header to identify the plugin is working
+  kong.service.request.set_header("X-Kong-Plugin", "api-version")
+
+  -- Resolve the version the client asked for and route to it
+  local version = plugin_conf.version
+  if plugin_conf.version_sources and #plugin_conf.version_sources > 0 then
+    local resolved, requested = negotiate.apply(plugin_conf)
+    if resolved then
+      kong.ctx.plugin.version = resolved
+      version = resolved
+    elseif resolved == false and plugin_conf.reject_unknown_version then
+      return kong.response.exit(400, { message = "Unsupported API version: " .. requested })
+    end
+  end
+  
+  -- Log the API version being used
+  if plugin_conf.log_version and log_sampler.sample(plugin_conf, "log_version") then
+    kong.log.info("API Version: ", version)
+  end
+end
+
+-- Bytes of whitespace we are willing to hold back while looking for the
+-- first member of the top-level JSON object in streaming mode
+local MAX_HELD_BYTES = 4096
+
+local OPEN_BRACE = string.byte("{")
+local CLOSE_BRACE = string.byte("}")
+
+local find = string.find
+local byte = string.byte
+local sub = string.sub
+local match = string.match
+local gsub = string.gsub
+local lower = string.lower
+
+-- Statuses that never carry a body
+local NO_BODY_STATUS = { [204] = true, [304] = true }
+
+local function build_meta(plugin_conf)
+  return {
+    api_version = kong.ctx.plugin.version or plugin_conf.version,
+    plugin_version = plugin.VERSION,
+    timestamp = clock.iso8601(plugin_conf.timestamp_precision)
+  }
+end
+
+-- Splice the "_meta" member right after the opening brace of a top-level
+-- JSON object, without decoding the body. Leading bytes are held back only
+-- until the first non-whitespace character after "{" has been seen, so
+-- memory stays bounded by the chunk size. Returns the bytes to emit now.
+local function splice_meta(state, chunk, member)
+  local buf = state.held and (state.held .. chunk) or chunk
+  state.held = nil
+
+  local open = find(buf, "[^ \t\r\n]")
+  if open and byte(buf, open) ~= OPEN_BRACE then
+    -- Not a JSON object (array, scalar or garbage): leave it alone
+    state.done = true
+    return buf
+  end
+
+  local first = open and find(buf, "[^ \t\r\n]", open + 1)
+  if not first then
+    if #buf > MAX_HELD_BYTES then
+      state.done = true
+      return buf
+    end
+    state.held = buf
+    return ""
+  end
+
+  state.done = true
+  local separator = byte(buf, first) == CLOSE_BRACE and "" or ","
+  return sub(buf, 1, open) .. member .. separator .. sub(buf, open + 1)
+end
+
+-- A cached body is a compact encoded object: put "_meta" first
+local function with_meta(encoded, plugin_conf)
+  local member = '"_meta":' .. kong.json.encode(build_meta(plugin_conf))
+  return "{" .. member .. (encoded == "{}" and "" or ",") .. sub(encoded, 2)
+end
+
+-- Response plans (headers to set, body rewrite rules) compiled per plugin
+-- configuration. Kong hands the same conf
+-- table to every request until the configuration changes, so the table
+-- itself is the cache key; weak keys let old configurations be collected.
+local header_plans = setmetatable({}, { __mode = "k" })
+
+-- Which responses modify_body applies to: exact media types go into a set,
+-- entries with "*" become anchored Lua patterns
+local function compile_body_plan(plugin_conf)
+  local media_types, patterns = {}, {}
+  for _, media_type in ipairs(plugin_conf.body_content_types or { "application/json" }) do
+    media_type = lower(media_type)
+    if find(media_type, "*", 1, true) then
+      local pattern = gsub(media_type, "[%^%$%(%)%%%.%[%]%+%-%?]", "%%%0")
+      patterns[#patterns + 1] = "^" .. gsub(pattern, "%*", ".*") .. "$"
+    else
+      media_types[media_type] = true
+    end
+  end
+
+  local statuses
+  if plugin_conf.body_status_codes then
+    statuses = {}
+    for _, status in ipairs(plugin_conf.body_status_codes) do
+      statuses[status] = true
+    end
+  end
+
+  return {
+    media_types = media_types,
+    patterns = patterns,
+    statuses = statuses,
+    max_size = plugin_conf.max_body_size,
+    mode = plugin_conf.body_mode,
+    max_buffered_size = plugin_conf.max_buffered_body_size,
+    cache = plugin_conf.body_cache and plugin_conf.body_mode == "buffered" and body_cache.enabled(),
+    -- Cached rewrites are not shared between plugin instances
+    cache_scope = plugin_conf.__plugin_id or plugin_conf.__key__ or tostring(plugin_conf),
+  }
+end
+
+local function media_type_matches(body, content_type)
+  local media_type = content_type and match(content_type, "^%s*([^;%s]+)")
+  if not media_type then
+    return false
+  end
+  media_type = lower(media_type)
+  if body.media_types[media_type] then
+    return true
+  end
+  local patterns = body.patterns
+  for i = 1, #patterns do
+    if find(media_type, patterns[i]) then
+      return true
+    end
+  end
+  return false
+end
+
+-- Decide once per request whether (and how) the body will be rewritten.
+-- Returns "buffered", "streaming" or nil.
+local function body_rewrite_mode(body)
+  -- Responses to HEAD have no body either (RFC 9110, section 9.3.2)
+  if kong.request.get_method() == "HEAD" then
+    return nil
+  end
+  local status = kong.response.get_status()
+  if NO_BODY_STATUS[status] or (body.statuses and not body.statuses[status]) then
+    return nil
+  end
+  if not media_type_matches(body, kong.response.get_header("Content-Type")) then
+    return nil
+  end
+
+  local length = tonumber(kong.response.get_header("Content-Length"))
+  if length and body.max_size and length > body.max_size then
+    return nil
+  end
+
+  if body.mode == "buffered" and (not length or length > body.max_buffered_size) then
+    -- Bodies that are too large, or of unknown size, are streamed instead
+    return "streaming"
+  end
+  return body.mode
+end
+
+local function compile_header_plan(plugin_conf)
+  local names, values = {}, {}
+  local function add(name, value)
+    names[#names + 1] = name
+    values[#values + 1] = value
+  end
+
+  add(plugin_conf.custom_header_name or "X-API-Version",
+      (plugin_conf.header_prefix or "") .. plugin_conf.version)
+  add("X-Plugin-Version", plugin.VERSION)
+  if plugin_conf.add_server_header then
+    add("X-Server", "Kong-Gateway")
+  end
+
+  return {
+    names = names,
+    values = values,
+    n = #names,
+    version_prefix = plugin_conf.header_prefix or "",
+    add_timestamp = plugin_conf.add_timestamp,
+    timestamp_precision = plugin_conf.timestamp_precision,
+    body = plugin_conf.modify_body and compile_body_plan(plugin_conf) or nil,
+  }
+end
+
+local function get_header_plan(plugin_conf)
+  local plan = header_plans[plugin_conf]
+  if not plan then
+    plan = compile_header_plan(plugin_conf)
+    header_plans[plugin_conf] = plan
+  end
+  return plan
+end
+
+-- Header filter phase - modify response headers
+function plugin:header_filter(plugin_conf)
+  -- Add the precomputed version headers; the version header reflects a
+  -- negotiated version when access resolved one
+  local plan = get_header_plan(plugin_conf)
+  local set_header = kong.response.set_header
+  local names, values = plan.names, plan.values
+  local version = kong.ctx.plugin.version
+  set_header(names[1], version and plan.version_prefix .. version or values[1])
+  for i = 2, plan.n do
+    set_header(names[i], values[i])
+  end
+
+  if plan.add_timestamp then
+    set_header("X-Response-Time", clock.epoch(plan.timestamp_precision))
+  end
+
+  -- body_filter only does work when this decided the body is rewritten
+  if plan.body then
+    local mode = body_rewrite_mode(plan.body)
+    if mode then
+      local ctx = kong.ctx.plugin
+      if mode == "buffered" and plan.body.cache then
+        local key = body_cache.key(version or plugin_conf.version, plan.body.cache_scope)
+        if key then
+          ctx.cached_body = body_cache.get(key)
+          if ctx.cached_body then
+            mode = "cached"
+          else
+            ctx.cache_key = key
+          end
+        end
+      end
+      ctx.body_mode = mode
+      kong.response.clear_header("Content-Length")
+    end
+  end
+end
+
+-- Body filter phase - modify response body (optional)
+function plugin:body_filter(plugin_conf)
+  local ctx = kong.ctx.plugin
+  local mode = ctx.body_mode
+  if not mode then
+    return
+  end
+
+  if mode == "streaming" then
+    local state = ctx.splice
+    if not state then
+      state = {}
+      ctx.splice = state
+      ctx.meta_member = '"_meta":' .. kong.json.encode(build_meta(plugin_conf))
+    end
+    if state.done then
+      return
+    end
+
+    local out = splice_meta(state, ngx.arg[1] or "", ctx.meta_member)
+    if ngx.arg[2] and state.held then
+      -- Body ended while we were still holding bytes back
+      out = state.held
+      state.held = nil
+    end
+    ngx.arg[1] = out
+    return
+  end
+
+  if mode == "cached" then
+    -- The rewrite of this upstream body is known: drop the upstream chunks
+    -- and emit the cached rewrite at the end
+    ngx.arg[1] = ngx.arg[2] and with_meta(ctx.cached_body, plugin_conf) or ""
+    return
+  end
+
+  local body = kong.response.get_raw_body()
+  if body then
+    -- Add version info to JSON responses
+    local json_body = kong.json.decode(body)
+    if json_body and ctx.cache_key then
+      json_body._meta = nil
+      local encoded = kong.json.encode(json_body)
+      if encoded and byte(encoded, 1) == OPEN_BRACE then
+        body_cache.set(ctx.cache_key, encoded, plugin_conf.body_cache_ttl, plugin_conf.body_cache_max_entry_size)
+        kong.response.set_raw_body(with_meta(encoded, plugin_conf))
+        return
+      end
+    end
+    if json_body then
+      json_body._meta = build_meta(plugin_conf)
+      local new_body = kong.json.encode(json_body)
+      kong.response.set_raw_body(new_body)
+    end
+  end
+end
+
+-- Log phase - for logging and analytics
+function plugin:log(plugin_conf)
+  -- Queue request details; a timer writes them out in batches
+  if plugin_conf.enable_logging and log_sampler.sample(plugin_conf, "enable_logging") then
+    log_queue.get(plugin_conf):push({
+      time = ngx.now(),
+      version = kong.ctx.plugin.version or plugin_conf.version,
+      method = kong.request.get_method(),
+      path = kong.request.get_path(),
+      status = kong.response.get_status(),
+      latency = kong.ctx.shared.response_latency or 0
+    })
+  end
+end
+
+-- Return our plugin object; phases are timed when plugin_phase_latency is declared
+return phase_timer.wrap(plugin, "api-version")
@@ -0,0 +1,221 @@
+-- log_queue.lua - Batched log sink for the api-version plugin
+-- The log phase only pushes a small record into a per-worker ring buffer;
+-- a timer encodes queued records as one JSON batch and hands it to the
+-- configured sink, so request workers never wait on log I/O. A queue lives
+-- as long as its plugin configuration: after a reload the old one is
+-- collected with the old configuration and its flush timer stops.
+
+local cjson = require "cjson.safe"
+
+local kong = kong
+local ngx = ngx
+local min = math.min
+
+local _M = {}
+
+-- One queue per plugin configuration in this worker
+local queues = setmetatable({}, { __mode = "k" })
+
+-- Queues holding unflushed records, kept alive until they are written out
+local pending = {}
+
+local sinks = {}
+
+function sinks.error_log(_, payload)
+  kong.log.info("api-version log batch: ", payload)
+  return true
+end
+
+function sinks.file(address, payload)
+  local f, err = io.open(address.path, "a")
+  if not f then
+    return nil, err
+  end
+  local ok, write_err = f:write(payload, "\n")
+  f:close()
+  return ok, write_err
+end
+
+function sinks.udp(address, payload)
+  local sock = ngx.socket.udp()
+  local ok, err = sock:setpeername(address.host, address.port)
+  if not ok then
+    return nil, err
+  end
+  ok, err = sock:send(payload)
+  sock:close()
+  return ok, err
+end
+
+function sinks.http(address, payload)
+  local httpc = require("resty.http").new()
+  local res, err = httpc:request_uri(address.url, {
+    method = "POST",
+    body = payload,
+    headers = { ["Content-Type"] = "application/json" },
+    keepalive_timeout = 60000,
+  })
+  if not res then
+    return nil, err
+  end
+  if res.status >= 300 then
+    return nil, "unexpected status " .. res.status
+  end
+  return true
+end
+
+local function parse_address(sink, address)
+  if sink == "file" then
+    return { path = address }
+  elseif sink == "udp" then
+    local host, port = string.match(address or "", "^(.+):(%d+)$")
+    return { host = host, port = tonumber(port) }
+  elseif sink == "http" then
+    return { url = address }
+  end
+  return {}
+end
+
+local Queue = {}
+Queue.__index = Queue
+
+local function new_queue(conf)
+  return setmetatable({
+    name = conf.__plugin_id or conf.__key__ or tostring(conf),
+    sink = conf.log_sink,
+    send = sinks[conf.log_sink],
+    address = parse_address(conf.log_sink, conf.log_sink_address),
+    capacity = conf.log_queue_size,
+    batch_size = conf.log_batch_size,
+    interval = conf.log_flush_interval,
+    items = {},
+    head = 1,
+    count = 0,
+    ticking = false,
+    flush_scheduled = false,
+    -- counters, see _M.stats()
+    queued = 0,
+    dropped = 0,
+    flushed = 0,
+    failed = 0,
+  }, Queue)
+end
+
+-- Add a record; returns false (and counts a drop) when the buffer is full
+function Queue:push(record)
+  if self.count >= self.capacity then
+    self.dropped = self.dropped + 1
+    return false
+  end
+
+  local slot = (self.head + self.count - 1) % self.capacity + 1
+  self.items[slot] = record
+  self.count = self.count + 1
+  self.queued = self.queued + 1
+  pending[self] = true
+
+  if not self.ticking then
+    self:schedule()
+  end
+
+  -- Don't wait for the next tick once a full batch is ready
+  if self.count >= self.batch_size and not self.flush_scheduled then
+    self.flush_scheduled = true
+    local ok, err = ngx.timer.at(0, function() self:flush() end)
+    if not ok then
+      self.flush_scheduled = false
+      kong.log.err("api-version: failed to schedule log flush: ", err)
+    end
+  end
+  return true
+end
+
+-- Remove up to n records from the head of the buffer
+function Queue:take(n)
+  local batch = {}
+  local items, capacity, head = self.items, self.capacity, self.head
+  for i = 1, n do
+    batch[i] = items[head]
+    items[head] = nil
+    head = head % capacity + 1
+  end
+  self.head = head
+  self.count = self.count - n
+  return batch
+end
+
+function Queue:flush()
+  self.flush_scheduled = false
+  while self.count > 0 do
+    -- Take the batch before sending: the send may yield and let
+    -- requests push more records in the meantime
+    local batch = self:take(min(self.count, self.batch_size))
+    local payload, err = cjson.encode(batch)
+    local ok
+    if payload then
+      ok, err = self.send(self.address, payload)
+    end
+
+    if ok then
+      self.flushed = self.flushed + #batch
+    else
+      self.failed = self.failed + #batch
+      kong.log.warn("api-version: failed to flush ", #batch, " log records to ", self.sink, ": ", err)
+    end
+  end
+  pending[self] = nil
+end
+
+-- The timer only holds a weak reference, so it does not keep a retired
+-- queue alive; it stops once the queue has been collected
+local function flush_timer(premature, ref)
+  local queue = ref.queue
+  if not queue then
+    return
+  end
+  -- premature means the worker is exiting: still flush what is left
+  queue:flush()
+  if premature then
+    queue.ticking = false
+    return
+  end
+  queue:schedule(ref)
+end
+
+function Queue:schedule(ref)
+  ref = ref or setmetatable({ queue = self }, { __mode = "v" })
+  local ok, err = ngx.timer.at(self.interval, flush_timer, ref)
+  -- on failure the next push tries again
+  self.ticking = ok and true or false
+  if not ok then
+    kong.log.err("api-version: failed to start log flush timer: ", err)
+  end
+end
+
+-- Get (or create) the queue for a plugin configuration
+function _M.get(conf)
+  local queue = queues[conf]
+  if not queue then
+    queue = new_queue(conf)
+    queues[conf] = queue
+  end
+  return queue
+end
+
+-- Per-worker counters for every queue
+function _M.stats()
+  local stats = {}
+  for _, queue in pairs(queues) do
+    stats[queue.name] = {
+      sink = queue.sink,
+      pending = queue.count,
+      queued = queue.queued,
+      dropped = queue.dropped,
+      flushed = queue.flushed,
+      failed = queue.failed,
+    }
+  end
+  return stats
+end
+
+return _M
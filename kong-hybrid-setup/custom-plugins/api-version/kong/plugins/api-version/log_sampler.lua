@@ -0,0 +1,110 @@
+-- log_sampler.lua - Sampling for api-version log lines
+-- Decides per request whether the log_version line and the enable_logging
+-- record are emitted, so logging cost can be capped under load. Each worker
+-- counts how many lines it let through and how many it suppressed.
+
+local kong = kong
+local ngx = ngx
+local random = math.random
+local min = math.min
+local max = math.max
+
+local _M = {}
+
+-- Per-worker counters, by log path ("log_version" or "enable_logging")
+local counters = {}
+
+-- Rate limiter state per plugin configuration, then per route and path
+local limiters = setmetatable({}, { __mode = "k" })
+
+local function count(path, allowed)
+  local c = counters[path]
+  if not c then
+    c = { emitted = 0, suppressed = 0 }
+    counters[path] = c
+  end
+  if allowed then
+    c.emitted = c.emitted + 1
+  else
+    c.suppressed = c.suppressed + 1
+  end
+  return allowed
+end
+
+local function limiter_state(conf, path)
+  local by_key = limiters[conf]
+  if not by_key then
+    by_key = {}
+    limiters[conf] = by_key
+  end
+
+  local route = kong.router.get_route()
+  local key = (route and route.id or "*") .. "|" .. path
+  local state = by_key[key]
+  if not state then
+    state = {}
+    by_key[key] = state
+  end
+  return state
+end
+
+local deciders = {}
+
+function deciders.ratio(conf)
+  return random() < conf.log_sample_ratio
+end
+
+-- Refill at log_sample_rate tokens per second, holding at most one
+-- second's worth (but never less than one token, so rates below one line
+-- per second still let a line through every 1/rate seconds), and spend
+-- one token per line
+function deciders.token_bucket(conf, path)
+  local state = limiter_state(conf, path)
+  local now = ngx.now()
+  local rate = conf.log_sample_rate
+  local capacity = max(rate, 1)
+  local tokens = capacity
+  if state.last then
+    tokens = min(capacity, state.tokens + (now - state.last) * rate)
+  end
+  state.last = now
+
+  if tokens >= 1 then
+    state.tokens = tokens - 1
+    return true
+  end
+  state.tokens = tokens
+  return false
+end
+
+-- Let the first log_sample_limit lines of every log_sample_interval through
+function deciders.first_n(conf, path)
+  local state = limiter_state(conf, path)
+  local now = ngx.now()
+  if not state.window or now - state.window >= conf.log_sample_interval then
+    state.window = now
+    state.count = 0
+  end
+  state.count = state.count + 1
+  return state.count <= conf.log_sample_limit
+end
+
+-- Should this request's line on the given path be logged?
+function _M.sample(conf, path)
+  local decide = deciders[conf.log_sampling]
+  if not decide then
+    return count(path, true)
+  end
+  return count(path, decide(conf, path))
+end
+
+-- Per-worker counters of emitted and suppressed lines
+function _M.stats()
+  local stats = {}
+  for path, c in pairs(counters) do
+    stats[path] = { emitted = c.emitted, suppressed = c.suppressed }
+  end
+  return stats
+end
+
+return _M
@@ -0,0 +1,237 @@
+-- negotiate.lua - Request-driven version resolution for api-version
+-- Resolves the version a request asks for from the sources listed in
+-- version_sources (a version header, a /v2/ path segment, a query
+-- argument), tried in order, and rewrites the upstream path to match.
+-- Paths are those Kong computed for the upstream, after the route's
+-- strip_path and the service's path, so rewrites compose with both.
+-- Matchers are compiled once per plugin configuration; mapping a raw
+-- requested value to a supported version goes through a per-worker LRU
+-- cache, so steady traffic costs one lookup per request.
+
+local lrucache = require "resty.lrucache"
+
+local kong = kong
+local var = ngx.var
+local type = type
+local tonumber = tonumber
+local floor = math.floor
+local find = string.find
+local match = string.match
+local sub = string.sub
+local gsub = string.gsub
+
+local CACHE_SIZE = 1000
+
+local _M = {}
+
+-- Per-worker counters, see _M.stats()
+local counters = { hits = 0, misses = 0, unresolved = 0 }
+
+-- Compiled matchers per plugin configuration
+local plans = setmetatable({}, { __mode = "k" })
+
+-- "v2.1" -> { 2, 1 }; nil unless every component is a whole number
+local function parse_version(value)
+  value = gsub(value, "^[vV]", "")
+  local parts = {}
+  for part in value:gmatch("[^.]+") do
+    local n = tonumber(part)
+    if not n or n < 0 or n ~= floor(n) then
+      return nil
+    end
+    parts[#parts + 1] = n
+  end
+  if #parts == 0 then
+    return nil
+  end
+  return parts
+end
+
+local function newer(a, b)
+  for i = 1, math.max(#a.parts, #b.parts) do
+    local x, y = a.parts[i] or 0, b.parts[i] or 0
+    if x ~= y then
+      return x > y
+    end
+  end
+  return false
+end
+
+-- Map a requested value to a version string, or false. With a list of
+-- supported versions, "2" or "v2" picks the newest 2.x.y; without one any
+-- well-formed version is accepted as written (minus a leading "v").
+local function resolve_value(plan, raw)
+  local parts = parse_version(raw)
+  if not parts then
+    return false
+  end
+  local supported = plan.supported
+  if not supported then
+    return (gsub(raw, "^[vV]", ""))
+  end
+  for _, candidate in ipairs(supported) do -- newest first
+    local ok = true
+    for i = 1, #parts do
+      if candidate.parts[i] ~= parts[i] then
+        ok = false
+        break
+      end
+    end
+    if ok then
+      return candidate.version
+    end
+  end
+  return false
+end
+
+-- Sources return the raw requested value and, for the path source, the
+-- path with the version segment removed
+local function header_source(name)
+  return function()
+    local value = kong.request.get_header(name)
+    if type(value) == "table" then
+      value = value[1]
+    end
+    if value then
+      -- "2, 1" -> "2": the first listed version wins
+      return match(value, "^%s*([^,%s]+)")
+    end
+  end
+end
+
+local function query_source(name)
+  return function()
+    local value = kong.request.get_query_arg(name)
+    if type(value) == "string" and value ~= "" then
+      return value
+    end
+  end
+end
+
+-- The first /vN segment of the upstream path, past the service's own path
+local function path_source()
+  local path = var.upstream_uri
+  local init = 1
+  local service = kong.router.get_service()
+  local base = service and service.path and gsub(service.path, "/$", "")
+  if base and base ~= "" and sub(path, 1, #base + 1) == base .. "/" then
+    init = #base + 1
+  end
+  while true do
+    local first, last = find(path, "/[vV]%d[%d.]*", init)
+    if not first then
+      return nil
+    end
+    local after = sub(path, last + 1, last + 1)
+    if after == "" or after == "/" then -- "/v2beta" style segments are not versions
+      local rest = sub(path, 1, first - 1) .. sub(path, last + 1)
+      return sub(path, first + 1, last), rest ~= "" and rest or "/"
+    end
+    init = last + 1
+  end
+end
+
+local function compile(conf)
+  local sources = {}
+  for i, source in ipairs(conf.version_sources or {}) do
+    if source == "header" then
+      sources[i] = header_source(conf.version_header or "Accept-Version")
+    elseif source == "query" then
+      sources[i] = query_source(conf.version_query_param or "version")
+    else
+      sources[i] = path_source
+    end
+  end
+
+  local supported
+  if conf.supported_versions and #conf.supported_versions > 0 then
+    supported = {}
+    for i, version in ipairs(conf.supported_versions) do -- validated by the schema
+      supported[i] = { version = gsub(version, "^[vV]", ""), parts = parse_version(version) }
+    end
+    table.sort(supported, newer)
+  end
+
+  local cache, err = lrucache.new(CACHE_SIZE)
+  if not cache then
+    error("failed to create version cache: " .. tostring(err))
+  end
+
+  return {
+    sources = sources,
+    n = #sources,
+    supported = supported,
+    cache = cache,
+    path_prefix = conf.upstream_path_prefix,
+    strip_prefix = conf.strip_version_prefix,
+    prefixes = {}, -- expanded upstream_path_prefix per version
+  }
+end
+
+local function get_plan(conf)
+  local plan = plans[conf]
+  if not plan then
+    plan = compile(conf)
+    plans[conf] = plan
+  end
+  return plan
+end
+
+local function expand_prefix(plan, version)
+  local prefix = plan.prefixes[version]
+  if not prefix then
+    local major = match(version, "^(%d+)") or version
+    prefix = gsub(gsub(plan.path_prefix, "%${version}", version), "%${major}", major)
+    prefix = gsub(prefix, "/$", "")
+    plan.prefixes[version] = prefix
+  end
+  return prefix
+end
+
+-- Resolve the request's version and rewrite the upstream path: drop the
+-- version segment it came from (strip_version_prefix) and/or put the
+-- expanded upstream_path_prefix in front of it. Returns the
+-- version; nil when no source carried one; or false and the raw value when
+-- the requested version is not supported.
+function _M.apply(conf)
+  local plan = get_plan(conf)
+
+  local raw, rest
+  for i = 1, plan.n do
+    raw, rest = plan.sources[i]()
+    if raw then
+      break
+    end
+  end
+  if not raw then
+    return nil
+  end
+
+  local cache = plan.cache
+  local version = cache:get(raw)
+  if version == nil then
+    counters.misses = counters.misses + 1
+    version = resolve_value(plan, raw)
+    cache:set(raw, version)
+  else
+    counters.hits = counters.hits + 1
+  end
+  if not version then
+    counters.unresolved = counters.unresolved + 1
+    return false, raw
+  end
+
+  if plan.path_prefix then
+    kong.service.request.set_path(expand_prefix(plan, version) .. (rest or var.upstream_uri))
+  elseif rest and plan.strip_prefix then
+    kong.service.request.set_path(rest)
+  end
+  return version
+end
+
+-- Per-worker cache hit/miss counters
+function _M.stats()
+  return { hits = counters.hits, misses = counters.misses, unresolved = counters.unresolved }
+end
+
+return _M
@@ -0,0 +1,254 @@
+-- schema.lua - API Version Plugin Schema
+-- This defines the configuration schema for the API version plugin
+
+local typedefs = require "kong.db.schema.typedefs"
+
+-- "2", "v2.1", "2.1.0": dot-separated whole numbers, optionally after a v
+local function validate_version(value)
+  local digits = value:gsub("^[vV]", "")
+  if digits:match("^%d+$") or (digits:match("^%d[%d.]*%d$") and not digits:find("..", 1, true)) then
+    return true
+  end
+  return nil, "invalid version '" .. value .. "', expected e.g. 2, v2.1 or 2.1.0"
+end
+
+return {
+  name = "api-version",
+  fields = {
+    { consumer = typedefs.no_consumer },
+    { protocols = typedefs.protocols_http },
+    { config = {
+        type = "record",
+        fields = {
+          { version = { 
+              type = "string", 
+              required = true, 
+              default = "1.0.0",
+              description = "API version string to add to responses"
+            }
+          },
+          { add_server_header = { 
+              type = "boolean", 
+              default = true,
+              description = "Add X-Server header to responses"
+            }
+          },
+          { add_timestamp = { 
+              type = "boolean", 
+              default = false,
+              description = "Add X-Response-Time header to responses"
+            }
+          },
+          { timestamp_precision = { 
+              type = "string",
+              default = "second",
+              one_of = { "second", "millisecond" },
+              description = "Precision of X-Response-Time and _meta.timestamp"
+            }
+          },
+          { modify_body = { 
+              type = "boolean", 
+              default = false,
+              description = "Add version metadata to JSON response body"
+            }
+          },
+          { log_version = { 
+              type = "boolean", 
+              default = true,
+              description = "Log API version for each request"
+            }
+          },
+          { enable_logging = { 
+              type = "boolean", 
+              default = false,
+              description = "Enable detailed request logging"
+            }
+          },
+          { custom_header_name = { 
+              type = "string",
+              default = "X-API-Version",
+              description = "Custom header name for API version"
+            }
+          },
+          { header_prefix = { 
+              type = "string",
+              default = "v",
+              description = "Prefix for version in headers"
+            }
+          },
+          { body_mode = { 
+              type = "string",
+              default = "buffered",
+              one_of = { "buffered", "streaming" },
+              description = "How modify_body rewrites JSON: decode and re-encode the buffered body, or splice _meta into the stream"
+            }
+          },
+          { max_buffered_body_size = { 
+              type = "integer",
+              default = 1048576,
+              gt = 0,
+              description = "Largest Content-Length (bytes) rewritten in buffered mode; larger or unsized bodies are streamed"
+            }
+          },
+          { body_content_types = { 
+              type = "array",
+              elements = { type = "string" },
+              default = { "application/json" },
+              description = "Media types whose bodies modify_body rewrites; * matches any characters (e.g. application/*+json)"
+            }
+          },
+          { body_status_codes = { 
+              type = "array",
+              elements = { type = "integer", between = { 100, 599 } },
+              description = "Only rewrite bodies of responses with these status codes (default: any status)"
+            }
+          },
+          { max_body_size = { 
+              type = "integer",
+              gt = 0,
+              description = "Never rewrite responses whose Content-Length exceeds this many bytes (default: no limit)"
+            }
+          },
+          { log_sink = { 
+              type = "string",
+              default = "error_log",
+              one_of = { "error_log", "file", "udp", "http" },
+              description = "Where batches of enable_logging records are written"
+            }
+          },
+          { log_sink_address = { 
+              type = "string",
+              description = "File path (file), host:port (udp) or URL (http) of the log sink"
+            }
+          },
+          { log_batch_size = { 
+              type = "integer",
+              default = 100,
+              gt = 0,
+              description = "Maximum number of records encoded into one batch"
+            }
+          },
+          { log_flush_interval = { 
+              type = "number",
+              default = 1,
+              gt = 0,
+              description = "Seconds between flushes of the log queue"
+            }
+          },
+          { log_queue_size = { 
+              type = "integer",
+              default = 10000,
+              gt = 0,
+              description = "Records buffered per worker before new ones are dropped"
+            }
+          },
+          { log_sampling = { 
+              type = "string",
+              default = "none",
+              one_of = { "none", "ratio", "token_bucket", "first_n" },
+              description = "Sampling applied to log_version lines and enable_logging records"
+            }
+          },
+          { log_sample_ratio = { 
+              type = "number",
+              default = 0.01,
+              between = { 0, 1 },
+              description = "Fraction of requests logged in ratio mode"
+            }
+          },
+          { log_sample_rate = { 
+              type = "number",
+              default = 10,
+              gt = 0,
+              description = "Lines per second per route in token_bucket mode"
+            }
+          },
+          { log_sample_limit = { 
+              type = "integer",
+              default = 10,
+              gt = 0,
+              description = "Lines per route logged at the start of each interval in first_n mode"
+            }
+          },
+          { log_sample_interval = { 
+              type = "number",
+              default = 1,
+              gt = 0,
+              description = "Interval in seconds for first_n mode"
+            }
+          },
+          { version_sources = { 
+              type = "array",
+              elements = { type = "string", one_of = { "header", "path", "query" } },
+              default = {},
+              description = "Where to read the requested version, tried in order (empty: always use version)"
+            }
+          },
+          { version_header = { 
+              type = "string",
+              default = "Accept-Version",
+              description = "Request header carrying the requested version (header source)"
+            }
+          },
+          { version_query_param = { 
+              type = "string",
+              default = "version",
+              description = "Query argument carrying the requested version (query source)"
+            }
+          },
+          { supported_versions = { 
+              type = "array",
+              elements = { type = "string", custom_validator = validate_version },
+              description = "Versions served upstream; a request for 2 or v2 resolves to the newest 2.x (default: accept any)"
+            }
+          },
+          { reject_unknown_version = { 
+              type = "boolean",
+              default = false,
+              description = "Answer 400 when the requested version is not supported, instead of falling back to version"
+            }
+          },
+          { upstream_path_prefix = { 
+              type = "string",
+              starts_with = "/",
+              description = "Upstream path prefix for the resolved version, e.g. /api/${major} or /${version}"
+            }
+          },
+          { strip_version_prefix = { 
+              type = "boolean",
+              default = true,
+              description = "Remove the /vN path segment before proxying when upstream_path_prefix is not set"
+            }
+          },
+          { body_cache = { 
+              type = "boolean",
+              default = false,
+              description = "Cache buffered body rewrites in the api_version_body_cache shared dict, keyed by plugin, route, method, path, Content-Encoding, upstream ETag/Last-Modified and version"
+            }
+          },
+          { body_cache_ttl = { 
+              type = "number",
+              default = 300,
+              gt = 0,
+              description = "Seconds a cached body rewrite is reused"
+            }
+          },
+          { body_cache_max_entry_size = { 
+              type = "integer",
+              default = 262144,
+              gt = 0,
+              description = "Largest rewritten body (bytes) stored in the body cache"
+            }
+          }
+        }
+      }
+    }
+  },
+  entity_checks = {
+    { conditional = {
+        if_field = "config.log_sink", if_match = { one_of = { "file", "udp", "http" } },
+        then_field = "config.log_sink_address", then_match = { required = true },
+      }
+    },
+  },
+}
@@ -0,0 +1,32 @@
+-- status_api.lua - api-version endpoints on the status listener
+-- (KONG_STATUS_LISTEN). GET /api-version/phases returns the per-phase
+-- latency histograms from phase_timer in Prometheus text format;
+-- GET /api-version/stats returns this worker's version cache, body cache
+-- and logging counters as JSON.
+
+local body_cache = require "kong.plugins.api-version.body_cache"
+local log_queue = require "kong.plugins.api-version.log_queue"
+local log_sampler = require "kong.plugins.api-version.log_sampler"
+local negotiate = require "kong.plugins.api-version.negotiate"
+local phase_timer = require "kong.plugins.api-version.phase_timer"
+
+return {
+  ["/api-version/phases"] = {
+    GET = function()
+      return kong.response.exit(200, phase_timer.prometheus("api-version"), {
+        ["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8",
+      })
+    end,
+  },
+  ["/api-version/stats"] = {
+    GET = function()
+      return kong.response.exit(200, {
+        worker = ngx.worker.id(),
+        version_cache = negotiate.stats(),
+        body_cache = body_cache.stats(),
+        log_sampler = log_sampler.stats(),
+        log_queue = log_queue.stats(),
+      })
+    end,
+  },
+}
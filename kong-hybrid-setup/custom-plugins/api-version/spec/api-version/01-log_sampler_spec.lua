@@ -0,0 +1,55 @@
+local PLUGIN_NAME = "api-version"
+
+-- Drives log_sampler on a simulated clock: one request every step
+-- seconds for the given duration, returning how many lines got through
+local function run(sampler, conf, clock, duration, step)
+  local emitted = 0
+  local stop = clock.now + duration
+  while clock.now < stop do
+    if sampler.sample(conf, "log_version") then
+      emitted = emitted + 1
+    end
+    clock.now = clock.now + step
+  end
+  return emitted
+end
+
+describe(PLUGIN_NAME .. ": (log_sampler)", function()
+  local sampler, clock, saved_kong, saved_now
+
+  before_each(function()
+    clock = { now = 1700000000 }
+    saved_kong, saved_now = _G.kong, ngx.now
+    _G.kong = { router = { get_route = function() return { id = "route-1" } end } }
+    ngx.now = function() return clock.now end
+    package.loaded["kong.plugins." .. PLUGIN_NAME .. ".log_sampler"] = nil
+    sampler = require("kong.plugins." .. PLUGIN_NAME .. ".log_sampler")
+  end)
+
+  after_each(function()
+    _G.kong, ngx.now = saved_kong, saved_now
+  end)
+
+  describe("token_bucket", function()
+    it("lets lines through at rates below one per second", function()
+      local conf = { log_sampling = "token_bucket", log_sample_rate = 0.5 }
+      -- 0.5 lines/s over 10 s: one at start, then one every 2 s
+      assert.equal(5, run(sampler, conf, clock, 10, 0.25))
+      assert.same({ emitted = 5, suppressed = 35 }, sampler.stats().log_version)
+    end)
+
+    it("lets a line through at the start for fractional rates", function()
+      local conf = { log_sampling = "token_bucket", log_sample_rate = 0.1 }
+      assert.is_true(sampler.sample(conf, "log_version"))
+      assert.is_false(sampler.sample(conf, "log_version"))
+    end)
+
+    it("caps bursts at one second's worth", function()
+      local conf = { log_sampling = "token_bucket", log_sample_rate = 4 }
+      assert.is_true(sampler.sample(conf, "log_version"))
+      -- an idle minute refills only 4 tokens
+      clock.now = clock.now + 60
+      assert.equal(4, run(sampler, conf, clock, 0.001, 0.0001))
+    end)
+  end)
+end)
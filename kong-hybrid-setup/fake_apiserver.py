@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""Simulated Kubernetes API server for trying wait_ready.py without a cluster.
+
+Serves list and watch requests for Deployments, StatefulSets, pods and
+events, and plays one rollout with configurable (jittered) timings: the
+workload is created, each pod is scheduled, pulls its image (with the
+kubelet's Pulling/Pulled events), starts and turns Ready, and the workload
+status follows. A decoy release with the same ``app.kubernetes.io/name``
+rolls out alongside, slower, so waiting on the wrong selector shows::
+
+    python kong-hybrid-setup/fake_apiserver.py --port 8001
+    python kong-hybrid-setup/fake_apiserver.py --replicas 3 --pull 4 --ready 2 --error-rate 0.2
+    python kong-hybrid-setup/fake_apiserver.py --release postgres --namespace postgres --kind statefulset
+    python kong-hybrid-setup/fake_apiserver.py --pull-error --progress-deadline 5
+
+``--error-rate`` answers that fraction of requests with HTTP 500 and
+``--watch-lifetime`` ends watch streams early, to exercise retries;
+``--restart-after`` replays the rollout as a new generation that many
+seconds after the first one finished.
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import random
+import re
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlsplit
+
+REASONS = {200: "OK", 404: "Not Found", 410: "Gone", 500: "Internal Server Error"}
+
+ROUTES = {
+    "pods": ("Pod", re.compile(r"^/api/v1/namespaces/([^/]+)/pods$")),
+    "events": ("Event", re.compile(r"^/api/v1/namespaces/([^/]+)/events$")),
+    "deployments": ("Deployment", re.compile(r"^/apis/apps/v1/namespaces/([^/]+)/deployments$")),
+    "statefulsets": ("StatefulSet", re.compile(r"^/apis/apps/v1/namespaces/([^/]+)/statefulsets$")),
+}
+
+
+def now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def matches(obj, selector, fields):
+    labels = obj["metadata"].get("labels") or {}
+    for term in filter(None, selector.split(",")):
+        name, _, value = term.replace("==", "=").partition("=")
+        if labels.get(name) != value:
+            return False
+    for term in filter(None, fields.split(",")):
+        path, _, value = term.replace("==", "=").partition("=")
+        current = obj
+        for part in path.split("."):
+            current = current.get(part) if isinstance(current, dict) else None
+        if str(current) != value:
+            return False
+    return True
+
+
+class Store:
+    """Objects per kind and namespace, with a shared resourceVersion and watch feeds."""
+
+    def __init__(self):
+        self.version = 0
+        self.objects = defaultdict(dict)  # (kind, namespace) -> name -> object
+        self.history = defaultdict(list)  # (kind, namespace) -> [(version, type, object)]
+        self.watchers = defaultdict(set)  # (kind, namespace) -> queues
+
+    def put(self, kind, obj, type_="MODIFIED"):
+        self.version += 1
+        meta = obj["metadata"]
+        meta["resourceVersion"] = str(self.version)
+        key = (kind, meta["namespace"])
+        snapshot = copy.deepcopy(obj)
+        if type_ == "DELETED":
+            self.objects[key].pop(meta["name"], None)
+        else:
+            self.objects[key][meta["name"]] = snapshot
+        self.history[key].append((self.version, type_, snapshot))
+        for queue in self.watchers[key]:
+            queue.put_nowait((self.version, type_, snapshot))
+
+    def list(self, kind, namespace):
+        return list(self.objects[(kind, namespace)].values()), str(self.version)
+
+
+class Rollout:
+    """Plays a release's rollout into a Store."""
+
+    def __init__(self, store, args, release, slowdown=1.0):
+        self.store = store
+        self.args = args
+        self.release = release
+        self.slowdown = slowdown
+        self.rng = random.Random(f"{args.seed}-{release}")
+        self.kind = "StatefulSet" if args.kind == "statefulset" else "Deployment"
+        self.name = f"{release}-{args.app}"
+        self.image = args.image
+        self.generation = 0
+        self.workload = None
+
+    def _seconds(self, value):
+        return value * self.slowdown * self.rng.uniform(0.8, 1.2)
+
+    def _meta(self, name, labels=None):
+        return {"name": name, "namespace": self.args.namespace, "uid": f"uid-{name}",
+                "creationTimestamp": now(), "labels": labels or {}}
+
+    def _event(self, pod, reason, message, type_="Normal"):
+        stamp = now()
+        name = f"{pod['metadata']['name']}.{self.store.version + 1:x}"
+        event = {"metadata": self._meta(name), "type": type_, "reason": reason, "message": message,
+                 "involvedObject": {"kind": "Pod", "name": pod["metadata"]["name"], "namespace": self.args.namespace},
+                 "firstTimestamp": stamp, "lastTimestamp": stamp, "eventTime": stamp}
+        self.store.put("Event", event, "ADDED")
+
+    def _status(self, ready, updated, total):
+        status = {"observedGeneration": self.generation, "replicas": total, "updatedReplicas": updated}
+        if self.kind == "Deployment":
+            status.update(availableReplicas=ready, readyReplicas=ready)
+            if ready < self.args.replicas:
+                status["conditions"] = [{"type": "Progressing", "status": "True", "reason": "ReplicaSetUpdated"}]
+        else:
+            revision = f"{self.name}-{self.generation}"
+            status.update(readyReplicas=ready, updateRevision=revision,
+                          currentRevision=revision if updated == total == ready else f"{self.name}-{self.generation - 1}")
+        self.workload["status"] = status
+        self.store.put(self.kind, self.workload)
+
+    def _deadline_exceeded(self):
+        self.workload["status"]["conditions"] = [{
+            "type": "Progressing", "status": "False", "reason": "ProgressDeadlineExceeded",
+            "message": f'ReplicaSet "{self.name}-{self.generation}" has timed out progressing.',
+        }]
+        self.store.put(self.kind, self.workload)
+
+    async def _pod(self, index, counts, old):
+        args = self.args
+        suffix = f"{self.generation}{self.rng.randrange(16 ** 4):04x}-{index}" if self.kind == "Deployment" else str(index)
+        labels = {"app.kubernetes.io/instance": self.release, "app.kubernetes.io/name": args.app}
+        pod = {"metadata": self._meta(f"{self.name}-{suffix}", labels),
+               "spec": {"containers": [{"name": args.app, "image": self.image}]},
+               "status": {"phase": "Pending", "conditions": []}}
+        self.store.put("Pod", pod, "ADDED")
+
+        await asyncio.sleep(self._seconds(args.schedule))
+        pod["spec"]["nodeName"] = f"fake-node-{index % 3 + 1}"
+        pod["status"]["conditions"].append({"type": "PodScheduled", "status": "True", "lastTransitionTime": now()})
+        pod["status"]["containerStatuses"] = [{"name": args.app, "ready": False, "image": self.image,
+                                               "state": {"waiting": {"reason": "ContainerCreating"}}}]
+        self.store.put("Pod", pod)
+
+        self._event(pod, "Pulling", f'Pulling image "{self.image}"')
+        pull = self._seconds(args.pull)
+        await asyncio.sleep(pull)
+        if args.pull_error:
+            self._event(pod, "Failed", f'Failed to pull image "{self.image}": not found', "Warning")
+            pod["status"]["containerStatuses"][0]["state"] = {"waiting": {"reason": "ImagePullBackOff"}}
+            self.store.put("Pod", pod)
+            await asyncio.Event().wait()  # stuck until the progress deadline reports it
+        self._event(pod, "Pulled", f'Successfully pulled image "{self.image}" in {pull:.3f}s ({pull:.3f}s including waiting)')
+
+        await asyncio.sleep(self._seconds(args.start))
+        pod["status"]["phase"] = "Running"
+        pod["status"]["containerStatuses"][0]["state"] = {"running": {"startedAt": now()}}
+        self.store.put("Pod", pod)
+
+        await asyncio.sleep(self._seconds(args.ready))
+        pod["status"]["conditions"].append({"type": "Ready", "status": "True", "lastTransitionTime": now()})
+        pod["status"]["containerStatuses"][0]["ready"] = True
+        self.store.put("Pod", pod)
+        counts["ready"] += 1
+        if old:
+            # The replacement is ready, so one pod of the previous generation goes
+            gone = old.pop()
+            gone["metadata"]["deletionTimestamp"] = now()
+            self.store.put("Pod", gone)
+            self.store.put("Pod", gone, "DELETED")
+        self._status(counts["ready"], self.args.replicas, self.args.replicas + len(old))
+
+    async def play(self):
+        args = self.args
+        await asyncio.sleep(self._seconds(args.delay))
+        old = [pod for pod in self.store.objects[("Pod", args.namespace)].values()
+               if pod["metadata"]["labels"].get("app.kubernetes.io/instance") == self.release]
+        self.generation += 1
+        if self.workload is None:
+            labels = {"app.kubernetes.io/instance": self.release, "app.kubernetes.io/name": args.app}
+            self.workload = {"metadata": dict(self._meta(self.name, labels), generation=1),
+                             "spec": {"replicas": args.replicas}, "status": {}}
+            self.store.put(self.kind, self.workload, "ADDED")
+        else:
+            self.image = f"{args.image}-{self.generation}"
+            self.workload["metadata"]["generation"] = self.generation
+            self.store.put(self.kind, self.workload)
+        await asyncio.sleep(0.05)
+
+        old = [copy.deepcopy(pod) for pod in old] if self.kind == "Deployment" else []
+        counts = {"ready": 0}
+        self._status(0, args.replicas, args.replicas + len(old))
+        pods = asyncio.gather(*(self._pod(i, counts, old) for i in range(args.replicas)))
+        if args.progress_deadline:
+            try:
+                await asyncio.wait_for(asyncio.shield(pods), args.progress_deadline)
+            except asyncio.TimeoutError:
+                self._deadline_exceeded()
+        await pods
+
+
+class FakeAPIServer:
+    """HTTP/1.1 server for the list and watch requests wait_ready.py makes."""
+
+    def __init__(self, store, error_rate=0.0, watch_lifetime=None, seed=0):
+        self.store = store
+        self.error_rate = error_rate
+        self.watch_lifetime = watch_lifetime
+        self.rng = random.Random(seed)
+        self.requests = 0
+
+    def _reply(self, writer, status, body):
+        data = json.dumps(body).encode("utf-8")
+        head = f"HTTP/1.1 {status} {REASONS.get(status, 'Status')}\r\nContent-Type: application/json\r\n" \
+               f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n"
+        writer.write(head.encode("latin-1") + data)
+
+    def _error(self, writer, status, message):
+        self._reply(writer, status, {"kind": "Status", "apiVersion": "v1", "status": "Failure",
+                                     "message": message, "code": status})
+
+    async def _watch(self, writer, kind, namespace, query):
+        key = (kind, namespace)
+        since = int(query.get("resourceVersion") or 0)
+        timeout = float(query.get("timeoutSeconds") or 1800)
+        if self.watch_lifetime:
+            timeout = min(timeout, self.watch_lifetime)
+
+        queue = asyncio.Queue()
+        self.store.watchers[key].add(queue)
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nTransfer-Encoding: chunked\r\n\r\n")
+            for entry in self.store.history[key]:
+                queue.put_nowait(entry)
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            sent = since
+            while True:
+                try:
+                    version, type_, obj = await asyncio.wait_for(queue.get(), max(0.0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+                if version <= sent or not matches(obj, query.get("labelSelector", ""), query.get("fieldSelector", "")):
+                    continue
+                sent = version
+                line = json.dumps({"type": type_, "object": obj}).encode("utf-8") + b"\n"
+                writer.write(b"%x\r\n" % len(line) + line + b"\r\n")
+                await writer.drain()
+            writer.write(b"0\r\n\r\n")
+        finally:
+            self.store.watchers[key].discard(queue)
+
+    async def handle(self, reader, writer):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            parts = head.decode("latin-1").split("\r\n")[0].split(" ")
+            url = urlsplit(parts[1])
+            query = dict(parse_qsl(url.query))
+            self.requests += 1
+
+            route = next(((kind, m.group(1)) for kind, pattern in ROUTES.values() if (m := pattern.match(url.path))), None)
+            if route is None:
+                self._error(writer, 404, f"the server could not find the requested resource ({url.path})")
+            elif self.rng.random() < self.error_rate:
+                self._error(writer, 500, "injected failure")
+            elif query.get("watch") in ("1", "true"):
+                await self._watch(writer, route[0], route[1], query)
+            else:
+                items, version = self.store.list(*route)
+                items = [obj for obj in items
+                         if matches(obj, query.get("labelSelector", ""), query.get("fieldSelector", ""))]
+                self._reply(writer, 200, {"kind": f"{route[0]}List", "metadata": {"resourceVersion": version},
+                                          "items": items})
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, IndexError, ValueError,
+                asyncio.CancelledError):
+            pass  # client went away, sent garbage, or we are shutting down
+        finally:
+            writer.close()
+
+
+async def simulate(args):
+    store = Store()
+    api = FakeAPIServer(store, args.error_rate, args.watch_lifetime, args.seed)
+    server = await asyncio.start_server(api.handle, args.host, args.port)
+    print(f"🧪 fake API server on {args.host}:{args.port}: {args.kind} {args.release} in {args.namespace}, "
+          f"{args.replicas} replicas" + (f", decoy {args.decoy}" if args.decoy else ""))
+    sys.stdout.flush()
+
+    rollouts = [Rollout(store, args, args.release)]
+    if args.decoy:
+        rollouts.append(Rollout(store, args, args.decoy, slowdown=3.0))
+
+    async def play(rollout):
+        await rollout.play()
+        if args.restart_after is not None and rollout.release == args.release:
+            await asyncio.sleep(args.restart_after)
+            await rollout.play()
+
+    async with server:
+        await asyncio.gather(*(play(r) for r in rollouts))
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulated Kubernetes API server playing a Helm release rollout")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=8001, help="listen port (default: 8001)")
+    parser.add_argument("-n", "--namespace", default="kong", help="namespace of the releases (default: kong)")
+    parser.add_argument("--release", default="kong-cp", help="release rolled out (default: kong-cp)")
+    parser.add_argument("--decoy", default="kong-dp", help="slower release with the same name label ('' for none)")
+    parser.add_argument("--app", default="kong", help="app.kubernetes.io/name of both releases (default: kong)")
+    parser.add_argument("--kind", choices=("deployment", "statefulset"), default="deployment")
+    parser.add_argument("--replicas", type=int, default=2, help="pods per release (default: 2)")
+    parser.add_argument("--image", default="kong:3.6")
+    parser.add_argument("--delay", type=float, default=0.5, help="seconds before the rollout starts (default: 0.5)")
+    parser.add_argument("--schedule", type=float, default=0.2, help="seconds until a pod is scheduled (default: 0.2)")
+    parser.add_argument("--pull", type=float, default=1.5, help="seconds an image pull takes (default: 1.5)")
+    parser.add_argument("--start", type=float, default=0.5, help="seconds until the container runs (default: 0.5)")
+    parser.add_argument("--ready", type=float, default=1.0, help="seconds until the readiness probe passes (default: 1)")
+    parser.add_argument("--pull-error", action="store_true", help="image pulls fail (ImagePullBackOff)")
+    parser.add_argument("--progress-deadline", type=float, help="report ProgressDeadlineExceeded after this many seconds")
+    parser.add_argument("--restart-after", type=float, help="roll out a new generation this long after the first")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--watch-lifetime", type=float, help="end every watch stream after this many seconds")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for timings and failures (default: 0)")
+    args = parser.parse_args(argv)
+    if args.replicas <= 0:
+        parser.error("--replicas must be positive")
+    if not 0 <= args.error_rate < 1:
+        parser.error("--error-rate must be in [0, 1)")
+
+    try:
+        asyncio.run(simulate(args))
+    except OSError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""Generate the Kong hybrid setup project tree.
+
+This is the single entry point that replaces running ``script.py`` through
+``script_12.py`` one after another. Each script now only defines the content
+of its artifacts; the targets below map every artifact to the script and
+variable it is rendered from. Helpers shared with the sibling projects
+(``kong-hybrid-local``, ``kong-hybrid-local-mtls``) are rendered into those
+trees as well, so each has a single source.
+
+Files are written incrementally: rendered content is hashed and compared with
+a manifest of content hashes, and only files whose bytes changed are written.
+A no-op regeneration therefore touches no file on disk and leaves mtimes
+alone, so Docker layers, ConfigMap applies and ``helm diff`` stay quiet.
+
+Usage (from the directory that should contain ``kong-hybrid-setup/``)::
+
+    python kong-hybrid-setup/generate.py
+    python kong-hybrid-setup/generate.py --force --summary
+    python kong-hybrid-setup/generate.py --jobs 8 --timings
+
+Scripts are nodes of a dependency graph (see ``NODES``); nodes whose
+dependencies are done render concurrently on a thread pool.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import runpy
+import stat
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_NAME = "kong-hybrid-setup/.generator-manifest.json"
+
+# Same permissions the original scripts applied with os.chmod
+EXECUTABLE = stat.S_IRWXU | stat.S_IRGRP | stat.S_IROTH
+
+
+@dataclass(frozen=True)
+class Target:
+    """A generated file, rendered from a variable defined by a script."""
+
+    path: str
+    script: str
+    variable: str
+    mode: Optional[int] = None
+
+
+TARGETS = [
+    Target("kong-hybrid-setup/README.md", "script_1.py", "readme_content"),
+    Target("kong-hybrid-setup/certificates/generate-certs.sh", "script_2.py", "cert_script", EXECUTABLE),
+    Target("kong-hybrid-setup/control-plane/values-cp.yaml", "script_3.py", "cp_values"),
+    Target("kong-hybrid-setup/data-plane/values-dp.yaml", "script_4.py", "dp_values"),
+    Target("kong-hybrid-setup/database/postgres-values.yaml", "script_5.py", "postgres_values"),
+    Target("kong-hybrid-setup/custom-plugins/api-version/kong/plugins/api-version/handler.lua", "script_6.py", "handler_lua"),
+    Target("kong-hybrid-setup/custom-plugins/api-version/kong/plugins/api-version/body_cache.lua", "script_6.py", "body_cache_lua"),
+    Target("kong-hybrid-setup/custom-plugins/api-version/kong/plugins/api-version/clock.lua", "script_6.py", "clock_lua"),
+    Target("kong-hybrid-setup/custom-plugins/api-version/kong/plugins/api-version/log_queue.lua", "script_6.py", "log_queue_lua"),
+    Target("kong-hybrid-setup/custom-plugins/api-version/kong/plugins/api-version/log_sampler.lua", "script_6.py", "log_sampler_lua"),
+    Target("kong-hybrid-setup/custom-plugins/api-version/kong/plugins/api-version/negotiate.lua", "script_6.py", "negotiate_lua"),
+    Target("kong-hybrid-setup/custom-plugins/api-version/kong/plugins/api-version/phase_timer.lua", "script_6.py", "phase_timer_lua"),
+    Target("kong-hybrid-setup/custom-plugins/api-version/kong/plugins/api-version/status_api.lua", "script_6.py", "status_api_lua"),
+    Target("kong-hybrid-setup/custom-plugins/api-version/kong/plugins/api-version/schema.lua", "script_6.py", "schema_lua"),
+    Target("kong-hybrid-setup/custom-plugins/api-version/spec/api-version/01-log_sampler_spec.lua", "script_6.py", "log_sampler_spec_lua"),
+    Target("kong-hybrid-setup/custom-plugins/api-version/kong-plugin-api-version-0.1.0-1.rockspec", "script_6.py", "rockspec"),
+    Target("kong-hybrid-setup/custom-plugins/api-version/README.md", "script_6.py", "plugin_readme"),
+    Target("kong-hybrid-setup/scripts/setup.sh", "script_7.py", "setup_script", EXECUTABLE),
+    Target("kong-hybrid-setup/scripts/deploy-cp.sh", "script_8.py", "deploy_cp_script", EXECUTABLE),
+    Target("kong-hybrid-setup/scripts/deploy-dp.sh", "script_8.py", "deploy_dp_script", EXECUTABLE),
+    Target("kong-hybrid-setup/scripts/cleanup.sh", "script_8.py", "cleanup_script", EXECUTABLE),
+    Target("kong-hybrid-setup/scripts/step-trace.sh", "script_8.py", "step_trace_script", EXECUTABLE),
+    Target("kong-hybrid-setup/scripts/helm-release.sh", "script_8.py", "helm_release_script", EXECUTABLE),
+    Target("kong-hybrid-setup/scripts/helm-charts.sh", "script_8.py", "helm_charts_script", EXECUTABLE),
+    Target("kong-hybrid-setup/charts/charts.lock", "script_8.py", "charts_lock"),
+    Target("kong-hybrid-setup/monitoring/prometheus-values.yaml", "script_9.py", "prometheus_values"),
+    Target("kong-hybrid-setup/monitoring/kong-dashboard.json", "script_9.py", "grafana_dashboard"),
+    Target("kong-hybrid-setup/examples/service-and-route.yaml", "script_10.py", "service_route_example"),
+    Target("kong-hybrid-setup/examples/plugin-examples.yaml", "script_10.py", "plugin_examples"),
+    Target("kong-hybrid-setup/DEPLOYMENT_GUIDE.md", "script_11.py", "deployment_guide"),
+    # Shared with the sibling projects, which track the rendered copies
+    Target("kong-hybrid-local/custom-plugins/kong/plugins/my-custom-plugin/phase_timer.lua", "script_6.py", "phase_timer_lua"),
+    Target("kong-hybrid-local-mtls/plugins/custom-plugin/phase_timer.lua", "script_6.py", "phase_timer_lua"),
+    Target("kong-hybrid-local/scripts/helm-charts.sh", "script_8.py", "helm_charts_script"),
+    Target("kong-hybrid-local-mtls/scripts/helm-charts.sh", "script_8.py", "helm_charts_script"),
+    Target("kong-hybrid-local-mtls/scripts/step-trace.sh", "script_8.py", "step_trace_script"),
+]
+
+
+class ScriptLoader:
+    """Executes each script at most once and keeps its namespace."""
+
+    def __init__(self, script_dir=SCRIPT_DIR):
+        self.script_dir = script_dir
+        self._namespaces = {}
+        self._lock = threading.Lock()
+
+    def namespace(self, script):
+        namespace = self._namespaces.get(script)
+        if namespace is None:
+            namespace = runpy.run_path(os.path.join(self.script_dir, script))
+            with self._lock:
+                namespace = self._namespaces.setdefault(script, namespace)
+        return namespace
+
+    def render(self, target):
+        return self.namespace(target.script)[target.variable].encode("utf-8")
+
+
+class Manifest:
+    """Content hashes of the files written by previous runs."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def is_current(self, rel_path, digest, st):
+        """True when the file on disk is known to hold ``digest`` already."""
+        entry = self.entries.get(rel_path)
+        return (
+            entry is not None
+            and entry["sha256"] == digest
+            and entry["size"] == st.st_size
+            and entry["mtime_ns"] == st.st_mtime_ns
+        )
+
+    def record(self, rel_path, digest, st):
+        entry = {"sha256": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        with self._lock:
+            if self.entries.get(rel_path) != entry:
+                self.entries[rel_path] = entry
+                self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+def write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def sync_target(root, target, data, manifest, force=False):
+    """Write ``data`` to the target if it changed. Returns the action taken."""
+    path = os.path.join(root, target.path)
+    digest = hashlib.sha256(data).hexdigest()
+
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        st = None
+
+    action = "unchanged"
+    if force or st is None:
+        action = "created" if st is None else "written"
+    elif not manifest.is_current(target.path, digest, st):
+        # Unknown or touched file: compare bytes before deciding to write
+        if st.st_size != len(data):
+            action = "updated"
+        else:
+            with open(path, "rb") as f:
+                if f.read() != data:
+                    action = "updated"
+
+    if action != "unchanged":
+        write_atomic(path, data)
+        st = os.stat(path)
+
+    if target.mode is not None and stat.S_IMODE(st.st_mode) != target.mode:
+        os.chmod(path, target.mode)
+        st = os.stat(path)
+        if action == "unchanged":
+            action = "chmod"
+
+    manifest.record(target.path, digest, st)
+    return action
+
+
+def ensure_directories(root, loader):
+    for dir_path in loader.namespace("script.py")["dirs"]:
+        os.makedirs(os.path.join(root, dir_path), exist_ok=True)
+
+
+@dataclass(frozen=True)
+class Node:
+    """A script in the render graph and the scripts it has to wait for."""
+
+    script: str
+    deps: Tuple[str, ...] = ()
+
+
+# script.py creates the directory layout everything else is written into;
+# the project tree printed by script_12.py has to see every other artifact.
+ARTIFACT_SCRIPTS = tuple(dict.fromkeys(target.script for target in TARGETS))
+NODES = (
+    Node("script.py"),
+    *(Node(script, deps=("script.py",)) for script in ARTIFACT_SCRIPTS),
+    Node("script_12.py", deps=("script.py", *ARTIFACT_SCRIPTS)),
+)
+
+
+def check_graph(nodes):
+    """Reject unknown dependencies and cycles before anything is rendered."""
+    names = {node.script for node in nodes}
+    for node in nodes:
+        missing = set(node.deps) - names
+        if missing:
+            raise ValueError(f"{node.script} depends on unknown nodes: {sorted(missing)}")
+
+    done = set()
+    pending = list(nodes)
+    while pending:
+        ready = [node for node in pending if set(node.deps) <= done]
+        if not ready:
+            raise ValueError(f"dependency cycle between: {sorted(node.script for node in pending)}")
+        done.update(node.script for node in ready)
+        pending = [node for node in pending if node.script not in done]
+
+
+class Generator:
+    """Renders the node graph, running independent nodes on a thread pool."""
+
+    def __init__(self, root=".", force=False, verbose=False, summary=False, tree_index=None):
+        self.root = root
+        self.force = force
+        self.verbose = verbose
+        self.summary = summary
+        self.tree_index = tree_index
+        self.loader = ScriptLoader()
+        self.manifest = Manifest(os.path.join(root, MANIFEST_NAME))
+        self.results = {}
+        self.timings = {}
+        self._print_lock = threading.Lock()
+
+    def nodes(self):
+        if self.summary:
+            return NODES
+        return tuple(node for node in NODES if node.script != "script_12.py")
+
+    def run_node(self, node):
+        started = time.perf_counter()
+        if node.script == "script.py":
+            ensure_directories(self.root, self.loader)
+        elif node.script == "script_12.py":
+            with self._print_lock:
+                self.print_summary()
+        else:
+            for target in TARGETS:
+                if target.script != node.script:
+                    continue
+                action = sync_target(self.root, target, self.loader.render(target), self.manifest, self.force)
+                self.results[target.path] = action
+                if self.verbose or action != "unchanged":
+                    with self._print_lock:
+                        print(f"  {action:<9} {target.path}")
+        self.timings[node.script] = time.perf_counter() - started
+
+    def run(self, jobs=None):
+        nodes = self.nodes()
+        check_graph(nodes)
+        pending = {node.script: node for node in nodes}
+        done = set()
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            running = {}
+            while pending or running:
+                for name, node in list(pending.items()):
+                    if set(node.deps) <= done:
+                        running[pool.submit(self.run_node, node)] = name
+                        del pending[name]
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    future.result()
+                    done.add(name)
+
+        self.manifest.save()
+        return self.results
+
+    def print_timings(self):
+        print("Per-node timings:")
+        for node in self.nodes():
+            print(f"  {node.script:<14} {self.timings[node.script] * 1000:8.2f} ms")
+
+    def print_summary(self):
+        namespace = self.loader.namespace("script_12.py")
+        index = None
+        if self.tree_index:
+            index = namespace["load_tree_index"](self.tree_index)
+
+        print(namespace["summary_content"])
+        print("\n" + "=" * 60)
+        print("COMPLETE PROJECT STRUCTURE:")
+        print("=" * 60)
+        for line in namespace["create_tree"](os.path.join(self.root, "kong-hybrid-setup"), index=index):
+            print(line)
+
+        if index is not None:
+            namespace["save_tree_index"](self.tree_index, index)
+
+
+def generate(root=".", force=False, verbose=False, jobs=None):
+    """Render every target under ``root``. Returns ``{path: action}``."""
+    return Generator(root, force=force, verbose=verbose).run(jobs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the Kong hybrid setup project tree")
+    parser.add_argument("--root", default=".", help="directory that contains kong-hybrid-setup/ (default: .)")
+    parser.add_argument("--force", action="store_true", help="rewrite every file even if unchanged")
+    parser.add_argument("--summary", action="store_true", help="print the project summary and tree once everything is rendered")
+    parser.add_argument("--tree-index", metavar="PATH", help="persist a directory index so later summaries only rescan changed directories")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="render up to N nodes concurrently (default: CPU count)")
+    parser.add_argument("--timings", action="store_true", help="print how long each node took")
+    parser.add_argument("-v", "--verbose", action="store_true", help="list unchanged files too")
+    args = parser.parse_args(argv)
+
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    generator = Generator(args.root, force=args.force, verbose=args.verbose, summary=args.summary, tree_index=args.tree_index)
+    started = time.perf_counter()
+    results = generator.run(args.jobs)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    changed = sum(1 for action in results.values() if action != "unchanged")
+    print(f"✅ {len(results)} targets, {changed} changed, {elapsed_ms:.1f} ms ({args.jobs} jobs)")
+
+    if args.timings:
+        generator.print_timings()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
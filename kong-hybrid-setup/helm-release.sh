@@ -0,0 +1,75 @@
+#!/usr/bin/env bash
+
+# helm-release.sh - Skip helm upgrades that would not change anything
+#
+#   source "$SCRIPT_DIR/helm-release.sh"
+#   helm_upgrade_if_changed kong-cp kong/kong kong --values values-cp.yaml
+#   wait_for_release kong-cp kong
+#
+# The chart is rendered locally with the same arguments and the manifest is
+# hashed together with the chart version. The hash is kept in the release's
+# description, so when the last revision is deployed with the same hash the
+# upgrade is skipped. FORCE=1 always upgrades. Upgrades do not --wait;
+# wait_for_release follows the rollout instead.
+
+_helm_release_sha256() {
+    if command -v sha256sum > /dev/null; then
+        sha256sum | cut -d' ' -f1
+    else
+        shasum -a 256 | cut -d' ' -f1
+    fi
+}
+
+# Hash of the rendered manifest and chart version for these arguments
+helm_manifest_hash() {
+    local release="$1" chart="$2" namespace="$3"
+    shift 3
+    local version_args=() i next
+    for ((i = 1; i <= $#; i++)); do
+        case "${!i}" in
+            --version=*) version_args=("${!i}") ;;
+            --version) next=$((i + 1)); version_args=(--version "${!next}") ;;
+        esac
+    done
+    {
+        helm show chart "$chart" ${version_args[@]+"${version_args[@]}"} | grep -E '^(name|version):'
+        helm template "$release" "$chart" --namespace "$namespace" "$@"
+    } | _helm_release_sha256
+}
+
+# helm upgrade --install RELEASE CHART -n NAMESPACE ARGS..., unless the
+# deployed revision was made from the same manifest
+helm_upgrade_if_changed() {
+    local release="$1" chart="$2" namespace="$3"
+    shift 3
+    local hash last
+    hash="$(helm_manifest_hash "$release" "$chart" "$namespace" "$@")"
+    if [[ -z "${FORCE:-}" ]]; then
+        last="$(helm history "$release" --namespace "$namespace" --max 1 -o json 2> /dev/null || true)"
+        if [[ "$last" == *'"status":"deployed"'* && "$last" == *"manifest sha256:$hash"* ]]; then
+            echo "⏭️  $release is up to date (manifest sha256:${hash:0:12}); skipping helm upgrade"
+            return 0
+        fi
+    fi
+    helm upgrade --install "$release" "$chart" --namespace "$namespace" "$@" \
+        --description "manifest sha256:$hash"
+}
+
+# wait_for_release RELEASE NAMESPACE - block until the Deployments and
+# StatefulSets of exactly this release (app.kubernetes.io/instance) have
+# rolled out, for at most WAIT_TIMEOUT seconds (default 600). wait_ready.py
+# watches the API and returns the moment they are available; without
+# python3, kubectl rollout status is run for each workload.
+wait_for_release() {
+    local release="$1" namespace="$2" timeout="${WAIT_TIMEOUT:-600}"
+    local waiter workload
+    waiter="$(dirname "$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)")/wait_ready.py"
+    if command -v python3 > /dev/null && [[ -f "$waiter" ]]; then
+        python3 "$waiter" "$release" --namespace "$namespace" --timeout "$timeout"
+        return
+    fi
+    for workload in $(kubectl get deployment,statefulset -n "$namespace" \
+            -l "app.kubernetes.io/instance=$release" -o name); do
+        kubectl rollout status "$workload" -n "$namespace" --timeout="${timeout}s" || return
+    done
+}
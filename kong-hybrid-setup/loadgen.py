@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""Open-loop HTTP load generator for the Kong data plane proxy.
+
+Requests are issued at a constant arrival rate whatever the server does, and
+each latency is measured from the moment the request *should* have been sent.
+A slow gateway therefore shows up as queueing in the percentiles instead of
+quietly lowering the request rate (coordinated omission). Connections are
+kept alive and pooled; latencies go into an HDR-style log-linear histogram so
+p99.9 stays accurate without storing every sample.
+
+Usage (after ``kubectl port-forward ... svc/kong-dp-kong-proxy 8000:80``)::
+
+    python kong-hybrid-setup/loadgen.py http://localhost:8000/httpbin/get --rate 500 --duration 30
+    python kong-hybrid-setup/loadgen.py http://localhost:8000/api/v1/users -H 'apikey: secret' --json result.json
+
+To measure gateway overhead, run the same load against the mock upstream
+(``mock_upstream.py``) directly and through Kong, and compare the two
+reports. ``--upstream`` serves one in-process with default settings::
+
+    python kong-hybrid-setup/loadgen.py http://127.0.0.1:9000/ --upstream 9000
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import ssl
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from mock_upstream import MockUpstream
+
+# Final statuses whose responses never carry a body (RFC 9112, section 6.3)
+NO_BODY_STATUSES = {204, 304}
+
+
+class Histogram:
+    """Log-linear latency histogram in the style of HdrHistogram.
+
+    Values (integer microseconds) are exact below ``sub_bucket_count``; above
+    that each power-of-two range is split into ``sub_bucket_count / 2``
+    buckets, so every recorded value keeps ``significant_figures`` digits of
+    precision; ten seconds at 1 µs resolution fit in about 15k counters.
+    """
+
+    def __init__(self, significant_figures=3):
+        self.sub_bucket_bits = math.ceil(math.log2(2 * 10**significant_figures))
+        self.sub_bucket_count = 1 << self.sub_bucket_bits
+        self.half = self.sub_bucket_count // 2
+        self.counts = []
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = 0
+
+    def _index(self, value):
+        if value < self.sub_bucket_count:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits
+        return self.sub_bucket_count + (shift - 1) * self.half + (value >> shift) - self.half
+
+    def _highest_equivalent(self, index):
+        if index < self.sub_bucket_count:
+            return index
+        shift, offset = divmod(index - self.sub_bucket_count, self.half)
+        shift += 1
+        return ((offset + self.half) << shift) + (1 << shift) - 1
+
+    def record(self, value):
+        value = max(0, int(value))
+        index = self._index(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def merge(self, other):
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def percentile(self, p):
+        if not self.total:
+            return 0
+        wanted = max(1, math.ceil(self.total * p / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= wanted:
+                return min(self._highest_equivalent(index), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.sum / self.total if self.total else 0
+
+
+class HTTPError(Exception):
+    """The server sent something that is not a usable HTTP/1.1 response."""
+
+
+class Connection:
+    """A keep-alive HTTP/1.1 connection that sends one prebuilt request."""
+
+    def __init__(self, target):
+        self.target = target
+        self.reader = None
+        self.writer = None
+
+    async def _open(self):
+        self.reader, self.writer = await asyncio.open_connection(
+            self.target.host, self.target.port, ssl=self.target.ssl, server_hostname=self.target.server_hostname
+        )
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def _read_head(self):
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            status = int(lines[0].split(" ", 2)[1])
+        except (IndexError, ValueError):
+            raise HTTPError(f"bad status line {lines[0]!r}")
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return status, headers
+
+    async def _read_body(self, headers):
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif "content-length" in headers:
+            await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            await self.reader.read()
+            self.close()
+
+    async def request(self, data):
+        if self.writer is None:
+            await self._open()
+        self.writer.write(data)
+        await self.writer.drain()
+
+        status, headers = await self._read_head()
+        while 100 <= status < 200 and status != 101:
+            # Interim responses (100 Continue, 103 Early Hints) precede the final one
+            status, headers = await self._read_head()
+
+        if status == 101:
+            self.close()  # the connection no longer speaks HTTP
+            return status
+        # HEAD responses, 204 and 304 have no body, whatever their
+        # Content-Length or Transfer-Encoding say
+        if self.target.method != "HEAD" and status not in NO_BODY_STATUSES:
+            await self._read_body(headers)
+
+        if self.writer is not None and headers.get("connection", "").lower() == "close":
+            self.close()
+        return status
+
+
+class Target:
+    """Where requests go and the bytes of the request to send."""
+
+    def __init__(self, url, method="GET", headers=(), body=b"", insecure=False):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"unsupported URL scheme: {url}")
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.method = method
+        self.ssl = None
+        self.server_hostname = None
+        if parts.scheme == "https":
+            self.ssl = ssl.create_default_context()
+            self.server_hostname = self.host
+            if insecure:
+                self.ssl.check_hostname = False
+                self.ssl.verify_mode = ssl.CERT_NONE
+
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        host_header = parts.netloc.rpartition("@")[2]
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {host_header}", "User-Agent: kong-loadgen/1.0"]
+        lines += list(headers)
+        if body or method in ("POST", "PUT", "PATCH"):
+            lines.append(f"Content-Length: {len(body)}")
+        self.request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+class Result:
+    """Latencies and errors, overall and per reporting interval."""
+
+    def __init__(self):
+        self.histogram = Histogram()
+        self.interval = Histogram()
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.interval_errors = 0
+
+    def ok(self, status, latency_us):
+        self.statuses[status] += 1
+        self.histogram.record(latency_us)
+        self.interval.record(latency_us)
+        if status >= 500:
+            self.error(f"HTTP {status}")
+
+    def error(self, kind):
+        self.errors[kind] += 1
+        self.interval_errors += 1
+
+    def take_interval(self):
+        interval, errors = self.interval, self.interval_errors
+        self.interval, self.interval_errors = Histogram(), 0
+        return interval, errors
+
+
+async def run_load(target, rate, duration, connections=64, timeout=10.0, warmup=0.0, max_inflight=10000, report=None):
+    """Send ``rate`` requests/s for ``warmup + duration`` seconds. Returns a Result for the measured part."""
+    loop = asyncio.get_running_loop()
+    pool = asyncio.Queue()
+    for _ in range(connections):
+        pool.put_nowait(Connection(target))
+
+    warmup_result, result = Result(), Result()
+    inflight = set()
+
+    async def one(intended, into):
+        conn = await pool.get()
+        try:
+            status = await asyncio.wait_for(conn.request(target.request), timeout)
+        except asyncio.TimeoutError:
+            conn.close()
+            into.error("timeout")
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, HTTPError, ValueError) as e:
+            conn.close()
+            into.error(type(e).__name__)
+        else:
+            into.ok(status, (loop.time() - intended) * 1e6)
+        finally:
+            pool.put_nowait(conn)
+
+    start = loop.time()
+    measure_from = start + warmup
+    end = measure_from + duration
+    next_report = measure_from + 1.0
+    sent = 0
+    while True:
+        now = loop.time()
+        if now >= end:
+            break
+        # Dispatch every request that is due by now, each stamped with its own
+        # intended start time; latency counts any wait for a free connection.
+        due = int((now - start) * rate) + 1
+        while sent < due:
+            intended = start + sent / rate
+            sent += 1
+            into = result if intended >= measure_from else warmup_result
+            if len(inflight) >= max_inflight:
+                into.error("dropped")
+                continue
+            task = loop.create_task(one(intended, into))
+            inflight.add(task)
+            task.add_done_callback(inflight.discard)
+
+        if report and now >= next_report:
+            report(now - measure_from, *result.take_interval())
+            next_report += 1.0
+        await asyncio.sleep(max(0.0, min(start + sent / rate, end) - loop.time()))
+
+    if inflight:
+        await asyncio.wait(inflight, timeout=timeout)
+    while not pool.empty():
+        pool.get_nowait().close()
+    return result
+
+
+def summary(result, duration):
+    h = result.histogram
+    return {
+        "requests": h.total,
+        "rate": h.total / duration if duration else 0,
+        "errors": sum(result.errors.values()),
+        "errors_per_sec": sum(result.errors.values()) / duration if duration else 0,
+        "error_kinds": dict(result.errors),
+        "statuses": {str(k): v for k, v in sorted(result.statuses.items())},
+        "latency_ms": {
+            "min": (h.min or 0) / 1000,
+            "mean": h.mean / 1000,
+            "p50": h.percentile(50) / 1000,
+            "p90": h.percentile(90) / 1000,
+            "p99": h.percentile(99) / 1000,
+            "p99.9": h.percentile(99.9) / 1000,
+            "max": h.max / 1000,
+        },
+    }
+
+
+def print_interval(elapsed, histogram, errors):
+    print(
+        f"  {elapsed:6.1f}s  {histogram.total:>7} req  p50 {histogram.percentile(50) / 1000:8.2f} ms"
+        f"  p99 {histogram.percentile(99) / 1000:8.2f} ms  {errors:>5} errors"
+    )
+
+
+async def main_async(args):
+    server = None
+    if args.upstream:
+        server = await MockUpstream().start(args.upstream)
+        print(f"🧪 mock upstream listening on :{args.upstream}")
+
+    body = b""
+    if args.body_file:
+        with open(args.body_file, "rb") as f:
+            body = f.read()
+    elif args.data:
+        body = args.data.encode("utf-8")
+
+    target = Target(args.url, args.method, args.header, body, args.insecure)
+    print(f"🚀 {args.method} {args.url} at {args.rate} req/s for {args.duration}s ({args.connections} connections)")
+    result = await run_load(
+        target,
+        args.rate,
+        args.duration,
+        connections=args.connections,
+        timeout=args.timeout,
+        warmup=args.warmup,
+        report=None if args.quiet else print_interval,
+    )
+
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Constant-rate HTTP load generator with latency percentiles")
+    parser.add_argument("url", nargs="?", default="http://localhost:8000/httpbin/get", help="target URL (default: the DP proxy test route)")
+    parser.add_argument("-r", "--rate", type=float, default=100, help="requests per second (default: 100)")
+    parser.add_argument("-d", "--duration", type=float, default=10, help="measured seconds (default: 10)")
+    parser.add_argument("-c", "--connections", type=int, default=64, help="keep-alive connections (default: 64)")
+    parser.add_argument("-X", "--method", default="GET")
+    parser.add_argument("-H", "--header", action="append", default=[], help="extra request header, 'Name: value'")
+    parser.add_argument("--data", help="request body")
+    parser.add_argument("--body-file", help="read the request body from a file")
+    parser.add_argument("--timeout", type=float, default=10, help="per-request timeout in seconds (default: 10)")
+    parser.add_argument("--warmup", type=float, default=2, help="seconds of load before measuring (default: 2)")
+    parser.add_argument("-k", "--insecure", action="store_true", help="do not verify TLS certificates")
+    parser.add_argument("--upstream", type=int, metavar="PORT", help="also serve a mock upstream (mock_upstream.py defaults) on PORT")
+    parser.add_argument("--json", metavar="FILE", help="write the summary as JSON")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no per-second progress lines")
+    args = parser.parse_args(argv)
+    if args.rate <= 0 or args.duration <= 0 or args.connections <= 0:
+        parser.error("--rate, --duration and --connections must be positive")
+
+    try:
+        result = asyncio.run(main_async(args))
+    except (ValueError, OSError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+
+    report = summary(result, args.duration)
+    latency = report["latency_ms"]
+    print(
+        f"✅ {report['requests']} requests, {report['rate']:.1f} req/s, "
+        f"{report['errors']} errors ({report['errors_per_sec']:.2f}/s)"
+    )
+    print(
+        f"   latency ms  p50 {latency['p50']:.2f}  p90 {latency['p90']:.2f}  p99 {latency['p99']:.2f}"
+        f"  p99.9 {latency['p99.9']:.2f}  max {latency['max']:.2f}"
+    )
+    if report["error_kinds"]:
+        print("   errors: " + ", ".join(f"{kind} {count}" for kind, count in sorted(report["error_kinds"].items())))
+    if args.json:
+        report["url"] = args.url
+        report["target_rate"] = args.rate
+        report["duration"] = args.duration
+        report["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
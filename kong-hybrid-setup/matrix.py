@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""Generate Control Plane / Data Plane values for many environments.
+
+Clusters usually differ only in a handful of settings. Instead of copying
+``values-cp.yaml`` / ``values-dp.yaml`` per cluster, list the environments in
+an inventory and let this script emit one pair of values files each.
+
+The templates from ``script_3.py`` and ``script_4.py`` are compiled once into
+literal and variable segments; rendering an environment is a single join, and
+environments are streamed to disk one at a time through the same incremental
+writer as ``generate.py`` (unchanged files are not rewritten).
+
+Inventory as CSV, with ``cp.`` / ``dp.`` column prefixes::
+
+    name,dp.replica_count,dp.min_replicas,dp.max_replicas,dp.cluster_control_plane
+    us-east-1,4,4,20,cp.us-east-1.internal:8005
+
+or as YAML (needs PyYAML)::
+
+    environments:
+      - name: us-east-1
+        cp: {replica_count: 3}
+        dp: {replica_count: 4, cluster_control_plane: "cp.us-east-1.internal:8005"}
+
+Missing fields, and empty CSV cells, keep the template default. Every other
+value is checked against its field (integers, ``true``/``false``, Kubernetes
+quantities such as ``500m`` or ``2Gi``, quoted host:port strings) and written
+as a YAML scalar, so an inventory value cannot add keys to the values file.
+Usage::
+
+    python kong-hybrid-setup/matrix.py environments.csv --output environments/
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+
+from generate import Manifest, ScriptLoader, Target, sync_target
+
+# Settings an environment may override, as regexes over the template lines.
+# Each named group becomes a variable segment of the compiled template.
+RESOURCES = (
+    r"^resources:\n  limits:\n    cpu: (?P<cpu_limit>.*)\n    memory: (?P<memory_limit>.*)\n"
+    r"  requests:\n    cpu: (?P<cpu_request>.*)\n    memory: (?P<memory_request>.*)$"
+)
+AUTOSCALING = (
+    r"^autoscaling:\n  enabled: (?P<autoscaling_enabled>.*)\n"
+    r"  minReplicas: (?P<min_replicas>.*)\n  maxReplicas: (?P<max_replicas>.*)$"
+)
+REPLICAS = r"^  replicaCount: (?P<replica_count>.*)$"
+CONTROL_PLANE = (
+    r'^  cluster_control_plane: "(?P<cluster_control_plane>.*)"\n'
+    r'  cluster_telemetry_endpoint: "(?P<cluster_telemetry_endpoint>.*)"$'
+)
+
+PLANES = {
+    "cp": ("script_3.py", "cp_values", "control-plane/values-cp.yaml", (REPLICAS, RESOURCES, AUTOSCALING)),
+    "dp": ("script_4.py", "dp_values", "data-plane/values-dp.yaml", (REPLICAS, CONTROL_PLANE, RESOURCES, AUTOSCALING)),
+}
+
+ENV_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+QUANTITY = re.compile(r"^[0-9]+(\.[0-9]+)?(m|[kMGTPE]i?|[eE][0-9]+)?$")
+
+
+def _integer(value):
+    text = str(value).strip()
+    if isinstance(value, bool) or not text.isdigit():
+        raise ValueError("expected a non-negative integer")
+    return str(int(text))
+
+
+def _boolean(value):
+    text = str(value).strip().lower()
+    if text not in ("true", "false"):
+        raise ValueError("expected true or false")
+    return text
+
+
+def _quantity(value):
+    text = str(value).strip()
+    if isinstance(value, bool) or not QUANTITY.match(text):
+        raise ValueError("expected a Kubernetes quantity such as 500m, 1 or 2Gi")
+    return text
+
+
+def _quoted(value):
+    # The template already has the quotes; JSON string escapes are valid in
+    # YAML double-quoted scalars, so quotes, backslashes and newlines stay inside
+    if isinstance(value, (bool, dict, list)):
+        raise ValueError("expected a string")
+    if any(ord(c) < 0x20 or ord(c) == 0x7F for c in str(value)):
+        raise ValueError("expected a single line without control characters")
+    return json.dumps(str(value).strip())[1:-1]
+
+
+# How each field's value is checked and written into the template
+FIELDS = {
+    "replica_count": _integer,
+    "min_replicas": _integer,
+    "max_replicas": _integer,
+    "autoscaling_enabled": _boolean,
+    "cpu_limit": _quantity,
+    "memory_limit": _quantity,
+    "cpu_request": _quantity,
+    "memory_request": _quantity,
+    "cluster_control_plane": _quoted,
+    "cluster_telemetry_endpoint": _quoted,
+}
+
+
+class CompiledTemplate:
+    """A values template split into literal and variable segments."""
+
+    def __init__(self, text, patterns):
+        spans = []
+        for pattern in patterns:
+            match = re.search(pattern, text, re.MULTILINE)
+            if match is None:
+                raise ValueError(f"template does not contain {pattern!r}")
+            for name in match.re.groupindex:
+                spans.append((match.start(name), match.end(name), name))
+        spans.sort()
+
+        self.defaults = {}
+        self.segments = []  # (literal, variable name or None)
+        position = 0
+        for start, end, name in spans:
+            self.segments.append((text[position:start], name))
+            self.defaults[name] = text[start:end]
+            position = end
+        self.segments.append((text[position:], None))
+
+    @property
+    def fields(self):
+        return frozenset(self.defaults)
+
+    def render(self, values):
+        """Render with ``values`` in place of the defaults; raises ``ValueError`` on an invalid value."""
+        unknown = set(values) - self.fields
+        if unknown:
+            raise ValueError(f"unknown fields {sorted(unknown)}")
+        scalars = {}
+        for name, value in values.items():
+            if value is None or not str(value).strip():
+                raise ValueError(f"{name}: empty value")
+            try:
+                scalars[name] = FIELDS[name](value)
+            except ValueError as e:
+                raise ValueError(f"{name}: {e}, got {value!r}") from None
+
+        parts = []
+        for literal, name in self.segments:
+            parts.append(literal)
+            if name is not None:
+                parts.append(scalars.get(name, self.defaults[name]))
+        return "".join(parts)
+
+
+def compile_templates(loader=None):
+    loader = loader or ScriptLoader()
+    return {
+        plane: CompiledTemplate(loader.namespace(script)[variable], patterns)
+        for plane, (script, variable, _, patterns) in PLANES.items()
+    }
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            environment = {"name": row.pop("name", None), "cp": {}, "dp": {}}
+            for column, value in row.items():
+                if column is None:
+                    raise ValueError(f"{path}:{reader.line_num}: more cells than header columns")
+                plane, _, field = column.partition(".")
+                if plane not in PLANES or not field:
+                    raise ValueError(f"{path}: unknown column {column!r} (expected cp.<field> or dp.<field>)")
+                if value:
+                    environment[plane][field] = value
+            yield environment
+
+
+def read_yaml(path):
+    try:
+        import yaml
+    except ImportError:
+        raise SystemExit("PyYAML is required for YAML inventories: pip install pyyaml")
+
+    with open(path, encoding="utf-8") as f:
+        document = yaml.safe_load(f) or []
+    if isinstance(document, dict):
+        document = document.get("environments", [])
+    for entry in document:
+        if not isinstance(entry, dict):
+            raise ValueError(f"{path}: environment entries must be mappings, got {entry!r}")
+        environment = {"name": entry.get("name"), "cp": entry.get("cp") or {}, "dp": entry.get("dp") or {}}
+        for plane in PLANES:
+            if not isinstance(environment[plane], dict):
+                raise ValueError(f"{path}: {environment['name']}: {plane} must be a mapping")
+        yield environment
+
+
+def read_inventory(path):
+    if path.endswith((".yaml", ".yml")):
+        return read_yaml(path)
+    return read_csv(path)
+
+
+def generate_matrix(inventory, output, templates=None, force=False, verbose=False):
+    """Render values files for each inventory entry. Returns ``(environments, changed)``."""
+    templates = templates or compile_templates()
+    manifest = Manifest(os.path.join(output, ".generator-manifest.json"))
+    seen = set()
+    changed = 0
+
+    try:
+        for environment in inventory:
+            name = environment["name"]
+            if not isinstance(name, str) or not ENV_NAME.match(name):
+                raise ValueError(f"invalid environment name: {name!r}")
+            if name in seen:
+                raise ValueError(f"duplicate environment: {name}")
+            seen.add(name)
+
+            # Render every plane before writing any, so a bad value leaves no partial environment
+            rendered = {}
+            for plane in PLANES:
+                try:
+                    rendered[plane] = templates[plane].render(environment[plane]).encode("utf-8")
+                except ValueError as e:
+                    raise ValueError(f"{name}: {plane}: {e}") from None
+
+            for plane, (script, variable, rel_path, _) in PLANES.items():
+                target = Target(f"{name}/{rel_path}", script, variable)
+                data = rendered[plane]
+                action = sync_target(output, target, data, manifest, force)
+                if action != "unchanged":
+                    changed += 1
+                if verbose or action != "unchanged":
+                    print(f"  {action:<9} {target.path}")
+    finally:
+        manifest.save()
+
+    return len(seen), changed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate CP/DP values files for every environment in an inventory")
+    parser.add_argument("inventory", help="environment inventory (.csv, .yaml or .yml)")
+    parser.add_argument("-o", "--output", default="environments", help="output directory (default: environments)")
+    parser.add_argument("--force", action="store_true", help="rewrite every file even if unchanged")
+    parser.add_argument("-v", "--verbose", action="store_true", help="list unchanged files too")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        count, changed = generate_matrix(read_inventory(args.inventory), args.output, force=args.force, verbose=args.verbose)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    print(f"✅ {count} environments, {changed} files changed, {elapsed_ms:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""Deterministic mock upstream for gateway benchmarks.
+
+httpbin answers in whatever time the pod or the internet happens to take, so
+gateway numbers measured through it mostly measure httpbin. This server
+answers every request with a configurable latency and body, drawn from
+seeded distributions so two runs see the same sequence:
+
+    python kong-hybrid-setup/mock_upstream.py --port 9000
+    python kong-hybrid-setup/mock_upstream.py --latency normal:20:5 --size 64k --body binary --chunked
+
+Distribution specs (latency in milliseconds, sizes in bytes with optional
+``k``/``m`` suffix)::
+
+    5                 fixed value
+    uniform:1:10      uniform between 1 and 10
+    normal:20:5       normal with mean 20 and standard deviation 5 (clipped at 0)
+    lognormal:20:0.5  log-normal with median 20 and sigma 0.5
+    exp:20            exponential with mean 20
+
+Any setting can be overridden per request with query arguments, e.g.
+``/anything?latency=uniform:0:50&size=1m&body=json&chunked=1&status=503``.
+``/health`` always answers 200 immediately, for Kubernetes probes. 204 and
+304 responses, and answers to HEAD, carry no body.
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import sys
+from urllib.parse import parse_qsl, urlsplit
+
+REASONS = {200: "OK", 201: "Created", 204: "No Content", 304: "Not Modified", 400: "Bad Request",
+           404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error", 502: "Bad Gateway",
+           503: "Service Unavailable", 504: "Gateway Timeout"}
+
+# Statuses whose responses never carry a body (RFC 9112, section 6.3)
+NO_BODY_STATUSES = {204, 304}
+
+# Fixed-width JSON records, so a body of any size is a slice plus padding
+ITEM = b'{"id":%8d,"name":"item-%08d","active":true},'
+MAX_BODY = 64 * 1024 * 1024
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {"k": 1024, "m": 1024 * 1024}.get(text[-1:], 1)
+    return float(text[:-1] if scale > 1 else text) * scale
+
+
+class Distribution:
+    """A value source parsed from a spec such as ``normal:20:5``."""
+
+    KINDS = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exp": 1}
+
+    def __init__(self, spec, parse=float):
+        self.spec = spec
+        kind, *params = spec.split(":") if ":" in spec else ("fixed", spec)
+        if kind not in self.KINDS or len(params) != self.KINDS[kind]:
+            raise ValueError(f"bad distribution {spec!r} (expected e.g. 5, uniform:1:10, normal:20:5, lognormal:20:0.5, exp:20)")
+        self.kind = kind
+        self.params = [parse(p) for p in params]
+
+    def sample(self, rng):
+        p = self.params
+        if self.kind == "fixed":
+            value = p[0]
+        elif self.kind == "uniform":
+            value = rng.uniform(p[0], p[1])
+        elif self.kind == "normal":
+            value = rng.gauss(p[0], p[1])
+        elif self.kind == "lognormal":
+            value = rng.lognormvariate(math.log(p[0]) if p[0] > 0 else 0, p[1])
+        else:
+            value = rng.expovariate(1 / p[0]) if p[0] > 0 else 0
+        return max(0.0, value)
+
+
+class Bodies:
+    """Response bodies of any size, sliced from prebuilt buffers."""
+
+    def __init__(self, rng):
+        self.binary = b""
+        self.items = b""
+        self.rng = rng
+
+    def _grow(self, size):
+        if len(self.binary) < size:
+            self.binary = self.rng.randbytes(max(size, 2 * len(self.binary), 4096))
+            count = len(self.binary) // len(ITEM % (0, 0)) + 1
+            self.items = b"".join(ITEM % (i, i) for i in range(count))
+
+    def get(self, kind, size):
+        size = min(int(size), MAX_BODY)
+        self._grow(size)
+        if kind == "binary":
+            return self.binary[:size]
+
+        # {"items":[...],"pad":"xxx"} of exactly `size` bytes when size allows
+        head, tail = b'{"items":[', b'],"pad":""}'
+        room = size - len(head) - len(tail)
+        if room < 0:
+            return b"{}".ljust(size, b" ") if size >= 2 else b"{}"
+        width = len(ITEM % (0, 0))
+        count = room // width
+        items = self.items[: count * width].rstrip(b",")
+        pad = size - len(head) - len(items) - len(tail)
+        return head + items + b'],"pad":"' + b"x" * pad + b'"}'
+
+
+class Settings:
+    """Response behaviour; the server defaults or one request's overrides."""
+
+    def __init__(self, latency="0", size="256", body="json", chunked=False, chunk_size=8192, status=200):
+        if body not in ("json", "binary"):
+            raise ValueError(f"body must be json or binary, not {body!r}")
+        self.latency = Distribution(latency)
+        self.size = Distribution(size, parse_size)
+        self.body = body
+        self.chunked = chunked
+        self.chunk_size = max(1, int(chunk_size))
+        self.status = int(status)
+        if not 200 <= self.status <= 599:
+            raise ValueError(f"status must be between 200 and 599, not {status!r}")
+
+    def override(self, query):
+        if not query:
+            return self
+        args = dict(parse_qsl(query))
+        return Settings(
+            latency=args.get("latency", self.latency.spec),
+            size=args.get("size", self.size.spec),
+            body=args.get("body", self.body),
+            chunked=args["chunked"] in ("1", "true", "yes") if "chunked" in args else self.chunked,
+            chunk_size=args.get("chunk_size", self.chunk_size),
+            status=args.get("status", self.status),
+        )
+
+
+class MockUpstream:
+    """Keep-alive HTTP/1.1 server answering with simulated latency and bodies."""
+
+    def __init__(self, settings=None, seed=0):
+        self.settings = settings or Settings()
+        self.rng = random.Random(seed)
+        self.bodies = Bodies(self.rng)
+        self.requests = 0
+
+    def _head(self, status, content_type, length=None):
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, 'Status')}"]
+        if status not in NO_BODY_STATUSES:
+            lines.append(f"Content-Type: {content_type}")
+            lines.append("Transfer-Encoding: chunked" if length is None else f"Content-Length: {length}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def respond(self, writer, target, method="GET"):
+        url = urlsplit(target)
+        if url.path == "/health":
+            writer.write(self._head(200, "text/plain", 2) + b"ok")
+            return
+
+        try:
+            settings = self.settings.override(url.query)
+        except ValueError as e:
+            message = str(e).encode("utf-8")
+            writer.write(self._head(400, "text/plain", len(message)) + message)
+            return
+
+        latency = settings.latency.sample(self.rng)
+        body = self.bodies.get(settings.body, settings.size.sample(self.rng))
+        content_type = "application/json" if settings.body == "json" else "application/octet-stream"
+        if latency:
+            await asyncio.sleep(latency / 1000)
+
+        if settings.status in NO_BODY_STATUSES:
+            writer.write(self._head(settings.status, content_type))
+            return
+        if method == "HEAD":
+            # The head a GET would get, without the body
+            writer.write(self._head(settings.status, content_type, None if settings.chunked else len(body)))
+            return
+        if not settings.chunked:
+            writer.write(self._head(settings.status, content_type, len(body)) + body)
+            return
+        writer.write(self._head(settings.status, content_type))
+        view = memoryview(body)
+        for offset in range(0, len(body), settings.chunk_size):
+            chunk = view[offset : offset + settings.chunk_size]
+            writer.write(b"%x\r\n" % len(chunk) + chunk + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                parts = lines[0].split(" ")
+                if len(parts) != 3:
+                    break
+                keep_alive = parts[2] == "HTTP/1.1"
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    name, value = name.strip().lower(), value.strip().lower()
+                    if name == "content-length":
+                        await reader.readexactly(int(value))
+                    elif name == "connection":
+                        keep_alive = value == "keep-alive"
+
+                self.requests += 1
+                await self.respond(writer, parts[1], parts[0])
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass  # client went away or sent garbage
+        finally:
+            writer.close()
+
+    async def start(self, port, host="0.0.0.0"):
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def serve(upstream, port, host):
+    server = await upstream.start(port, host)
+    s = upstream.settings
+    print(
+        f"🧪 mock upstream on {host}:{port}: latency {s.latency.spec} ms, size {s.size.spec}, "
+        f"{s.body} bodies{', chunked' if s.chunked else ''}, status {s.status}"
+    )
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mock HTTP upstream with configurable latency and body distributions")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("-p", "--port", type=int, default=9000, help="listen port (default: 9000)")
+    parser.add_argument("--latency", default="0", help="latency distribution in ms (default: 0)")
+    parser.add_argument("--size", default="256", help="body size distribution in bytes (default: 256)")
+    parser.add_argument("--body", choices=("json", "binary"), default="json", help="body type (default: json)")
+    parser.add_argument("--chunked", action="store_true", help="use chunked transfer encoding")
+    parser.add_argument("--chunk-size", type=int, default=8192, help="bytes per chunk (default: 8192)")
+    parser.add_argument("--status", type=int, default=200, help="response status (default: 200)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for latency, size and binary bodies (default: 0)")
+    args = parser.parse_args(argv)
+
+    try:
+        settings = Settings(args.latency, args.size, args.body, args.chunked, args.chunk_size, args.status)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    try:
+        asyncio.run(serve(MockUpstream(settings, args.seed), args.port, args.host))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""Run the setup.sh deployment steps concurrently, as a dependency graph.
+
+``scripts/setup.sh`` runs its steps one after another, although most of them
+only depend on a few others: the Control Plane needs PostgreSQL and the
+cluster certificates, the Data Plane needs the Control Plane, and namespaces,
+Helm charts, certificates and plugin ConfigMaps need little more than
+a working cluster. This script runs each step as ``setup.sh --step NAME`` as
+soon as the steps it needs have succeeded, streams their output prefixed
+with the step name, stops everything on the first failure, and ends with a
+timing table that marks the critical path::
+
+    python kong-hybrid-setup/orchestrate.py               # asks for confirmation
+    python kong-hybrid-setup/orchestrate.py --yes --jobs 3
+    python kong-hybrid-setup/orchestrate.py --dry-run     # show the plan only
+    python kong-hybrid-setup/orchestrate.py --target deploy_control_plane
+
+Run ``python kong-hybrid-setup/generate.py`` first so that
+``kong-hybrid-setup/scripts/setup.sh`` exists. With ``STEP_TRACE=FILE`` set,
+every step also appends its timing to FILE as a Chrome trace event (see
+``scripts/step-trace.sh``), one lane per step.
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SETUP_SCRIPT = os.path.join(HERE, "scripts", "setup.sh")
+
+# Seconds a cancelled step gets to exit after SIGTERM before it is killed
+TERMINATE_GRACE = 5.0
+
+
+class Step:
+    """A setup.sh function and the steps that must succeed before it runs."""
+
+    def __init__(self, name, needs=()):
+        self.name = name
+        self.needs = tuple(needs)
+
+
+# The real dependencies between the functions setup.sh's main() runs in order
+STEPS = (
+    Step("check_prerequisites"),
+    Step("setup_helm_repos", ["check_prerequisites"]),
+    Step("create_namespaces", ["check_prerequisites"]),
+    Step("generate_certificates", ["create_namespaces"]),
+    Step("create_custom_plugins", ["create_namespaces"]),
+    Step("deploy_postgresql", ["setup_helm_repos", "create_namespaces"]),
+    Step("deploy_control_plane", ["deploy_postgresql", "generate_certificates"]),
+    Step("run_migrations", ["deploy_control_plane"]),
+    Step("deploy_data_plane", ["run_migrations", "create_custom_plugins"]),
+    Step("verify_deployment", ["deploy_data_plane"]),
+)
+
+# Printed in the foreground once every step has succeeded
+FINAL_STEP = "show_access_info"
+
+
+class Graph:
+    """Steps checked for unknown dependencies and cycles, in topological order."""
+
+    def __init__(self, steps):
+        self.steps = {step.name: step for step in steps}
+        for step in steps:
+            for need in step.needs:
+                if need not in self.steps:
+                    raise ValueError(f"step {step.name} needs unknown step {need}")
+        self.order = self._toposort()
+
+    def _toposort(self):
+        order, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError("dependency cycle: " + " -> ".join(path + [name]))
+            state[name] = "visiting"
+            for need in self.steps[name].needs:
+                visit(need, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.steps:
+            visit(name, [])
+        return order
+
+    def subset(self, targets):
+        """The graph restricted to ``targets`` and everything they need."""
+        wanted, stack = set(), list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in self.steps:
+                raise ValueError(f"unknown step {name}")
+            if name not in wanted:
+                wanted.add(name)
+                stack.extend(self.steps[name].needs)
+        return Graph([self.steps[name] for name in self.order if name in wanted])
+
+    def levels(self):
+        """Steps grouped by the earliest wave they can run in."""
+        depth = {}
+        for name in self.order:
+            depth[name] = max((depth[need] + 1 for need in self.steps[name].needs), default=0)
+        levels = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for name in self.order:
+            levels[depth[name]].append(name)
+        return levels
+
+
+class StepResult:
+    """Outcome of one step: ok, failed, cancelled or skipped, with timings.
+
+    ``error`` describes why a step that could not run (or crashed) failed.
+    """
+
+    def __init__(self, name, status, start=None, end=None, returncode=None, error=None):
+        self.name = name
+        self.status = status
+        self.start = start
+        self.end = end
+        self.returncode = returncode
+        self.error = error
+
+    @property
+    def duration(self):
+        return self.end - self.start if self.start is not None and self.end is not None else None
+
+
+class Orchestrator:
+    """Runs a Graph with at most ``jobs`` steps at a time, failing fast."""
+
+    def __init__(self, graph, script=SETUP_SCRIPT, jobs=None, out=sys.stdout):
+        self.graph = graph
+        self.script = script
+        self.jobs = jobs or len(graph.order) or 1
+        self.out = out
+        self.width = max((len(name) for name in graph.order), default=0)
+        self.results = {}
+        self.started = None
+        # Steps still write trace events; the summary below replaces their tables
+        self.env = dict(os.environ, STEP_TRACE_QUIET="1")
+
+    def _now(self):
+        return time.monotonic() - self.started
+
+    def _print(self, name, line):
+        self.out.write(f"[{name:<{self.width}}] {line}\n")
+        self.out.flush()
+
+    async def _stop(self, process):
+        # Each step runs in its own session, so helm/kubectl children go too
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        try:
+            await asyncio.wait_for(process.wait(), TERMINATE_GRACE)
+        except asyncio.TimeoutError:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+
+    async def _run_step(self, name, slots):
+        async with slots:
+            start = self._now()
+            self._print(name, "▶ started")
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    "bash", self.script, "--step", name,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    start_new_session=True,
+                    env=self.env,
+                )
+            except OSError as e:
+                # e.g. bash not on PATH: the step failed, it was not skipped
+                self.results[name] = StepResult(name, "failed", start, self._now(), error=str(e))
+                self._print(name, f"✘ could not start: {e}")
+                return "failed"
+            try:
+                async for raw in process.stdout:
+                    self._print(name, raw.decode("utf-8", "replace").rstrip("\n"))
+                returncode = await process.wait()
+            except asyncio.CancelledError:
+                await self._stop(process)
+                self.results[name] = StepResult(name, "cancelled", start, self._now(), process.returncode)
+                self._print(name, "■ cancelled")
+                raise
+
+            status = "ok" if returncode == 0 else "failed"
+            self.results[name] = StepResult(name, status, start, self._now(), returncode)
+            end = self.results[name].end
+            self._print(name, f"{'✔' if status == 'ok' else '✘ exit ' + str(returncode)} after {end - start:.1f}s")
+            return status
+
+    async def run(self):
+        """Run every step; returns True when all of them succeeded."""
+        self.started = time.monotonic()
+        slots = asyncio.Semaphore(self.jobs)
+        steps = self.graph.steps
+        pending = list(self.graph.order)
+        running = {}
+        failed = False
+
+        while pending or running:
+            if not failed:
+                for name in list(pending):
+                    if all(self.results.get(need) and self.results[need].status == "ok" for need in steps[name].needs):
+                        pending.remove(name)
+                        running[asyncio.ensure_future(self._run_step(name, slots))] = name
+            if not running:
+                break
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = running.pop(task)
+                if not task.cancelled() and task.exception() and name not in self.results:
+                    error = task.exception()
+                    self.results[name] = StepResult(name, "failed", end=self._now(), error=f"{type(error).__name__}: {error}")
+                    self._print(name, f"✘ {self.results[name].error}")
+                if task.cancelled() or task.exception() or task.result() != "ok":
+                    failed = True
+
+            if failed and running:
+                # Fail fast: stop everything still in flight
+                for task in running:
+                    task.cancel()
+                await asyncio.gather(*running, return_exceptions=True)
+                running.clear()
+
+        for name in pending:
+            self.results[name] = StepResult(name, "skipped")
+        return not failed
+
+    def critical_path(self):
+        """Steps on the chain that determined the total run time."""
+        finished = [r for r in self.results.values() if r.end is not None]
+        if not finished:
+            return []
+        path = [max(finished, key=lambda r: r.end).name]
+        while True:
+            ran = [self.results[need] for need in self.graph.steps[path[-1]].needs if need in self.results]
+            ran = [r for r in ran if r.end is not None]
+            if not ran:
+                break
+            path.append(max(ran, key=lambda r: r.end).name)
+        return path[::-1]
+
+    def summary(self):
+        critical = set(self.critical_path())
+        lines = [f"{'step':<{self.width}}  {'status':<9} {'start':>8} {'duration':>9}"]
+        for name in self.graph.order:
+            r = self.results.get(name) or StepResult(name, "skipped")
+            start = f"{r.start:7.1f}s" if r.start is not None else "-"
+            duration = f"{r.duration:8.1f}s" if r.duration is not None else "-"
+            mark = "  ◀ critical path" if name in critical else ""
+            lines.append(f"{name:<{self.width}}  {r.status:<9} {start:>8} {duration:>9}{mark}")
+
+        ran = [r for r in self.results.values() if r.duration is not None]
+        if ran:
+            wall = max(r.end for r in ran)
+            serial = sum(r.duration for r in ran)
+            saved = f" ({100 * (1 - wall / serial):.0f}% saved)" if serial > 0 else ""
+            lines.append(f"wall {wall:.1f}s, serial {serial:.1f}s{saved}")
+            lines.append("critical path: " + " → ".join(self.critical_path()))
+        for name in self.graph.order:
+            r = self.results.get(name)
+            if r is not None and r.error:
+                lines.append(f"{name}: {r.error}")
+        return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the setup.sh deployment steps concurrently by dependency")
+    parser.add_argument("--script", default=SETUP_SCRIPT, help="setup script providing --step (default: scripts/setup.sh)")
+    parser.add_argument("-j", "--jobs", type=int, help="steps run at the same time (default: no limit)")
+    parser.add_argument("--target", action="append", default=[], metavar="STEP",
+                        help="only run STEP and the steps it needs (repeatable)")
+    parser.add_argument("-y", "--yes", action="store_true", help="do not ask for confirmation")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="print the execution plan and exit")
+    args = parser.parse_args(argv)
+    if args.jobs is not None and args.jobs <= 0:
+        parser.error("--jobs must be positive")
+
+    try:
+        graph = Graph(STEPS)
+        if args.target:
+            graph = graph.subset(args.target)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    if args.dry_run:
+        for wave, names in enumerate(graph.levels(), 1):
+            print(f"wave {wave}: " + ", ".join(names))
+        return 0
+
+    if not os.path.isfile(args.script):
+        print(f"❌ {args.script} not found (run python kong-hybrid-setup/generate.py first)", file=sys.stderr)
+        return 1
+
+    if not args.yes:
+        print("This will deploy Kong Control Plane, Data Plane, and PostgreSQL")
+        if input("Do you want to continue? (y/N): ").strip().lower() not in ("y", "yes"):
+            print("Deployment cancelled.")
+            return 0
+
+    orchestrator = Orchestrator(graph, args.script, args.jobs)
+    try:
+        ok = asyncio.run(orchestrator.run())
+    except KeyboardInterrupt:
+        return 130
+
+    print()
+    print(orchestrator.summary())
+    if not ok:
+        failed = [r.name for r in orchestrator.results.values() if r.status == "failed"]
+        print(f"❌ setup failed in {', '.join(failed) or 'a step'}", file=sys.stderr)
+        return 1
+    if not args.target:
+        subprocess.run(["bash", args.script, "--step", FINAL_STEP], check=False, env=orchestrator.env)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
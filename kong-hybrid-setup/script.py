@@ -1,7 +1,5 @@
-# Create directory structure and files for the complete Kong hybrid setup
-import os
+# Directory structure for the complete Kong hybrid setup
 
-# Create the directory structure
 dirs = [
     "kong-hybrid-setup",
     "kong-hybrid-setup/certificates",
@@ -15,11 +13,3 @@ dirs = [
     "kong-hybrid-setup/monitoring",
     "kong-hybrid-setup/examples"
 ]
-
-for dir_path in dirs:
-    os.makedirs(dir_path, exist_ok=True)
-    
-print("Directory structure created successfully!")
-print("\nCreated directories:")
-for dir_path in dirs:
-    print(f"  {dir_path}")
\ No newline at end of file
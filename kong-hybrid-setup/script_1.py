@@ -82,6 +82,8 @@ kong-hybrid-setup/
 │   └── api-version/                  # Sample custom plugin
 ├── database/                         # Database setup
 │   └── postgres-values.yaml         # PostgreSQL configuration
+├── charts/                           # Vendored Helm charts
+│   └── charts.lock                  # Pinned chart versions
 ├── scripts/                          # Automation scripts
 │   ├── setup.sh                      # Complete setup script
 │   ├── deploy-cp.sh                  # Deploy Control Plane
@@ -223,6 +225,122 @@ curl -s http://localhost:8001/clustering/data-planes
 3. Verify deployment status
 4. Test functionality
 
+### Offline Charts
+The scripts do not run `helm repo add` or `helm repo update`. Chart
+versions are pinned in `charts/charts.lock` (`kong/kong` 2.38.0 and
+`bitnami/postgresql` 12.12.10 from Bitnami's OCI registry). The first run
+fetches each pin once with `helm pull` and stores the archive in
+`charts/sha256/`, named by its SHA-256 and listed in `charts/index`.
+Later runs deploy from the verified archives without network access, and
+nothing is fetched again until you ask for it:
+
+```bash
+./scripts/helm-charts.sh list                # pins and their cached archives
+./scripts/helm-charts.sh vendor              # fetch pins not cached yet, e.g. after editing charts.lock
+./scripts/helm-charts.sh refresh             # fetch every pin again
+./scripts/helm-charts.sh refresh --latest    # move each pin to the newest chart version
+CHARTS_OFFLINE=1 ./scripts/setup.sh          # fail instead of fetching a missing chart
+```
+
+The cache is ignored by git; copy `charts/` to deploy from machines without
+internet access.
+
+### No-op Redeploys
+`setup.sh`, `deploy-cp.sh` and `deploy-dp.sh` render each chart locally
+(`helm template` with the same values) and hash the manifest together
+with the chart version. The hash is stored in the release description
+(`helm history kong-cp -n kong`). When the last revision was deployed with
+the same hash, `helm upgrade` is skipped, so re-running the scripts
+without changes takes seconds. A changed values file, a new chart version
+or a failed last revision upgrades as usual. Set `FORCE=1` to upgrade
+anyway, e.g. to roll pods after changing a Secret the chart only
+references:
+
+```bash
+FORCE=1 ./scripts/deploy-dp.sh
+```
+
+### Readiness Waiting
+The scripts do not use `helm --wait` or a fixed `kubectl wait` timeout.
+After each upgrade, `wait_for_release` runs `wait_ready.py`, which
+watches the Deployments, StatefulSets, pods and pod events of exactly
+that release (`app.kubernetes.io/instance=kong-cp`, so the Control Plane
+step no longer waits on Data Plane pods) and returns as soon as the
+rollout is complete. It prints when each pod became Ready and how long
+scheduling and image pulls took, retries API errors with capped backoff,
+and fails early when a Deployment exceeds its progress deadline.
+`WAIT_TIMEOUT` sets the limit in seconds (default 600).
+
+```bash
+python wait_ready.py kong-dp --namespace kong          # through kubectl proxy
+python wait_ready.py postgres -n postgres --json       # machine-readable report
+
+# Try it without a cluster: a simulated API server rolling out kong-cp
+python fake_apiserver.py --port 8001 --error-rate 0.2 &
+python wait_ready.py kong-cp -n kong --api-server http://127.0.0.1:8001
+```
+
+Because upgrades no longer wait, a release is recorded as deployed even
+if its rollout then fails; fix the cause and re-run with `FORCE=1`.
+Without `python3`, `wait_for_release` falls back to `kubectl rollout
+status` for each workload of the release.
+
+### Parallel Setup
+`orchestrate.py` runs the steps of `scripts/setup.sh` as a dependency
+graph instead of one after another: Helm charts, namespaces,
+certificates and plugin ConfigMaps are set up side by side, PostgreSQL is
+deployed as soon as its chart is vendored, and only the Control
+Plane, migrations and Data Plane stay sequential. The first failing step
+stops all others, and a closing table shows each step's start, duration
+and the critical path.
+
+```bash
+python orchestrate.py --dry-run          # show which steps run together
+python orchestrate.py --yes              # deploy
+python orchestrate.py --yes --target deploy_control_plane
+```
+
+Each step runs as `scripts/setup.sh --step NAME`, which can also be used
+directly to repeat one step.
+
+### Bring-up Timings
+With `STEP_TRACE` set, `scripts/setup.sh`, `deploy-cp.sh` and
+`deploy-dp.sh` (and `orchestrate.py`, which runs `setup.sh`) record the
+start, duration and exit status of every step. Each step is appended to
+the file as a Chrome trace event, and each script prints a timing table
+when it exits:
+
+```bash
+STEP_TRACE=trace.json ./scripts/setup.sh
+./scripts/step-trace.sh summary trace.json                 # table from a trace
+./scripts/step-trace.sh summary trace.json previous.json   # compare with an earlier run
+```
+
+Open `trace.json` in `chrome://tracing` or https://ui.perfetto.dev to
+see whether `helm --wait`, image pulls or migrations dominate. Use one file
+per run; a second run appended to the same file is summed into the same
+rows.
+
+### Load Testing
+`loadgen.py` sends requests at a constant rate over pooled keep-alive
+connections and reports p50/p99/p99.9 latency and errors per second.
+Latency is measured from when each request was due, so a slow gateway
+cannot hide behind a lower request rate.
+
+```bash
+kubectl port-forward -n kong svc/kong-dp-kong-proxy 8000:80
+python loadgen.py http://localhost:8000/httpbin/get --rate 500 --duration 30 --json through-kong.json
+
+# Baseline without the gateway: serve a mock upstream and hit it directly
+python loadgen.py http://127.0.0.1:9000/ --upstream 9000 --rate 500 --duration 30 --json direct.json
+```
+
+`mock_upstream.py` answers with seeded, configurable latency and body
+distributions (`--latency normal:20:5 --size 64k --body binary --chunked`,
+or per request: `/mock/anything?latency=uniform:0:50&size=1m`), so results
+are not dominated by httpbin. `examples/service-and-route.yaml` deploys it
+behind the `/mock` route.
+
 ## Support
 
 ### Kong Community
@@ -237,9 +355,3 @@ For issues with this setup, please create an issue in this repository.
 
 This project is licensed under the Apache 2.0 License - see the LICENSE file for details.
 """
-
-# Write README.md
-with open("kong-hybrid-setup/README.md", "w") as f:
-    f.write(readme_content)
-
-print("README.md created successfully!")
\ No newline at end of file
@@ -96,6 +96,104 @@ spec:
   preserve_host: false
   regex_priority: 0
 ---
+# Alternative backend: deterministic mock upstream for benchmarks
+# (latency and body size are fixed by the args below and can be
+# overridden per request, e.g. /mock/anything?latency=uniform:0:50&size=64k).
+# Create its script ConfigMap first:
+#   kubectl create configmap mock-upstream -n example --from-file=kong-hybrid-setup/mock_upstream.py
+apiVersion: apps/v1
+kind: Deployment
+metadata:
+  name: mock-upstream
+  namespace: example
+  labels:
+    app: mock-upstream
+spec:
+  replicas: 2
+  selector:
+    matchLabels:
+      app: mock-upstream
+  template:
+    metadata:
+      labels:
+        app: mock-upstream
+    spec:
+      containers:
+      - name: mock-upstream
+        image: python:3.12-slim
+        command: ["python", "/app/mock_upstream.py"]
+        args: ["--port", "9000", "--latency", "5", "--size", "1k"]
+        ports:
+        - containerPort: 9000
+        readinessProbe:
+          httpGet:
+            path: /health
+            port: 9000
+        volumeMounts:
+        - name: script
+          mountPath: /app
+        resources:
+          requests:
+            cpu: 100m
+            memory: 64Mi
+          limits:
+            cpu: 500m
+            memory: 256Mi
+      volumes:
+      - name: script
+        configMap:
+          name: mock-upstream
+---
+apiVersion: v1
+kind: Service
+metadata:
+  name: mock-upstream
+  namespace: example
+  labels:
+    app: mock-upstream
+spec:
+  selector:
+    app: mock-upstream
+  ports:
+  - port: 80
+    targetPort: 9000
+    protocol: TCP
+  type: ClusterIP
+---
+apiVersion: configuration.konghq.com/v1
+kind: KongService
+metadata:
+  name: mock-upstream-service
+  namespace: kong
+  annotations:
+    kubernetes.io/ingress.class: kong
+spec:
+  protocol: http
+  host: mock-upstream.example.svc.cluster.local
+  port: 80
+  path: /
+  connect_timeout: 60000
+  write_timeout: 60000
+  read_timeout: 60000
+  retries: 0
+---
+apiVersion: configuration.konghq.com/v1
+kind: KongRoute
+metadata:
+  name: mock-upstream-route
+  namespace: kong
+  annotations:
+    kubernetes.io/ingress.class: kong
+spec:
+  service_name: mock-upstream-service
+  protocols:
+  - http
+  - https
+  paths:
+  - /mock
+  strip_path: true
+  preserve_host: false
+---
 # Alternative: Using standard Kubernetes Ingress
 apiVersion: networking.k8s.io/v1
 kind: Ingress
@@ -365,14 +463,3 @@ stringData:
 # Add this annotation to your ingress:
 # konghq.com/plugins: key-auth-example,api-version-example
 """
-
-# Write example files
-with open("kong-hybrid-setup/examples/service-and-route.yaml", "w") as f:
-    f.write(service_route_example)
-
-with open("kong-hybrid-setup/examples/plugin-examples.yaml", "w") as f:
-    f.write(plugin_examples)
-
-print("Example configuration files created:")
-print("- service-and-route.yaml: Example service and route setup") 
-print("- plugin-examples.yaml: Various Kong plugin configurations")
\ No newline at end of file
@@ -258,8 +258,7 @@ The included API Version plugin demonstrates custom plugin development:
 ```bash
 # Create ConfigMap for the plugin
 kubectl create configmap kong-plugin-api-version \\
-    --from-file=handler.lua=custom-plugins/api-version/kong/plugins/api-version/handler.lua \\
-    --from-file=schema.lua=custom-plugins/api-version/kong/plugins/api-version/schema.lua \\
+    --from-file=custom-plugins/api-version/kong/plugins/api-version/ \\
     -n kong
 ```
 
@@ -268,7 +267,15 @@ kubectl create configmap kong-plugin-api-version \\
 custom-plugins/api-version/
 ├── kong/plugins/api-version/
 │   ├── handler.lua      # Plugin logic and execution phases  
+│   ├── body_cache.lua   # Shared-dict cache of rewritten JSON bodies
+│   ├── clock.lua        # Cached timestamps for headers and body metadata
+│   ├── log_queue.lua    # Batched log sink used by the log phase
+│   ├── log_sampler.lua  # Sampling and rate limiting of log lines
+│   ├── negotiate.lua    # Version negotiation from header, path or query
+│   ├── phase_timer.lua  # Opt-in per-phase latency histograms
+│   ├── status_api.lua   # GET /api-version/phases and /stats on the status listener
 │   └── schema.lua       # Configuration schema
+├── spec/api-version/   # Pongo unit tests
 ├── README.md           # Plugin documentation
 └── *.rockspec         # LuaRocks package specification
 ```
@@ -699,16 +706,3 @@ kubectl delete namespace kong postgres
 
 This deployment guide provides everything needed for a production-ready Kong OSS hybrid mode setup on Kubernetes with custom plugin support.
 """
-
-with open("kong-hybrid-setup/DEPLOYMENT_GUIDE.md", "w") as f:
-    f.write(deployment_guide)
-
-print("Comprehensive deployment guide created!")
-print("File: DEPLOYMENT_GUIDE.md")
-print("This guide includes:")
-print("- Complete architecture overview") 
-print("- Step-by-step setup instructions")
-print("- Custom plugin development guide")
-print("- Production considerations")
-print("- Monitoring and troubleshooting")
-print("- Performance tuning recommendations")
\ No newline at end of file
@@ -23,11 +23,22 @@ kong-hybrid-setup/
 ├── database/                            # Database setup
 │   └── postgres-values.yaml            # PostgreSQL configuration
 │
+├── charts/                              # Vendored Helm charts
+│   └── charts.lock                     # Pinned chart versions
+│
 ├── custom-plugins/                      # Custom plugin development
 │   └── api-version/                     # Sample custom plugin
 │       ├── kong/plugins/api-version/
 │       │   ├── handler.lua              # Plugin logic
+│       │   ├── body_cache.lua           # Shared cache of body rewrites
+│       │   ├── clock.lua                # Cached timestamps
+│       │   ├── log_queue.lua            # Batched log sink
+│       │   ├── log_sampler.lua          # Log sampling
+│       │   ├── negotiate.lua            # Version negotiation
+│       │   ├── phase_timer.lua          # Per-phase latency histograms
+│       │   ├── status_api.lua           # Status API endpoints
 │       │   └── schema.lua               # Configuration schema
+│       ├── spec/api-version/            # Pongo unit tests
 │       ├── README.md                    # Plugin documentation
 │       └── kong-plugin-api-version-*.rockspec # LuaRocks spec
 │
@@ -35,7 +46,10 @@ kong-hybrid-setup/
 │   ├── setup.sh                        # Complete automated setup
 │   ├── deploy-cp.sh                    # Deploy Control Plane only
 │   ├── deploy-dp.sh                    # Deploy Data Plane only
-│   └── cleanup.sh                      # Clean up all resources
+│   ├── cleanup.sh                      # Clean up all resources
+│   ├── step-trace.sh                   # Step timing traces (STEP_TRACE)
+│   ├── helm-release.sh                 # Skip unchanged Helm releases
+│   └── helm-charts.sh                  # Vendored chart cache
 │
 ├── monitoring/                         # Monitoring and observability
 │   ├── prometheus-values.yaml          # Prometheus configuration
@@ -174,39 +188,58 @@ After deployment:
 This setup provides a complete, production-ready Kong OSS deployment that you can run locally and scale to production environments.
 """
 
-print(summary_content)
-
 # Also create a project tree view
+import json
 import os
 
-def create_tree(startpath, prefix=""):
-    """Create a tree view of the directory structure"""
-    items = []
-    if os.path.exists(startpath):
-        entries = sorted(os.listdir(startpath))
-        for i, entry in enumerate(entries):
-            if entry.startswith('.'):
-                continue
-            path = os.path.join(startpath, entry)
-            is_last = i == len(entries) - 1
-            current_prefix = "└── " if is_last else "├── "
-            items.append(f"{prefix}{current_prefix}{entry}")
-            if os.path.isdir(path):
-                next_prefix = prefix + ("    " if is_last else "│   ")
-                items.extend(create_tree(path, next_prefix))
-    return items
-
-print("\n" + "="*60)
-print("COMPLETE PROJECT STRUCTURE:")
-print("="*60)
-tree_lines = create_tree("kong-hybrid-setup")
-for line in tree_lines:
-    print(line)
-
-print("\n" + "="*60)  
-print("PROJECT CREATED SUCCESSFULLY!")
-print("="*60)
-print("\n🎉 Your Kong OSS Hybrid Mode setup is ready!")
-print("📁 Location: kong-hybrid-setup/")
-print("📖 Start with: cat kong-hybrid-setup/README.md")
-print("🚀 Deploy with: ./kong-hybrid-setup/scripts/setup.sh")
\ No newline at end of file
+def _scan_directory(path, index=None):
+    """Return sorted (name, is_dir) pairs for path, skipping hidden entries.
+
+    With an index dict, a directory whose mtime has not changed since it was
+    last scanned is served from the index instead of being listed again.
+    """
+    st = os.stat(path)
+    if index is not None:
+        cached = index.get(path)
+        if cached is not None and cached["mtime_ns"] == st.st_mtime_ns:
+            return cached["entries"]
+
+    with os.scandir(path) as it:
+        entries = sorted(
+            (entry.name, entry.is_dir())
+            for entry in it
+            if not entry.name.startswith('.')
+        )
+
+    if index is not None:
+        index[path] = {"mtime_ns": st.st_mtime_ns, "entries": entries}
+    return entries
+
+def create_tree(startpath, prefix="", index=None):
+    """Yield the lines of a tree view of the directory structure"""
+    if not os.path.isdir(startpath):
+        return
+    entries = _scan_directory(startpath, index)
+    for i, (entry, is_dir) in enumerate(entries):
+        is_last = i == len(entries) - 1
+        current_prefix = "└── " if is_last else "├── "
+        yield f"{prefix}{current_prefix}{entry}"
+        if is_dir:
+            next_prefix = prefix + ("    " if is_last else "│   ")
+            yield from create_tree(os.path.join(startpath, entry), next_prefix, index)
+
+def load_tree_index(path):
+    """Load a directory index persisted by save_tree_index (empty if missing)"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {key: {"mtime_ns": value["mtime_ns"], "entries": [tuple(e) for e in value["entries"]]}
+            for key, value in index.items()}
+
+def save_tree_index(path, index):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, path)
@@ -67,13 +67,3 @@ echo "kubectl create secret tls kong-cluster-cert --cert=${CERT_DIR}/cluster.crt
 echo "kubectl create secret tls kong-admin-cert --cert=${CERT_DIR}/admin.crt --key=${CERT_DIR}/admin.key -n kong"
 echo "kubectl create secret tls kong-proxy-cert --cert=${CERT_DIR}/proxy.crt --key=${CERT_DIR}/proxy.key -n kong"
 """
-
-with open("kong-hybrid-setup/certificates/generate-certs.sh", "w") as f:
-    f.write(cert_script)
-
-# Make it executable
-import stat
-os.chmod("kong-hybrid-setup/certificates/generate-certs.sh", 
-         stat.S_IRWXU | stat.S_IRGRP | stat.S_IROTH)
-
-print("Certificate generation script created!")
\ No newline at end of file
@@ -304,8 +304,3 @@ waitImage:
   tag: latest
   pullPolicy: IfNotPresent
 """
-
-with open("kong-hybrid-setup/control-plane/values-cp.yaml", "w") as f:
-    f.write(cp_values)
-
-print("Control Plane Helm values created!")
\ No newline at end of file
@@ -54,6 +54,14 @@ env:
   
   # Status API for health checks
   status_listen: "0.0.0.0:8100"
+
+  # Per-phase latency histograms for custom plugins (opt-in, served on the
+  # status listener, e.g. /api-version/phases)
+  # nginx_http_lua_shared_dict: "plugin_phase_latency 1m"
+  # That setting holds one directive; with the api-version body cache
+  # (config.body_cache) as well, declare its dict in an included file holding
+  # "lua_shared_dict api_version_body_cache 64m;" (e.g. from a ConfigMap):
+  # nginx_http_include: "/etc/kong/nginx-include/body-cache.conf"
   
   # Plugin configuration (must match Control Plane)
   plugins: "bundled,api-version,custom-auth,request-logger"
@@ -324,8 +332,3 @@ extraContainers: []
 #   image: fluent/fluent-bit:latest
 #   # Configure log shipping
 """
-
-with open("kong-hybrid-setup/data-plane/values-dp.yaml", "w") as f:
-    f.write(dp_values)
-
-print("Data Plane Helm values created!")
\ No newline at end of file
@@ -220,8 +220,3 @@ commonLabels:
   app.kubernetes.io/component: database
   app.kubernetes.io/part-of: kong
 """
-
-with open("kong-hybrid-setup/database/postgres-values.yaml", "w") as f:
-    f.write(postgres_values)
-
-print("PostgreSQL Helm values created!")
\ No newline at end of file
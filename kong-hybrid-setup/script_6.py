@@ -2,6 +2,13 @@
 handler_lua = '''-- handler.lua - API Version Plugin Handler
 -- This plugin adds API version information to responses
 
+local body_cache = require "kong.plugins.api-version.body_cache"
+local clock = require "kong.plugins.api-version.clock"
+local log_queue = require "kong.plugins.api-version.log_queue"
+local log_sampler = require "kong.plugins.api-version.log_sampler"
+local negotiate = require "kong.plugins.api-version.negotiate"
+local phase_timer = require "kong.plugins.api-version.phase_timer"
+
 local kong = kong
 local ngx = ngx
 local plugin = {
@@ -22,76 +29,1290 @@ function plugin:access(plugin_conf)
   
   -- Add custom header to identify the plugin is working
   kong.service.request.set_header("X-Kong-Plugin", "api-version")
+
+  -- Resolve the version the client asked for and route to it
+  local version = plugin_conf.version
+  if plugin_conf.version_sources and #plugin_conf.version_sources > 0 then
+    local resolved, requested = negotiate.apply(plugin_conf)
+    if resolved then
+      kong.ctx.plugin.version = resolved
+      version = resolved
+    elseif resolved == false and plugin_conf.reject_unknown_version then
+      return kong.response.exit(400, { message = "Unsupported API version: " .. requested })
+    end
+  end
   
   -- Log the API version being used
-  if plugin_conf.log_version then
-    kong.log.info("API Version: ", plugin_conf.version)
+  if plugin_conf.log_version and log_sampler.sample(plugin_conf, "log_version") then
+    kong.log.info("API Version: ", version)
+  end
+end
+
+-- Bytes of whitespace we are willing to hold back while looking for the
+-- first member of the top-level JSON object in streaming mode
+local MAX_HELD_BYTES = 4096
+
+local OPEN_BRACE = string.byte("{")
+local CLOSE_BRACE = string.byte("}")
+
+local find = string.find
+local byte = string.byte
+local sub = string.sub
+local match = string.match
+local gsub = string.gsub
+local lower = string.lower
+
+-- Statuses that never carry a body
+local NO_BODY_STATUS = { [204] = true, [304] = true }
+
+local function build_meta(plugin_conf)
+  return {
+    api_version = kong.ctx.plugin.version or plugin_conf.version,
+    plugin_version = plugin.VERSION,
+    timestamp = clock.iso8601(plugin_conf.timestamp_precision)
+  }
+end
+
+-- Splice the "_meta" member right after the opening brace of a top-level
+-- JSON object, without decoding the body. Leading bytes are held back only
+-- until the first non-whitespace character after "{" has been seen, so
+-- memory stays bounded by the chunk size. Returns the bytes to emit now.
+local function splice_meta(state, chunk, member)
+  local buf = state.held and (state.held .. chunk) or chunk
+  state.held = nil
+
+  local open = find(buf, "[^ \\t\\r\\n]")
+  if open and byte(buf, open) ~= OPEN_BRACE then
+    -- Not a JSON object (array, scalar or garbage): leave it alone
+    state.done = true
+    return buf
+  end
+
+  local first = open and find(buf, "[^ \\t\\r\\n]", open + 1)
+  if not first then
+    if #buf > MAX_HELD_BYTES then
+      state.done = true
+      return buf
+    end
+    state.held = buf
+    return ""
+  end
+
+  state.done = true
+  local separator = byte(buf, first) == CLOSE_BRACE and "" or ","
+  return sub(buf, 1, open) .. member .. separator .. sub(buf, open + 1)
+end
+
+-- A cached body is a compact encoded object: put "_meta" first
+local function with_meta(encoded, plugin_conf)
+  local member = '"_meta":' .. kong.json.encode(build_meta(plugin_conf))
+  return "{" .. member .. (encoded == "{}" and "" or ",") .. sub(encoded, 2)
+end
+
+-- Response plans (headers to set, body rewrite rules) compiled per plugin
+-- configuration. Kong hands the same conf
+-- table to every request until the configuration changes, so the table
+-- itself is the cache key; weak keys let old configurations be collected.
+local header_plans = setmetatable({}, { __mode = "k" })
+
+-- Which responses modify_body applies to: exact media types go into a set,
+-- entries with "*" become anchored Lua patterns
+local function compile_body_plan(plugin_conf)
+  local media_types, patterns = {}, {}
+  for _, media_type in ipairs(plugin_conf.body_content_types or { "application/json" }) do
+    media_type = lower(media_type)
+    if find(media_type, "*", 1, true) then
+      local pattern = gsub(media_type, "[%^%$%(%)%%%.%[%]%+%-%?]", "%%%0")
+      patterns[#patterns + 1] = "^" .. gsub(pattern, "%*", ".*") .. "$"
+    else
+      media_types[media_type] = true
+    end
+  end
+
+  local statuses
+  if plugin_conf.body_status_codes then
+    statuses = {}
+    for _, status in ipairs(plugin_conf.body_status_codes) do
+      statuses[status] = true
+    end
+  end
+
+  return {
+    media_types = media_types,
+    patterns = patterns,
+    statuses = statuses,
+    max_size = plugin_conf.max_body_size,
+    mode = plugin_conf.body_mode,
+    max_buffered_size = plugin_conf.max_buffered_body_size,
+    cache = plugin_conf.body_cache and plugin_conf.body_mode == "buffered" and body_cache.enabled(),
+    -- Cached rewrites are not shared between plugin instances
+    cache_scope = plugin_conf.__plugin_id or plugin_conf.__key__ or tostring(plugin_conf),
+  }
+end
+
+local function media_type_matches(body, content_type)
+  local media_type = content_type and match(content_type, "^%s*([^;%s]+)")
+  if not media_type then
+    return false
+  end
+  media_type = lower(media_type)
+  if body.media_types[media_type] then
+    return true
+  end
+  local patterns = body.patterns
+  for i = 1, #patterns do
+    if find(media_type, patterns[i]) then
+      return true
+    end
+  end
+  return false
+end
+
+-- Decide once per request whether (and how) the body will be rewritten.
+-- Returns "buffered", "streaming" or nil.
+local function body_rewrite_mode(body)
+  -- Responses to HEAD have no body either (RFC 9110, section 9.3.2)
+  if kong.request.get_method() == "HEAD" then
+    return nil
+  end
+  local status = kong.response.get_status()
+  if NO_BODY_STATUS[status] or (body.statuses and not body.statuses[status]) then
+    return nil
+  end
+  if not media_type_matches(body, kong.response.get_header("Content-Type")) then
+    return nil
+  end
+
+  local length = tonumber(kong.response.get_header("Content-Length"))
+  if length and body.max_size and length > body.max_size then
+    return nil
+  end
+
+  if body.mode == "buffered" and (not length or length > body.max_buffered_size) then
+    -- Bodies that are too large, or of unknown size, are streamed instead
+    return "streaming"
   end
+  return body.mode
+end
+
+local function compile_header_plan(plugin_conf)
+  local names, values = {}, {}
+  local function add(name, value)
+    names[#names + 1] = name
+    values[#values + 1] = value
+  end
+
+  add(plugin_conf.custom_header_name or "X-API-Version",
+      (plugin_conf.header_prefix or "") .. plugin_conf.version)
+  add("X-Plugin-Version", plugin.VERSION)
+  if plugin_conf.add_server_header then
+    add("X-Server", "Kong-Gateway")
+  end
+
+  return {
+    names = names,
+    values = values,
+    n = #names,
+    version_prefix = plugin_conf.header_prefix or "",
+    add_timestamp = plugin_conf.add_timestamp,
+    timestamp_precision = plugin_conf.timestamp_precision,
+    body = plugin_conf.modify_body and compile_body_plan(plugin_conf) or nil,
+  }
+end
+
+local function get_header_plan(plugin_conf)
+  local plan = header_plans[plugin_conf]
+  if not plan then
+    plan = compile_header_plan(plugin_conf)
+    header_plans[plugin_conf] = plan
+  end
+  return plan
 end
 
 -- Header filter phase - modify response headers
 function plugin:header_filter(plugin_conf)
-  -- Add API version to response headers
-  kong.response.set_header("X-API-Version", plugin_conf.version)
-  kong.response.set_header("X-Plugin-Version", plugin.VERSION)
-  
-  -- Add custom headers based on configuration
-  if plugin_conf.add_server_header then
-    kong.response.set_header("X-Server", "Kong-Gateway")
+  -- Add the precomputed version headers; the version header reflects a
+  -- negotiated version when access resolved one
+  local plan = get_header_plan(plugin_conf)
+  local set_header = kong.response.set_header
+  local names, values = plan.names, plan.values
+  local version = kong.ctx.plugin.version
+  set_header(names[1], version and plan.version_prefix .. version or values[1])
+  for i = 2, plan.n do
+    set_header(names[i], values[i])
   end
-  
-  if plugin_conf.add_timestamp then
-    kong.response.set_header("X-Response-Time", tostring(ngx.now()))
+
+  if plan.add_timestamp then
+    set_header("X-Response-Time", clock.epoch(plan.timestamp_precision))
+  end
+
+  -- body_filter only does work when this decided the body is rewritten
+  if plan.body then
+    local mode = body_rewrite_mode(plan.body)
+    if mode then
+      local ctx = kong.ctx.plugin
+      if mode == "buffered" and plan.body.cache then
+        local key = body_cache.key(version or plugin_conf.version, plan.body.cache_scope)
+        if key then
+          ctx.cached_body = body_cache.get(key)
+          if ctx.cached_body then
+            mode = "cached"
+          else
+            ctx.cache_key = key
+          end
+        end
+      end
+      ctx.body_mode = mode
+      kong.response.clear_header("Content-Length")
+    end
   end
 end
 
 -- Body filter phase - modify response body (optional)
 function plugin:body_filter(plugin_conf)
-  -- Only process if we need to modify the response body
-  if not plugin_conf.modify_body then
+  local ctx = kong.ctx.plugin
+  local mode = ctx.body_mode
+  if not mode then
     return
   end
-  
+
+  if mode == "streaming" then
+    local state = ctx.splice
+    if not state then
+      state = {}
+      ctx.splice = state
+      ctx.meta_member = '"_meta":' .. kong.json.encode(build_meta(plugin_conf))
+    end
+    if state.done then
+      return
+    end
+
+    local out = splice_meta(state, ngx.arg[1] or "", ctx.meta_member)
+    if ngx.arg[2] and state.held then
+      -- Body ended while we were still holding bytes back
+      out = state.held
+      state.held = nil
+    end
+    ngx.arg[1] = out
+    return
+  end
+
+  if mode == "cached" then
+    -- The rewrite of this upstream body is known: drop the upstream chunks
+    -- and emit the cached rewrite at the end
+    ngx.arg[1] = ngx.arg[2] and with_meta(ctx.cached_body, plugin_conf) or ""
+    return
+  end
+
   local body = kong.response.get_raw_body()
   if body then
     -- Add version info to JSON responses
-    local content_type = kong.response.get_header("content-type")
-    if content_type and string.find(content_type, "application/json") then
-      local json_body = kong.json.decode(body)
-      if json_body then
-        json_body._meta = {
-          api_version = plugin_conf.version,
-          plugin_version = plugin.VERSION,
-          timestamp = os.date("!%Y-%m-%dT%H:%M:%SZ")
-        }
-        local new_body = kong.json.encode(json_body)
-        kong.response.set_raw_body(new_body)
+    local json_body = kong.json.decode(body)
+    if json_body and ctx.cache_key then
+      json_body._meta = nil
+      local encoded = kong.json.encode(json_body)
+      if encoded and byte(encoded, 1) == OPEN_BRACE then
+        body_cache.set(ctx.cache_key, encoded, plugin_conf.body_cache_ttl, plugin_conf.body_cache_max_entry_size)
+        kong.response.set_raw_body(with_meta(encoded, plugin_conf))
+        return
       end
     end
+    if json_body then
+      json_body._meta = build_meta(plugin_conf)
+      local new_body = kong.json.encode(json_body)
+      kong.response.set_raw_body(new_body)
+    end
   end
 end
 
 -- Log phase - for logging and analytics
 function plugin:log(plugin_conf)
-  -- Custom logging logic
-  if plugin_conf.enable_logging then
-    kong.log.info("API Version Plugin executed for version: ", plugin_conf.version)
-    
-    -- Log request details
-    local log_data = {
-      version = plugin_conf.version,
+  -- Queue request details; a timer writes them out in batches
+  if plugin_conf.enable_logging and log_sampler.sample(plugin_conf, "enable_logging") then
+    log_queue.get(plugin_conf):push({
+      time = ngx.now(),
+      version = kong.ctx.plugin.version or plugin_conf.version,
       method = kong.request.get_method(),
       path = kong.request.get_path(),
       status = kong.response.get_status(),
       latency = kong.ctx.shared.response_latency or 0
+    })
+  end
+end
+
+-- Return our plugin object; phases are timed when plugin_phase_latency is declared
+return phase_timer.wrap(plugin, "api-version")
+'''
+
+body_cache_lua = '''-- body_cache.lua - Shared cache of rewritten JSON bodies for api-version
+-- Buffered modify_body decodes and re-encodes every response. When the
+-- upstream marks its responses with an ETag or Last-Modified, the
+-- re-encoded body is stored in the api_version_body_cache shared dict so
+-- the next response with the same validator skips the JSON round trip.
+-- Entries are stored without _meta, which carries a per-request timestamp;
+-- the handler splices it in when serving a hit. The dict's own LRU
+-- eviction bounds memory; entries also expire after body_cache_ttl.
+
+local kong = kong
+local ngx = ngx
+local concat = table.concat
+
+local DICT_NAME = "api_version_body_cache"
+
+local _M = {}
+
+-- Per-worker counters, see _M.stats()
+local counters = { hits = 0, misses = 0, stores = 0, evictions = 0, oversized = 0, failed = 0 }
+
+local dict, checked
+
+-- The shared dict, or nil (logged once per worker) when it is not declared
+local function get_dict()
+  if not checked then
+    checked = true
+    dict = ngx.shared[DICT_NAME]
+    if not dict then
+      kong.log.warn("body_cache is enabled but lua_shared_dict ", DICT_NAME,
+                    " is not declared; rewritten bodies are not cached")
+    end
+  end
+  return dict
+end
+
+function _M.enabled()
+  return get_dict() ~= nil
+end
+
+-- Cache key for the current response under one plugin configuration
+-- (scope), or nil when the upstream gave no validator to key on or sent
+-- Vary. ETags identify one representation of one resource, so the path is
+-- part of the key as well as the route and the request method, and so is
+-- Content-Encoding: a weak ETag may be shared by the gzip and identity
+-- variants. With Vary the representation depends on request headers the
+-- key does not cover.
+function _M.key(version, scope)
+  if kong.response.get_header("Vary") then
+    return nil
+  end
+  local validator = kong.response.get_header("ETag")
+  if not validator then
+    local last_modified = kong.response.get_header("Last-Modified")
+    if not last_modified then
+      return nil
+    end
+    validator = "lm:" .. last_modified
+  end
+  local route = kong.router.get_route()
+  return concat({
+    version,
+    scope,
+    route and route.id or "",
+    kong.request.get_method(),
+    kong.response.get_status(),
+    kong.request.get_path_with_query(),
+    kong.response.get_header("Content-Encoding") or "",
+    validator,
+  }, "|")
+end
+
+function _M.get(key)
+  local body = get_dict():get(key)
+  if body then
+    counters.hits = counters.hits + 1
+  else
+    counters.misses = counters.misses + 1
+  end
+  return body
+end
+
+function _M.set(key, body, ttl, max_size)
+  if #body > max_size then
+    counters.oversized = counters.oversized + 1
+    return
+  end
+  local ok, err, forcible = get_dict():set(key, body, ttl)
+  if not ok then
+    counters.failed = counters.failed + 1
+    kong.log.warn("failed to cache rewritten body: ", err)
+    return
+  end
+  counters.stores = counters.stores + 1
+  if forcible then
+    -- Least recently used entries were evicted to make room
+    counters.evictions = counters.evictions + 1
+  end
+end
+
+-- Per-worker cache counters
+function _M.stats()
+  local stats = {}
+  for name, value in pairs(counters) do
+    stats[name] = value
+  end
+  return stats
+end
+
+return _M
+'''
+
+clock_lua = '''-- clock.lua - Cached coarse timestamps for the api-version plugin
+-- Formatting a timestamp (os.date, string.format) on every request is
+-- wasted work when the value only changes once per second, or once per
+-- ngx.update_time tick at millisecond precision. Each worker keeps the
+-- last formatted strings and rebuilds them only when the clock moved on.
+
+local ngx = ngx
+local floor = math.floor
+local min = math.min
+local fmt = string.format
+local sub = string.sub
+local os_date = os.date
+
+local _M = {}
+
+local iso_sec_key, iso_sec
+local iso_ms_key, iso_ms
+local epoch_sec_key, epoch_sec
+local epoch_ms_key, epoch_ms
+
+local function iso_seconds(sec)
+  if sec ~= iso_sec_key then
+    iso_sec = os_date("!%Y-%m-%dT%H:%M:%SZ", sec)
+    iso_sec_key = sec
+  end
+  return iso_sec
+end
+
+-- ISO 8601 UTC timestamp, e.g. 2024-05-01T12:00:00Z or, with
+-- "millisecond" precision, 2024-05-01T12:00:00.123Z
+function _M.iso8601(precision)
+  local now = ngx.now()
+  local sec = floor(now)
+  if precision ~= "millisecond" then
+    return iso_seconds(sec)
+  end
+
+  if now ~= iso_ms_key then
+    local ms = min(999, floor((now - sec) * 1000 + 0.5))
+    iso_ms = sub(iso_seconds(sec), 1, -2) .. fmt(".%03dZ", ms)
+    iso_ms_key = now
+  end
+  return iso_ms
+end
+
+-- Seconds since the epoch as a string, e.g. 1714564800 or 1714564800.123
+function _M.epoch(precision)
+  local now = ngx.now()
+  if precision ~= "millisecond" then
+    local sec = floor(now)
+    if sec ~= epoch_sec_key then
+      epoch_sec = fmt("%d", sec)
+      epoch_sec_key = sec
+    end
+    return epoch_sec
+  end
+
+  if now ~= epoch_ms_key then
+    epoch_ms = fmt("%.3f", now)
+    epoch_ms_key = now
+  end
+  return epoch_ms
+end
+
+return _M
+'''
+
+log_queue_lua = '''-- log_queue.lua - Batched log sink for the api-version plugin
+-- The log phase only pushes a small record into a per-worker ring buffer;
+-- a timer encodes queued records as one JSON batch and hands it to the
+-- configured sink, so request workers never wait on log I/O. A queue lives
+-- as long as its plugin configuration: after a reload the old one is
+-- collected with the old configuration and its flush timer stops.
+
+local cjson = require "cjson.safe"
+
+local kong = kong
+local ngx = ngx
+local min = math.min
+
+local _M = {}
+
+-- One queue per plugin configuration in this worker
+local queues = setmetatable({}, { __mode = "k" })
+
+-- Queues holding unflushed records, kept alive until they are written out
+local pending = {}
+
+local sinks = {}
+
+function sinks.error_log(_, payload)
+  kong.log.info("api-version log batch: ", payload)
+  return true
+end
+
+function sinks.file(address, payload)
+  local f, err = io.open(address.path, "a")
+  if not f then
+    return nil, err
+  end
+  local ok, write_err = f:write(payload, "\\n")
+  f:close()
+  return ok, write_err
+end
+
+function sinks.udp(address, payload)
+  local sock = ngx.socket.udp()
+  local ok, err = sock:setpeername(address.host, address.port)
+  if not ok then
+    return nil, err
+  end
+  ok, err = sock:send(payload)
+  sock:close()
+  return ok, err
+end
+
+function sinks.http(address, payload)
+  local httpc = require("resty.http").new()
+  local res, err = httpc:request_uri(address.url, {
+    method = "POST",
+    body = payload,
+    headers = { ["Content-Type"] = "application/json" },
+    keepalive_timeout = 60000,
+  })
+  if not res then
+    return nil, err
+  end
+  if res.status >= 300 then
+    return nil, "unexpected status " .. res.status
+  end
+  return true
+end
+
+local function parse_address(sink, address)
+  if sink == "file" then
+    return { path = address }
+  elseif sink == "udp" then
+    local host, port = string.match(address or "", "^(.+):(%d+)$")
+    return { host = host, port = tonumber(port) }
+  elseif sink == "http" then
+    return { url = address }
+  end
+  return {}
+end
+
+local Queue = {}
+Queue.__index = Queue
+
+local function new_queue(conf)
+  return setmetatable({
+    name = conf.__plugin_id or conf.__key__ or tostring(conf),
+    sink = conf.log_sink,
+    send = sinks[conf.log_sink],
+    address = parse_address(conf.log_sink, conf.log_sink_address),
+    capacity = conf.log_queue_size,
+    batch_size = conf.log_batch_size,
+    interval = conf.log_flush_interval,
+    items = {},
+    head = 1,
+    count = 0,
+    ticking = false,
+    flush_scheduled = false,
+    -- counters, see _M.stats()
+    queued = 0,
+    dropped = 0,
+    flushed = 0,
+    failed = 0,
+  }, Queue)
+end
+
+-- Add a record; returns false (and counts a drop) when the buffer is full
+function Queue:push(record)
+  if self.count >= self.capacity then
+    self.dropped = self.dropped + 1
+    return false
+  end
+
+  local slot = (self.head + self.count - 1) % self.capacity + 1
+  self.items[slot] = record
+  self.count = self.count + 1
+  self.queued = self.queued + 1
+  pending[self] = true
+
+  if not self.ticking then
+    self:schedule()
+  end
+
+  -- Don't wait for the next tick once a full batch is ready
+  if self.count >= self.batch_size and not self.flush_scheduled then
+    self.flush_scheduled = true
+    local ok, err = ngx.timer.at(0, function() self:flush() end)
+    if not ok then
+      self.flush_scheduled = false
+      kong.log.err("api-version: failed to schedule log flush: ", err)
+    end
+  end
+  return true
+end
+
+-- Remove up to n records from the head of the buffer
+function Queue:take(n)
+  local batch = {}
+  local items, capacity, head = self.items, self.capacity, self.head
+  for i = 1, n do
+    batch[i] = items[head]
+    items[head] = nil
+    head = head % capacity + 1
+  end
+  self.head = head
+  self.count = self.count - n
+  return batch
+end
+
+function Queue:flush()
+  self.flush_scheduled = false
+  while self.count > 0 do
+    -- Take the batch before sending: the send may yield and let
+    -- requests push more records in the meantime
+    local batch = self:take(min(self.count, self.batch_size))
+    local payload, err = cjson.encode(batch)
+    local ok
+    if payload then
+      ok, err = self.send(self.address, payload)
+    end
+
+    if ok then
+      self.flushed = self.flushed + #batch
+    else
+      self.failed = self.failed + #batch
+      kong.log.warn("api-version: failed to flush ", #batch, " log records to ", self.sink, ": ", err)
+    end
+  end
+  pending[self] = nil
+end
+
+-- The timer only holds a weak reference, so it does not keep a retired
+-- queue alive; it stops once the queue has been collected
+local function flush_timer(premature, ref)
+  local queue = ref.queue
+  if not queue then
+    return
+  end
+  -- premature means the worker is exiting: still flush what is left
+  queue:flush()
+  if premature then
+    queue.ticking = false
+    return
+  end
+  queue:schedule(ref)
+end
+
+function Queue:schedule(ref)
+  ref = ref or setmetatable({ queue = self }, { __mode = "v" })
+  local ok, err = ngx.timer.at(self.interval, flush_timer, ref)
+  -- on failure the next push tries again
+  self.ticking = ok and true or false
+  if not ok then
+    kong.log.err("api-version: failed to start log flush timer: ", err)
+  end
+end
+
+-- Get (or create) the queue for a plugin configuration
+function _M.get(conf)
+  local queue = queues[conf]
+  if not queue then
+    queue = new_queue(conf)
+    queues[conf] = queue
+  end
+  return queue
+end
+
+-- Per-worker counters for every queue
+function _M.stats()
+  local stats = {}
+  for _, queue in pairs(queues) do
+    stats[queue.name] = {
+      sink = queue.sink,
+      pending = queue.count,
+      queued = queue.queued,
+      dropped = queue.dropped,
+      flushed = queue.flushed,
+      failed = queue.failed,
     }
-    
-    kong.log.info("Request processed: ", kong.json.encode(log_data))
   end
+  return stats
 end
 
--- Return our plugin object
-return plugin
+return _M
+'''
+
+log_sampler_lua = '''-- log_sampler.lua - Sampling for api-version log lines
+-- Decides per request whether the log_version line and the enable_logging
+-- record are emitted, so logging cost can be capped under load. Each worker
+-- counts how many lines it let through and how many it suppressed.
+
+local kong = kong
+local ngx = ngx
+local random = math.random
+local min = math.min
+local max = math.max
+
+local _M = {}
+
+-- Per-worker counters, by log path ("log_version" or "enable_logging")
+local counters = {}
+
+-- Rate limiter state per plugin configuration, then per route and path
+local limiters = setmetatable({}, { __mode = "k" })
+
+local function count(path, allowed)
+  local c = counters[path]
+  if not c then
+    c = { emitted = 0, suppressed = 0 }
+    counters[path] = c
+  end
+  if allowed then
+    c.emitted = c.emitted + 1
+  else
+    c.suppressed = c.suppressed + 1
+  end
+  return allowed
+end
+
+local function limiter_state(conf, path)
+  local by_key = limiters[conf]
+  if not by_key then
+    by_key = {}
+    limiters[conf] = by_key
+  end
+
+  local route = kong.router.get_route()
+  local key = (route and route.id or "*") .. "|" .. path
+  local state = by_key[key]
+  if not state then
+    state = {}
+    by_key[key] = state
+  end
+  return state
+end
+
+local deciders = {}
+
+function deciders.ratio(conf)
+  return random() < conf.log_sample_ratio
+end
+
+-- Refill at log_sample_rate tokens per second, holding at most one
+-- second's worth (but never less than one token, so rates below one line
+-- per second still let a line through every 1/rate seconds), and spend
+-- one token per line
+function deciders.token_bucket(conf, path)
+  local state = limiter_state(conf, path)
+  local now = ngx.now()
+  local rate = conf.log_sample_rate
+  local capacity = max(rate, 1)
+  local tokens = capacity
+  if state.last then
+    tokens = min(capacity, state.tokens + (now - state.last) * rate)
+  end
+  state.last = now
+
+  if tokens >= 1 then
+    state.tokens = tokens - 1
+    return true
+  end
+  state.tokens = tokens
+  return false
+end
+
+-- Let the first log_sample_limit lines of every log_sample_interval through
+function deciders.first_n(conf, path)
+  local state = limiter_state(conf, path)
+  local now = ngx.now()
+  if not state.window or now - state.window >= conf.log_sample_interval then
+    state.window = now
+    state.count = 0
+  end
+  state.count = state.count + 1
+  return state.count <= conf.log_sample_limit
+end
+
+-- Should this request's line on the given path be logged?
+function _M.sample(conf, path)
+  local decide = deciders[conf.log_sampling]
+  if not decide then
+    return count(path, true)
+  end
+  return count(path, decide(conf, path))
+end
+
+-- Per-worker counters of emitted and suppressed lines
+function _M.stats()
+  local stats = {}
+  for path, c in pairs(counters) do
+    stats[path] = { emitted = c.emitted, suppressed = c.suppressed }
+  end
+  return stats
+end
+
+return _M
+'''
+
+negotiate_lua = '''-- negotiate.lua - Request-driven version resolution for api-version
+-- Resolves the version a request asks for from the sources listed in
+-- version_sources (a version header, a /v2/ path segment, a query
+-- argument), tried in order, and rewrites the upstream path to match.
+-- Paths are those Kong computed for the upstream, after the route's
+-- strip_path and the service's path, so rewrites compose with both.
+-- Matchers are compiled once per plugin configuration; mapping a raw
+-- requested value to a supported version goes through a per-worker LRU
+-- cache, so steady traffic costs one lookup per request.
+
+local lrucache = require "resty.lrucache"
+
+local kong = kong
+local var = ngx.var
+local type = type
+local tonumber = tonumber
+local floor = math.floor
+local find = string.find
+local match = string.match
+local sub = string.sub
+local gsub = string.gsub
+
+local CACHE_SIZE = 1000
+
+local _M = {}
+
+-- Per-worker counters, see _M.stats()
+local counters = { hits = 0, misses = 0, unresolved = 0 }
+
+-- Compiled matchers per plugin configuration
+local plans = setmetatable({}, { __mode = "k" })
+
+-- "v2.1" -> { 2, 1 }; nil unless every component is a whole number
+local function parse_version(value)
+  value = gsub(value, "^[vV]", "")
+  local parts = {}
+  for part in value:gmatch("[^.]+") do
+    local n = tonumber(part)
+    if not n or n < 0 or n ~= floor(n) then
+      return nil
+    end
+    parts[#parts + 1] = n
+  end
+  if #parts == 0 then
+    return nil
+  end
+  return parts
+end
+
+local function newer(a, b)
+  for i = 1, math.max(#a.parts, #b.parts) do
+    local x, y = a.parts[i] or 0, b.parts[i] or 0
+    if x ~= y then
+      return x > y
+    end
+  end
+  return false
+end
+
+-- Map a requested value to a version string, or false. With a list of
+-- supported versions, "2" or "v2" picks the newest 2.x.y; without one any
+-- well-formed version is accepted as written (minus a leading "v").
+local function resolve_value(plan, raw)
+  local parts = parse_version(raw)
+  if not parts then
+    return false
+  end
+  local supported = plan.supported
+  if not supported then
+    return (gsub(raw, "^[vV]", ""))
+  end
+  for _, candidate in ipairs(supported) do -- newest first
+    local ok = true
+    for i = 1, #parts do
+      if candidate.parts[i] ~= parts[i] then
+        ok = false
+        break
+      end
+    end
+    if ok then
+      return candidate.version
+    end
+  end
+  return false
+end
+
+-- Sources return the raw requested value and, for the path source, the
+-- path with the version segment removed
+local function header_source(name)
+  return function()
+    local value = kong.request.get_header(name)
+    if type(value) == "table" then
+      value = value[1]
+    end
+    if value then
+      -- "2, 1" -> "2": the first listed version wins
+      return match(value, "^%s*([^,%s]+)")
+    end
+  end
+end
+
+local function query_source(name)
+  return function()
+    local value = kong.request.get_query_arg(name)
+    if type(value) == "string" and value ~= "" then
+      return value
+    end
+  end
+end
+
+-- The first /vN segment of the upstream path, past the service's own path
+local function path_source()
+  local path = var.upstream_uri
+  local init = 1
+  local service = kong.router.get_service()
+  local base = service and service.path and gsub(service.path, "/$", "")
+  if base and base ~= "" and sub(path, 1, #base + 1) == base .. "/" then
+    init = #base + 1
+  end
+  while true do
+    local first, last = find(path, "/[vV]%d[%d.]*", init)
+    if not first then
+      return nil
+    end
+    local after = sub(path, last + 1, last + 1)
+    if after == "" or after == "/" then -- "/v2beta" style segments are not versions
+      local rest = sub(path, 1, first - 1) .. sub(path, last + 1)
+      return sub(path, first + 1, last), rest ~= "" and rest or "/"
+    end
+    init = last + 1
+  end
+end
+
+local function compile(conf)
+  local sources = {}
+  for i, source in ipairs(conf.version_sources or {}) do
+    if source == "header" then
+      sources[i] = header_source(conf.version_header or "Accept-Version")
+    elseif source == "query" then
+      sources[i] = query_source(conf.version_query_param or "version")
+    else
+      sources[i] = path_source
+    end
+  end
+
+  local supported
+  if conf.supported_versions and #conf.supported_versions > 0 then
+    supported = {}
+    for i, version in ipairs(conf.supported_versions) do -- validated by the schema
+      supported[i] = { version = gsub(version, "^[vV]", ""), parts = parse_version(version) }
+    end
+    table.sort(supported, newer)
+  end
+
+  local cache, err = lrucache.new(CACHE_SIZE)
+  if not cache then
+    error("failed to create version cache: " .. tostring(err))
+  end
+
+  return {
+    sources = sources,
+    n = #sources,
+    supported = supported,
+    cache = cache,
+    path_prefix = conf.upstream_path_prefix,
+    strip_prefix = conf.strip_version_prefix,
+    prefixes = {}, -- expanded upstream_path_prefix per version
+  }
+end
+
+local function get_plan(conf)
+  local plan = plans[conf]
+  if not plan then
+    plan = compile(conf)
+    plans[conf] = plan
+  end
+  return plan
+end
+
+local function expand_prefix(plan, version)
+  local prefix = plan.prefixes[version]
+  if not prefix then
+    local major = match(version, "^(%d+)") or version
+    prefix = gsub(gsub(plan.path_prefix, "%${version}", version), "%${major}", major)
+    prefix = gsub(prefix, "/$", "")
+    plan.prefixes[version] = prefix
+  end
+  return prefix
+end
+
+-- Resolve the request's version and rewrite the upstream path: drop the
+-- version segment it came from (strip_version_prefix) and/or put the
+-- expanded upstream_path_prefix in front of it. Returns the
+-- version; nil when no source carried one; or false and the raw value when
+-- the requested version is not supported.
+function _M.apply(conf)
+  local plan = get_plan(conf)
+
+  local raw, rest
+  for i = 1, plan.n do
+    raw, rest = plan.sources[i]()
+    if raw then
+      break
+    end
+  end
+  if not raw then
+    return nil
+  end
+
+  local cache = plan.cache
+  local version = cache:get(raw)
+  if version == nil then
+    counters.misses = counters.misses + 1
+    version = resolve_value(plan, raw)
+    cache:set(raw, version)
+  else
+    counters.hits = counters.hits + 1
+  end
+  if not version then
+    counters.unresolved = counters.unresolved + 1
+    return false, raw
+  end
+
+  if plan.path_prefix then
+    kong.service.request.set_path(expand_prefix(plan, version) .. (rest or var.upstream_uri))
+  elseif rest and plan.strip_prefix then
+    kong.service.request.set_path(rest)
+  end
+  return version
+end
+
+-- Per-worker cache hit/miss counters
+function _M.stats()
+  return { hits = counters.hits, misses = counters.misses, unresolved = counters.unresolved }
+end
+
+return _M
+'''
+
+phase_timer_lua = '''-- phase_timer.lua - Opt-in per-phase latency histograms for Kong plugins
+-- (rendered by kong-hybrid-setup/generate.py from script_6.py into each
+-- plugin that uses it; edit it there)
+--
+-- wrap() replaces the handler's access, header_filter, body_filter and log
+-- methods with versions that time each call on a monotonic clock. Each
+-- worker counts observations into fixed buckets in a local table and adds
+-- them to a shared dict once a second, so requests never take the dict
+-- lock. body_filter is timed per chunk.
+--
+-- Enabled only when the dict is declared, e.g. with
+-- KONG_NGINX_HTTP_LUA_SHARED_DICT="plugin_phase_latency 1m";
+-- otherwise wrap() returns the handler untouched.
+
+local ffi = require "ffi"
+
+local ngx = ngx
+local pairs = pairs
+local fmt = string.format
+local concat = table.concat
+
+local DICT_NAME = "plugin_phase_latency"
+local METRIC = "kong_plugin_phase_duration_ms"
+local PHASES = { "access", "header_filter", "body_filter", "log" }
+local FLUSH_INTERVAL = 1
+
+-- Bucket upper bounds in milliseconds; the last bucket is +Inf
+local BUCKETS = { 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100 }
+local N_BUCKETS = #BUCKETS
+
+local dict = ngx.shared[DICT_NAME]
+
+local _M = {}
+
+-- Monotonic milliseconds. ngx.now() is cached per event loop iteration and
+-- would read most phases as 0 ms; fall back to it (after update_time) only
+-- if clock_gettime cannot be declared.
+local now_ms
+do
+  -- Fails harmlessly when another plugin's copy already declared these
+  pcall(ffi.cdef, [[
+    typedef struct { long tv_sec; long tv_nsec; } phase_timer_timespec_t;
+    int clock_gettime(int clk_id, phase_timer_timespec_t *tp);
+  ]])
+  local ok, ts = pcall(ffi.new, "phase_timer_timespec_t")
+  if ok and pcall(ffi.C.clock_gettime, 1, ts) then
+    local clock_gettime = ffi.C.clock_gettime
+    local CLOCK_MONOTONIC = 1
+    now_ms = function()
+      clock_gettime(CLOCK_MONOTONIC, ts)
+      return tonumber(ts.tv_sec) * 1000 + tonumber(ts.tv_nsec) / 1e6
+    end
+  else
+    now_ms = function()
+      ngx.update_time()
+      return ngx.now() * 1000
+    end
+  end
+end
+_M.now_ms = now_ms
+
+-- Observations not yet added to the dict, by dict key
+local pending = {}
+local timer_started = false
+
+local function flush(premature)
+  if premature then
+    return
+  end
+  local batch = pending
+  pending = {}
+  for key, value in pairs(batch) do
+    local _, err = dict:incr(key, value, 0)
+    if err then
+      kong.log.warn("phase_timer: failed to update ", key, ": ", err)
+    end
+  end
+end
+
+-- Dict keys for one plugin phase: "<plugin>|<phase>|<bucket>" and "...|sum"
+local function phase_keys(plugin, phase)
+  local keys = {}
+  for i = 1, N_BUCKETS + 1 do
+    keys[i] = plugin .. "|" .. phase .. "|" .. i
+  end
+  keys.sum = plugin .. "|" .. phase .. "|sum"
+  return keys
+end
+
+local function record(keys, elapsed)
+  local i = 1
+  while i <= N_BUCKETS and elapsed > BUCKETS[i] do
+    i = i + 1
+  end
+  local key = keys[i]
+  pending[key] = (pending[key] or 0) + 1
+  pending[keys.sum] = (pending[keys.sum] or 0) + elapsed
+
+  if not timer_started then
+    timer_started = true
+    local ok, err = ngx.timer.every(FLUSH_INTERVAL, flush)
+    if not ok then
+      kong.log.err("phase_timer: failed to start flush timer: ", err)
+    end
+  end
+end
+
+-- Record a phase's duration and pass its results through
+local function finish(keys, started, ...)
+  record(keys, now_ms() - started)
+  return ...
+end
+
+function _M.enabled()
+  return dict ~= nil
+end
+
+-- Time the handler's phases under the given plugin name
+function _M.wrap(handler, plugin)
+  if not dict then
+    return handler
+  end
+
+  for _, phase in ipairs(PHASES) do
+    local fn = handler[phase]
+    if fn then
+      local keys = phase_keys(plugin, phase)
+      handler[phase] = function(self, conf)
+        local started = now_ms()
+        return finish(keys, started, fn(self, conf))
+      end
+    end
+  end
+  return handler
+end
+
+-- Prometheus histograms for one plugin, or for every plugin in the dict
+function _M.prometheus(plugin)
+  local lines = {
+    "# HELP " .. METRIC .. " Time spent in each plugin phase",
+    "# TYPE " .. METRIC .. " histogram",
+  }
+  if not dict then
+    return concat(lines, "\\n") .. "\\n"
+  end
+
+  local series, names = {}, {}
+  for _, key in ipairs(dict:get_keys(0)) do
+    local name, phase, slot = key:match("^(.+)|([%w_]+)|(%w+)$")
+    if name and (not plugin or name == plugin) then
+      local id = name .. "|" .. phase
+      local s = series[id]
+      if not s then
+        s = { plugin = name, phase = phase, counts = {}, sum = 0 }
+        series[id] = s
+        names[#names + 1] = id
+      end
+      local value = dict:get(key) or 0
+      if slot == "sum" then
+        s.sum = value
+      else
+        s.counts[tonumber(slot)] = value
+      end
+    end
+  end
+  table.sort(names)
+
+  for _, id in ipairs(names) do
+    local s = series[id]
+    local labels = fmt('plugin="%s",phase="%s"', s.plugin, s.phase)
+    local cumulative = 0
+    for i = 1, N_BUCKETS + 1 do
+      cumulative = cumulative + (s.counts[i] or 0)
+      local le = BUCKETS[i] and fmt("%g", BUCKETS[i]) or "+Inf"
+      lines[#lines + 1] = fmt('%s_bucket{%s,le="%s"} %d', METRIC, labels, le, cumulative)
+    end
+    lines[#lines + 1] = fmt("%s_sum{%s} %.3f", METRIC, labels, s.sum)
+    lines[#lines + 1] = fmt("%s_count{%s} %d", METRIC, labels, cumulative)
+  end
+  return concat(lines, "\\n") .. "\\n"
+end
+
+return _M
+'''
+
+status_api_lua = '''-- status_api.lua - api-version endpoints on the status listener
+-- (KONG_STATUS_LISTEN). GET /api-version/phases returns the per-phase
+-- latency histograms from phase_timer in Prometheus text format;
+-- GET /api-version/stats returns this worker's version cache, body cache
+-- and logging counters as JSON.
+
+local body_cache = require "kong.plugins.api-version.body_cache"
+local log_queue = require "kong.plugins.api-version.log_queue"
+local log_sampler = require "kong.plugins.api-version.log_sampler"
+local negotiate = require "kong.plugins.api-version.negotiate"
+local phase_timer = require "kong.plugins.api-version.phase_timer"
+
+return {
+  ["/api-version/phases"] = {
+    GET = function()
+      return kong.response.exit(200, phase_timer.prometheus("api-version"), {
+        ["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8",
+      })
+    end,
+  },
+  ["/api-version/stats"] = {
+    GET = function()
+      return kong.response.exit(200, {
+        worker = ngx.worker.id(),
+        version_cache = negotiate.stats(),
+        body_cache = body_cache.stats(),
+        log_sampler = log_sampler.stats(),
+        log_queue = log_queue.stats(),
+      })
+    end,
+  },
+}
 '''
 
 schema_lua = '''-- schema.lua - API Version Plugin Schema
@@ -99,6 +1320,15 @@ schema_lua = '''-- schema.lua - API Version Plugin Schema
 
 local typedefs = require "kong.db.schema.typedefs"
 
+-- "2", "v2.1", "2.1.0": dot-separated whole numbers, optionally after a v
+local function validate_version(value)
+  local digits = value:gsub("^[vV]", "")
+  if digits:match("^%d+$") or (digits:match("^%d[%d.]*%d$") and not digits:find("..", 1, true)) then
+    return true
+  end
+  return nil, "invalid version '" .. value .. "', expected e.g. 2, v2.1 or 2.1.0"
+end
+
 return {
   name = "api-version",
   fields = {
@@ -126,6 +1356,13 @@ return {
               description = "Add X-Response-Time header to responses"
             }
           },
+          { timestamp_precision = { 
+              type = "string",
+              default = "second",
+              one_of = { "second", "millisecond" },
+              description = "Precision of X-Response-Time and _meta.timestamp"
+            }
+          },
           { modify_body = { 
               type = "boolean", 
               default = false,
@@ -155,23 +1392,242 @@ return {
               default = "v",
               description = "Prefix for version in headers"
             }
+          },
+          { body_mode = { 
+              type = "string",
+              default = "buffered",
+              one_of = { "buffered", "streaming" },
+              description = "How modify_body rewrites JSON: decode and re-encode the buffered body, or splice _meta into the stream"
+            }
+          },
+          { max_buffered_body_size = { 
+              type = "integer",
+              default = 1048576,
+              gt = 0,
+              description = "Largest Content-Length (bytes) rewritten in buffered mode; larger or unsized bodies are streamed"
+            }
+          },
+          { body_content_types = { 
+              type = "array",
+              elements = { type = "string" },
+              default = { "application/json" },
+              description = "Media types whose bodies modify_body rewrites; * matches any characters (e.g. application/*+json)"
+            }
+          },
+          { body_status_codes = { 
+              type = "array",
+              elements = { type = "integer", between = { 100, 599 } },
+              description = "Only rewrite bodies of responses with these status codes (default: any status)"
+            }
+          },
+          { max_body_size = { 
+              type = "integer",
+              gt = 0,
+              description = "Never rewrite responses whose Content-Length exceeds this many bytes (default: no limit)"
+            }
+          },
+          { log_sink = { 
+              type = "string",
+              default = "error_log",
+              one_of = { "error_log", "file", "udp", "http" },
+              description = "Where batches of enable_logging records are written"
+            }
+          },
+          { log_sink_address = { 
+              type = "string",
+              description = "File path (file), host:port (udp) or URL (http) of the log sink"
+            }
+          },
+          { log_batch_size = { 
+              type = "integer",
+              default = 100,
+              gt = 0,
+              description = "Maximum number of records encoded into one batch"
+            }
+          },
+          { log_flush_interval = { 
+              type = "number",
+              default = 1,
+              gt = 0,
+              description = "Seconds between flushes of the log queue"
+            }
+          },
+          { log_queue_size = { 
+              type = "integer",
+              default = 10000,
+              gt = 0,
+              description = "Records buffered per worker before new ones are dropped"
+            }
+          },
+          { log_sampling = { 
+              type = "string",
+              default = "none",
+              one_of = { "none", "ratio", "token_bucket", "first_n" },
+              description = "Sampling applied to log_version lines and enable_logging records"
+            }
+          },
+          { log_sample_ratio = { 
+              type = "number",
+              default = 0.01,
+              between = { 0, 1 },
+              description = "Fraction of requests logged in ratio mode"
+            }
+          },
+          { log_sample_rate = { 
+              type = "number",
+              default = 10,
+              gt = 0,
+              description = "Lines per second per route in token_bucket mode"
+            }
+          },
+          { log_sample_limit = { 
+              type = "integer",
+              default = 10,
+              gt = 0,
+              description = "Lines per route logged at the start of each interval in first_n mode"
+            }
+          },
+          { log_sample_interval = { 
+              type = "number",
+              default = 1,
+              gt = 0,
+              description = "Interval in seconds for first_n mode"
+            }
+          },
+          { version_sources = { 
+              type = "array",
+              elements = { type = "string", one_of = { "header", "path", "query" } },
+              default = {},
+              description = "Where to read the requested version, tried in order (empty: always use version)"
+            }
+          },
+          { version_header = { 
+              type = "string",
+              default = "Accept-Version",
+              description = "Request header carrying the requested version (header source)"
+            }
+          },
+          { version_query_param = { 
+              type = "string",
+              default = "version",
+              description = "Query argument carrying the requested version (query source)"
+            }
+          },
+          { supported_versions = { 
+              type = "array",
+              elements = { type = "string", custom_validator = validate_version },
+              description = "Versions served upstream; a request for 2 or v2 resolves to the newest 2.x (default: accept any)"
+            }
+          },
+          { reject_unknown_version = { 
+              type = "boolean",
+              default = false,
+              description = "Answer 400 when the requested version is not supported, instead of falling back to version"
+            }
+          },
+          { upstream_path_prefix = { 
+              type = "string",
+              starts_with = "/",
+              description = "Upstream path prefix for the resolved version, e.g. /api/${major} or /${version}"
+            }
+          },
+          { strip_version_prefix = { 
+              type = "boolean",
+              default = true,
+              description = "Remove the /vN path segment before proxying when upstream_path_prefix is not set"
+            }
+          },
+          { body_cache = { 
+              type = "boolean",
+              default = false,
+              description = "Cache buffered body rewrites in the api_version_body_cache shared dict, keyed by plugin, route, method, path, Content-Encoding, upstream ETag/Last-Modified and version"
+            }
+          },
+          { body_cache_ttl = { 
+              type = "number",
+              default = 300,
+              gt = 0,
+              description = "Seconds a cached body rewrite is reused"
+            }
+          },
+          { body_cache_max_entry_size = { 
+              type = "integer",
+              default = 262144,
+              gt = 0,
+              description = "Largest rewritten body (bytes) stored in the body cache"
+            }
           }
         }
       }
     }
-  }
+  },
+  entity_checks = {
+    { conditional = {
+        if_field = "config.log_sink", if_match = { one_of = { "file", "udp", "http" } },
+        then_field = "config.log_sink_address", then_match = { required = true },
+      }
+    },
+  },
 }
 '''
 
-# Create plugin files
-plugin_dir = "kong-hybrid-setup/custom-plugins/api-version/kong/plugins/api-version"
-os.makedirs(plugin_dir, exist_ok=True)
+# Unit tests for the log sampler, run by pongo
+log_sampler_spec_lua = '''local PLUGIN_NAME = "api-version"
+
+-- Drives log_sampler on a simulated clock: one request every step
+-- seconds for the given duration, returning how many lines got through
+local function run(sampler, conf, clock, duration, step)
+  local emitted = 0
+  local stop = clock.now + duration
+  while clock.now < stop do
+    if sampler.sample(conf, "log_version") then
+      emitted = emitted + 1
+    end
+    clock.now = clock.now + step
+  end
+  return emitted
+end
+
+describe(PLUGIN_NAME .. ": (log_sampler)", function()
+  local sampler, clock, saved_kong, saved_now
+
+  before_each(function()
+    clock = { now = 1700000000 }
+    saved_kong, saved_now = _G.kong, ngx.now
+    _G.kong = { router = { get_route = function() return { id = "route-1" } end } }
+    ngx.now = function() return clock.now end
+    package.loaded["kong.plugins." .. PLUGIN_NAME .. ".log_sampler"] = nil
+    sampler = require("kong.plugins." .. PLUGIN_NAME .. ".log_sampler")
+  end)
+
+  after_each(function()
+    _G.kong, ngx.now = saved_kong, saved_now
+  end)
 
-with open(f"{plugin_dir}/handler.lua", "w") as f:
-    f.write(handler_lua)
+  describe("token_bucket", function()
+    it("lets lines through at rates below one per second", function()
+      local conf = { log_sampling = "token_bucket", log_sample_rate = 0.5 }
+      -- 0.5 lines/s over 10 s: one at start, then one every 2 s
+      assert.equal(5, run(sampler, conf, clock, 10, 0.25))
+      assert.same({ emitted = 5, suppressed = 35 }, sampler.stats().log_version)
+    end)
 
-with open(f"{plugin_dir}/schema.lua", "w") as f:
-    f.write(schema_lua)
+    it("lets a line through at the start for fractional rates", function()
+      local conf = { log_sampling = "token_bucket", log_sample_rate = 0.1 }
+      assert.is_true(sampler.sample(conf, "log_version"))
+      assert.is_false(sampler.sample(conf, "log_version"))
+    end)
+
+    it("caps bursts at one second's worth", function()
+      local conf = { log_sampling = "token_bucket", log_sample_rate = 4 }
+      assert.is_true(sampler.sample(conf, "log_version"))
+      -- an idle minute refills only 4 tokens
+      clock.now = clock.now + 60
+      assert.equal(4, run(sampler, conf, clock, 0.001, 0.0001))
+    end)
+  end)
+end)
+'''
 
 # Create rockspec file for the plugin
 rockspec = '''package = "kong-plugin-api-version"
@@ -196,14 +1652,18 @@ build = {
    type = "builtin",
    modules = {
       ["kong.plugins.api-version.handler"] = "kong/plugins/api-version/handler.lua",
+      ["kong.plugins.api-version.body_cache"] = "kong/plugins/api-version/body_cache.lua",
+      ["kong.plugins.api-version.clock"] = "kong/plugins/api-version/clock.lua",
+      ["kong.plugins.api-version.log_queue"] = "kong/plugins/api-version/log_queue.lua",
+      ["kong.plugins.api-version.log_sampler"] = "kong/plugins/api-version/log_sampler.lua",
+      ["kong.plugins.api-version.negotiate"] = "kong/plugins/api-version/negotiate.lua",
+      ["kong.plugins.api-version.phase_timer"] = "kong/plugins/api-version/phase_timer.lua",
+      ["kong.plugins.api-version.status_api"] = "kong/plugins/api-version/status_api.lua",
       ["kong.plugins.api-version.schema"] = "kong/plugins/api-version/schema.lua"
    }
 }
 '''
 
-with open("kong-hybrid-setup/custom-plugins/api-version/kong-plugin-api-version-0.1.0-1.rockspec", "w") as f:
-    f.write(rockspec)
-
 # Create README for the plugin
 plugin_readme = '''# Kong API Version Plugin
 
@@ -224,11 +1684,119 @@ A custom Kong plugin that adds API version information to HTTP responses.
 | `version` | string | `"1.0.0"` | API version string |
 | `add_server_header` | boolean | `true` | Add X-Server header |
 | `add_timestamp` | boolean | `false` | Add X-Response-Time header |
+| `timestamp_precision` | string | `"second"` | `second` or `millisecond` precision for X-Response-Time and `_meta.timestamp` |
 | `modify_body` | boolean | `false` | Add metadata to JSON bodies |
 | `log_version` | boolean | `true` | Log version for each request |
 | `enable_logging` | boolean | `false` | Enable detailed logging |
 | `custom_header_name` | string | `"X-API-Version"` | Custom version header name |
-| `header_prefix` | string | `"v"` | Prefix for version headers |
+| `header_prefix` | string | `"v"` | Prefix for version headers (e.g. `v2.1.0`) |
+| `body_mode` | string | `"buffered"` | `buffered` decodes and re-encodes JSON bodies; `streaming` splices `_meta` into the first chunk |
+| `max_buffered_body_size` | integer | `1048576` | Bodies larger than this (or without Content-Length) are streamed even in `buffered` mode |
+| `body_content_types` | array | `["application/json"]` | Media types whose bodies are rewritten; `*` is a wildcard (e.g. `application/*+json`) |
+| `body_status_codes` | array | any | Only rewrite bodies of responses with these status codes |
+| `max_body_size` | integer | no limit | Never rewrite responses whose Content-Length exceeds this |
+| `log_sink` | string | `"error_log"` | Where `enable_logging` batches go: `error_log`, `file`, `udp` or `http` |
+| `log_sink_address` | string | | File path, `host:port` or URL of the sink (required unless `error_log`) |
+| `log_batch_size` | integer | `100` | Records per encoded batch |
+| `log_flush_interval` | number | `1` | Seconds between queue flushes |
+| `log_queue_size` | integer | `10000` | Records buffered per worker; further records are dropped and counted |
+| `log_sampling` | string | `"none"` | Sampling for `log_version` lines and `enable_logging` records: `none`, `ratio`, `token_bucket` or `first_n` |
+| `log_sample_ratio` | number | `0.01` | Fraction of requests logged in `ratio` mode |
+| `log_sample_rate` | number | `10` | Lines per second per route in `token_bucket` mode |
+| `log_sample_limit` | integer | `10` | Lines per route at the start of each interval in `first_n` mode |
+| `log_sample_interval` | number | `1` | Interval in seconds for `first_n` mode |
+| `version_sources` | array | `[]` | Where to read the requested version, in order: `header`, `path`, `query` |
+| `version_header` | string | `"Accept-Version"` | Header read by the `header` source |
+| `version_query_param` | string | `"version"` | Query argument read by the `query` source |
+| `supported_versions` | array | any | Versions served upstream; `2` or `v2` resolves to the newest `2.x` |
+| `reject_unknown_version` | boolean | `false` | Answer 400 for unsupported versions instead of using `version` |
+| `upstream_path_prefix` | string | | Upstream path prefix for the resolved version, with `${version}` and `${major}`; must start with `/` |
+| `strip_version_prefix` | boolean | `true` | Drop the `/vN` path segment before proxying when `upstream_path_prefix` is unset |
+| `body_cache` | boolean | `false` | Reuse buffered body rewrites across requests (needs the `api_version_body_cache` shared dict) |
+| `body_cache_ttl` | number | `300` | Seconds a cached rewrite is reused |
+| `body_cache_max_entry_size` | integer | `262144` | Largest rewritten body stored in the cache |
+
+## Version negotiation
+
+With `version_sources` set, the plugin serves the version the client asks
+for instead of the fixed `version`:
+
+```yaml
+config:
+  version: "1.0.0"                     # used when the request names no version
+  version_sources: [header, path, query]
+  supported_versions: ["1.0.0", "2.0.0", "2.1.0"]
+  upstream_path_prefix: /api/${major}
+```
+
+| Request | Resolved | Upstream path |
+|---------|----------|---------------|
+| `GET /orders` with `Accept-Version: 2` | `2.1.0` | `/api/2/orders` |
+| `GET /v1/orders` | `1.0.0` | `/api/1/orders` |
+| `GET /orders?version=2.0` | `2.0.0` | `/api/2/orders` |
+| `GET /orders` | `1.0.0` (default) | unchanged |
+
+Upstream paths start from the path Kong computed for the upstream, after
+the route's `strip_path` and the service's `path`: the path source looks
+for the first `/vN` segment past the service path, and the prefix goes in
+front of the whole upstream path. With a route on `/shop` (`strip_path:
+true`) and a service path of `/svc`, `GET /shop/v2/orders` is proxied to
+`/api/2/svc/orders`.
+
+The resolved version goes into the version header, `_meta.api_version` and
+log records. Matchers are compiled once per configuration, and each worker
+keeps an LRU cache (1000 entries) from requested value to resolved version.
+Its hit and miss counters are served with the logging counters (one log
+queue per plugin instance) by the status listener:
+
+```bash
+curl http://localhost:8100/api-version/stats
+```
+
+## Body cache
+
+Buffered `modify_body` decodes and re-encodes every response. If the
+upstream sends an `ETag` or `Last-Modified` header, `body_cache: true`
+stores the re-encoded body in a shared dict, keyed by plugin instance,
+route, method, path, status, `Content-Encoding`, validator and API
+version, and later responses with the same validator
+skip the JSON round trip: the upstream chunks are dropped and the cached
+body is sent with a fresh `_meta`. Declare the dict on the data plane:
+
+```yaml
+# values-dp.yaml
+env:
+  nginx_http_lua_shared_dict: "api_version_body_cache 64m"
+```
+
+Memory is bounded by the dict size, whose least recently used entries are
+evicted when it fills up; entries also expire after `body_cache_ttl`, and
+bodies above `body_cache_max_entry_size` are never stored. Hits, misses,
+stores and evictions are counted per worker under `body_cache` in
+`/api-version/stats`. Responses without a validator, or with a `Vary`
+header, are rewritten as usual. Only use the cache when the upstream's validators change whenever
+its bodies do.
+
+## Per-phase latency
+
+Declare the `plugin_phase_latency` shared dict to time the plugin's
+access, header_filter, body_filter (per chunk) and log phases:
+
+```yaml
+# values-dp.yaml
+env:
+  nginx_http_lua_shared_dict: "plugin_phase_latency 1m"
+```
+
+Each worker buckets phase durations locally and adds them to the dict once
+a second. The status listener then serves them as the Prometheus histogram
+`kong_plugin_phase_duration_ms{plugin,phase}`:
+
+```bash
+curl http://localhost:8100/api-version/phases
+```
+
+Without the dict the handler is not wrapped and pays nothing.
 
 ## Usage
 
@@ -266,6 +1834,13 @@ export PATH=$PATH:$(pwd)/kong-pongo
 pongo run
 ```
 
+### Benchmarking
+```bash
+# From the repository root: ns/request of the precomputed header plan
+# ("headers") next to the 0.1.0 and inline header logic
+luajit bench/run.lua --filter api-version/headers
+```
+
 ### Building Rock
 ```bash
 # Build the rock
@@ -281,8 +1856,7 @@ luarocks install kong-plugin-api-version-0.1.0-1.rock
 ```bash
 # Create ConfigMap from plugin files
 kubectl create configmap kong-plugin-api-version \\
-  --from-file=handler.lua=kong/plugins/api-version/handler.lua \\
-  --from-file=schema.lua=kong/plugins/api-version/schema.lua \\
+  --from-file=kong/plugins/api-version/ \\
   -n kong
 ```
 
@@ -297,12 +1871,3 @@ USER kong
 
 Apache 2.0
 '''
-
-with open("kong-hybrid-setup/custom-plugins/api-version/README.md", "w") as f:
-    f.write(plugin_readme)
-
-print("Custom plugin files created!")
-print("- handler.lua: Plugin logic and execution phases")
-print("- schema.lua: Configuration schema and validation")
-print("- rockspec: LuaRocks package specification")
-print("- README.md: Plugin documentation")
\ No newline at end of file
@@ -15,14 +15,17 @@ NC='\\033[0m' # No Color
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 PROJECT_ROOT="$(dirname "$SCRIPT_DIR")"
 
+# Step timings (Chrome trace + table) when STEP_TRACE is set
+source "$SCRIPT_DIR/step-trace.sh"
+# helm_upgrade_if_changed (no-op redeploys skip helm upgrade), wait_for_release
+source "$SCRIPT_DIR/helm-release.sh"
+# chart_ref: pinned charts from the vendored charts/ directory
+source "$SCRIPT_DIR/helm-charts.sh"
+
 # Configuration
 NAMESPACE="kong"
 POSTGRES_NAMESPACE="postgres"
 
-echo -e "${BLUE}🚀 Kong OSS Hybrid Mode Setup${NC}"
-echo -e "${BLUE}================================${NC}"
-echo ""
-
 # Function to print status
 print_status() {
     echo -e "${GREEN}✅ $1${NC}"
@@ -61,20 +64,15 @@ check_prerequisites() {
     print_status "Prerequisites check passed"
 }
 
-# Function to setup Helm repositories
+# Function to set up the pinned Helm charts
 setup_helm_repos() {
-    echo -e "${BLUE}📦 Setting up Helm repositories...${NC}"
-    
-    # Add Kong Helm repository
-    helm repo add kong https://charts.konghq.com
+    echo -e "${BLUE}📦 Setting up Helm charts...${NC}"
     
-    # Add Bitnami Helm repository for PostgreSQL
-    helm repo add bitnami https://charts.bitnami.com/bitnami
+    # Fetch pinned charts missing from charts/ (no helm repo add/update;
+    # ./scripts/helm-charts.sh refresh fetches them again)
+    charts_vendor
     
-    # Update repositories
-    helm repo update
-    
-    print_status "Helm repositories configured"
+    print_status "Helm charts vendored in $CHARTS_DIR"
 }
 
 # Function to create namespaces
@@ -120,10 +118,9 @@ generate_certificates() {
 create_custom_plugins() {
     echo -e "${BLUE}🔌 Creating custom plugin ConfigMaps...${NC}"
     
-    # Create ConfigMap for API version plugin
+    # Create ConfigMap for API version plugin (one key per module file)
     kubectl create configmap kong-plugin-api-version \\
-        --from-file=handler.lua="$PROJECT_ROOT/custom-plugins/api-version/kong/plugins/api-version/handler.lua" \\
-        --from-file=schema.lua="$PROJECT_ROOT/custom-plugins/api-version/kong/plugins/api-version/schema.lua" \\
+        --from-file="$PROJECT_ROOT/custom-plugins/api-version/kong/plugins/api-version/" \\
         -n "$NAMESPACE" --dry-run=client -o yaml | kubectl apply -f -
     
     print_status "Custom plugin ConfigMaps created"
@@ -134,14 +131,13 @@ deploy_postgresql() {
     echo -e "${BLUE}🐘 Deploying PostgreSQL database...${NC}"
     
     # Deploy PostgreSQL using Helm
-    helm upgrade --install postgres bitnami/postgresql \\
-        --namespace "$POSTGRES_NAMESPACE" \\
-        --values "$PROJECT_ROOT/database/postgres-values.yaml" \\
-        --wait \\
-        --timeout 10m
+    local chart
+    chart="$(chart_ref bitnami/postgresql)"
+    helm_upgrade_if_changed postgres "$chart" "$POSTGRES_NAMESPACE" \\
+        --values "$PROJECT_ROOT/database/postgres-values.yaml"
     
     # Wait for PostgreSQL to be ready
-    kubectl wait --for=condition=ready pod -l app.kubernetes.io/name=postgresql -n "$POSTGRES_NAMESPACE" --timeout=300s
+    wait_for_release postgres "$POSTGRES_NAMESPACE"
     
     print_status "PostgreSQL deployed and ready"
 }
@@ -151,14 +147,13 @@ deploy_control_plane() {
     echo -e "${BLUE}🎛️  Deploying Kong Control Plane...${NC}"
     
     # Deploy Kong Control Plane
-    helm upgrade --install kong-cp kong/kong \\
-        --namespace "$NAMESPACE" \\
-        --values "$PROJECT_ROOT/control-plane/values-cp.yaml" \\
-        --wait \\
-        --timeout 10m
+    local chart
+    chart="$(chart_ref kong/kong)"
+    helm_upgrade_if_changed kong-cp "$chart" "$NAMESPACE" \\
+        --values "$PROJECT_ROOT/control-plane/values-cp.yaml"
     
     # Wait for Control Plane to be ready
-    kubectl wait --for=condition=ready pod -l app.kubernetes.io/name=kong -n "$NAMESPACE" --timeout=300s
+    wait_for_release kong-cp "$NAMESPACE"
     
     print_status "Kong Control Plane deployed and ready"
 }
@@ -178,14 +173,13 @@ deploy_data_plane() {
     echo -e "${BLUE}🌐 Deploying Kong Data Plane...${NC}"
     
     # Deploy Kong Data Plane
-    helm upgrade --install kong-dp kong/kong \\
-        --namespace "$NAMESPACE" \\
-        --values "$PROJECT_ROOT/data-plane/values-dp.yaml" \\
-        --wait \\
-        --timeout 10m
+    local chart
+    chart="$(chart_ref kong/kong)"
+    helm_upgrade_if_changed kong-dp "$chart" "$NAMESPACE" \\
+        --values "$PROJECT_ROOT/data-plane/values-dp.yaml"
     
     # Wait for Data Plane to be ready
-    kubectl wait --for=condition=ready pod -l app.kubernetes.io/name=kong,app.kubernetes.io/instance=kong-dp -n "$NAMESPACE" --timeout=300s
+    wait_for_release kong-dp "$NAMESPACE"
     
     print_status "Kong Data Plane deployed and ready"
 }
@@ -266,10 +260,16 @@ show_access_info() {
     echo ""
     echo "   # Test the proxy:"
     echo "   curl http://localhost:8000/httpbin/get"
+    echo ""
+    echo "   # Load test the proxy (p50/p99/p99.9 at a constant rate):"
+    echo "   python kong-hybrid-setup/loadgen.py http://localhost:8000/httpbin/get --rate 200 --duration 30"
 }
 
 # Main execution
 main() {
+    echo -e "${BLUE}🚀 Kong OSS Hybrid Mode Setup${NC}"
+    echo -e "${BLUE}================================${NC}"
+    echo ""
     echo "Starting Kong OSS Hybrid Mode deployment..."
     echo "This will deploy Kong Control Plane, Data Plane, and PostgreSQL"
     echo ""
@@ -283,16 +283,12 @@ main() {
     fi
     
     # Execute deployment steps
-    check_prerequisites
-    setup_helm_repos
-    create_namespaces
-    generate_certificates
-    create_custom_plugins
-    deploy_postgresql
-    deploy_control_plane
-    run_migrations
-    deploy_data_plane
-    verify_deployment
+    local step
+    for step in check_prerequisites setup_helm_repos create_namespaces generate_certificates \\
+        create_custom_plugins deploy_postgresql deploy_control_plane run_migrations \\
+        deploy_data_plane verify_deployment; do
+        trace_step "$step" "$step"
+    done
     show_access_info
     
     echo ""
@@ -302,15 +298,24 @@ main() {
 # Error handling
 trap 'print_error "An error occurred. Exiting."; exit 1' ERR
 
+# Run individual steps without banner or confirmation, as orchestrate.py
+# does: setup.sh --step deploy_postgresql [STEP...]
+run_steps() {
+    local step
+    for step in "$@"; do
+        if ! declare -F "$step" > /dev/null; then
+            print_error "Unknown step: $step"
+            exit 2
+        fi
+        trace_step "$step" "$step"
+    done
+}
+
 # Run main function
-main "$@"
+if [[ "${1:-}" == "--step" ]]; then
+    shift
+    run_steps "$@"
+else
+    main "$@"
+fi
 """
-
-with open("kong-hybrid-setup/scripts/setup.sh", "w") as f:
-    f.write(setup_script)
-
-# Make it executable
-os.chmod("kong-hybrid-setup/scripts/setup.sh", 
-         stat.S_IRWXU | stat.S_IRGRP | stat.S_IROTH)
-
-print("Setup script created!")
\ No newline at end of file
@@ -8,14 +8,23 @@ SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 PROJECT_ROOT="$(dirname "$SCRIPT_DIR")"
 NAMESPACE="kong"
 
+# Step timings when STEP_TRACE is set
+source "$SCRIPT_DIR/step-trace.sh"
+# helm_upgrade_if_changed (no-op redeploys skip helm upgrade), wait_for_release
+source "$SCRIPT_DIR/helm-release.sh"
+# chart_ref: pinned charts from the vendored charts/ directory
+source "$SCRIPT_DIR/helm-charts.sh"
+
 echo "🎛️  Deploying Kong Control Plane..."
 
-# Deploy Control Plane
-helm upgrade --install kong-cp kong/kong \\
-    --namespace "$NAMESPACE" \\
-    --values "$PROJECT_ROOT/control-plane/values-cp.yaml" \\
-    --wait \\
-    --timeout 10m
+# Deploy Control Plane from the pinned chart (fetched only if not vendored yet)
+trace_step "vendor charts" charts_vendor
+CHART="$(chart_ref kong/kong)"
+trace_step "helm upgrade kong-cp" helm_upgrade_if_changed kong-cp "$CHART" "$NAMESPACE" \\
+    --values "$PROJECT_ROOT/control-plane/values-cp.yaml"
+
+# Return as soon as this release's pods are available
+trace_step "wait kong-cp" wait_for_release kong-cp "$NAMESPACE"
 
 echo "✅ Kong Control Plane deployment completed!"
 """
@@ -29,14 +38,23 @@ SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 PROJECT_ROOT="$(dirname "$SCRIPT_DIR")"
 NAMESPACE="kong"
 
+# Step timings when STEP_TRACE is set
+source "$SCRIPT_DIR/step-trace.sh"
+# helm_upgrade_if_changed (no-op redeploys skip helm upgrade), wait_for_release
+source "$SCRIPT_DIR/helm-release.sh"
+# chart_ref: pinned charts from the vendored charts/ directory
+source "$SCRIPT_DIR/helm-charts.sh"
+
 echo "🌐 Deploying Kong Data Plane..."
 
-# Deploy Data Plane
-helm upgrade --install kong-dp kong/kong \\
-    --namespace "$NAMESPACE" \\
-    --values "$PROJECT_ROOT/data-plane/values-dp.yaml" \\
-    --wait \\
-    --timeout 10m
+# Deploy Data Plane from the pinned chart (fetched only if not vendored yet)
+trace_step "vendor charts" charts_vendor
+CHART="$(chart_ref kong/kong)"
+trace_step "helm upgrade kong-dp" helm_upgrade_if_changed kong-dp "$CHART" "$NAMESPACE" \\
+    --values "$PROJECT_ROOT/data-plane/values-dp.yaml"
+
+# Return as soon as this release's pods are available
+trace_step "wait kong-dp" wait_for_release kong-dp "$NAMESPACE"
 
 echo "✅ Kong Data Plane deployment completed!"
 """
@@ -93,22 +111,450 @@ fi
 echo "✅ Cleanup completed!"
 """
 
-# Write the scripts
-scripts = [
-    ("deploy-cp.sh", deploy_cp_script),
-    ("deploy-dp.sh", deploy_dp_script), 
-    ("cleanup.sh", cleanup_script)
-]
-
-for script_name, script_content in scripts:
-    with open(f"kong-hybrid-setup/scripts/{script_name}", "w") as f:
-        f.write(script_content)
-    
-    # Make executable
-    os.chmod(f"kong-hybrid-setup/scripts/{script_name}", 
-             stat.S_IRWXU | stat.S_IRGRP | stat.S_IROTH)
-
-print("Additional deployment scripts created:")
-print("- deploy-cp.sh: Deploy Control Plane only")
-print("- deploy-dp.sh: Deploy Data Plane only") 
-print("- cleanup.sh: Clean up all resources")
\ No newline at end of file
+step_trace_script = """#!/usr/bin/env bash
+
+# step-trace.sh - Step timing for the deployment scripts
+#
+# With STEP_TRACE=FILE set, every traced step appends a Chrome trace event
+# (open FILE in chrome://tracing or https://ui.perfetto.dev) and the script
+# prints a timing table when it exits (unless STEP_TRACE_QUIET is set).
+# Without STEP_TRACE steps just run.
+#
+# In a script:   source "$SCRIPT_DIR/step-trace.sh"
+#                trace_step "helm upgrade kong-cp" helm upgrade --install ...
+# From make:     step-trace.sh run TARGET COMMAND [ARGS...]
+# Afterwards:    step-trace.sh summary FILE [BASELINE_FILE]
+#
+# FILE uses the trace-event JSON array format without the closing "]",
+# which the trace viewers accept, so parallel steps and nested scripts can
+# append to the same file.
+
+# Steps opened by this shell and not yet finished (a stack)
+TRACE_OPEN_NAMES=()
+TRACE_OPEN_STARTS=()
+# Finished steps, for the table printed at exit
+TRACE_DONE=()
+
+# Microseconds since the epoch (whole seconds where bash lacks EPOCHREALTIME)
+_trace_now() {
+    if [[ -n "${EPOCHREALTIME:-}" ]]; then
+        echo "${EPOCHREALTIME/[.,]/}"
+    else
+        echo "$(date +%s)000000"
+    fi
+}
+
+_trace_escape() {
+    local text="${1//\\\\/\\\\\\\\}"
+    echo "${text//\\"/\\\\\\"}"
+}
+
+_trace_event() {
+    # Creating the file with noclobber is atomic, so only one writer adds "["
+    ( set -C; printf '[\\n' > "$STEP_TRACE" ) 2> /dev/null || true
+    printf '%s,\\n' "$1" >> "$STEP_TRACE"
+}
+
+_trace_begin() {
+    TRACE_OPEN_NAMES+=("$1")
+    TRACE_OPEN_STARTS+=("$(_trace_now)")
+    if [[ ${#TRACE_OPEN_NAMES[@]} -eq 1 && ${#TRACE_DONE[@]} -eq 0 ]]; then
+        # Label this shell's lane in the viewer
+        _trace_event "{\\"name\\":\\"thread_name\\",\\"ph\\":\\"M\\",\\"pid\\":1,\\"tid\\":$$,\\"args\\":{\\"name\\":\\"$(_trace_escape "$TRACE_SCRIPT")\\"}}"
+    fi
+}
+
+_trace_end() {
+    local status="$1" last=$((${#TRACE_OPEN_NAMES[@]} - 1))
+    local name="${TRACE_OPEN_NAMES[$last]}" start="${TRACE_OPEN_STARTS[$last]}"
+    local end
+    end="$(_trace_now)"
+    unset "TRACE_OPEN_NAMES[$last]" "TRACE_OPEN_STARTS[$last]"
+    TRACE_DONE+=("$name|$((end - start))|$status")
+    _trace_event "{\\"name\\":\\"$(_trace_escape "$name")\\",\\"cat\\":\\"$(_trace_escape "$TRACE_SCRIPT")\\",\\"ph\\":\\"X\\",\\"ts\\":$start,\\"dur\\":$((end - start)),\\"pid\\":1,\\"tid\\":$$,\\"args\\":{\\"status\\":$status}}"
+}
+
+_trace_table() {
+    local entry name us status total=0
+    printf '%-40s %10s  %s\\n' "step ($TRACE_SCRIPT)" "seconds" "status"
+    for entry in "${TRACE_DONE[@]}"; do
+        IFS='|' read -r name us status <<< "$entry"
+        printf '%-40s %10s  %s\\n' "$name" "$(awk -v us="$us" 'BEGIN { printf "%.1f", us / 1e6 }')" \\
+            "$([[ "$status" == 0 ]] && echo ok || echo "failed ($status)")"
+    done
+}
+
+# Close steps left open by `exit` or errexit, then print the table
+_trace_exit() {
+    local status=$?
+    while [[ ${#TRACE_OPEN_NAMES[@]} -gt 0 ]]; do
+        _trace_end "$status"
+    done
+    if [[ ${#TRACE_DONE[@]} -gt 0 && -z "${STEP_TRACE_QUIET:-}" ]]; then
+        _trace_table >&2
+    fi
+    return "$status"
+}
+
+# trace_step NAME COMMAND [ARGS...] - run COMMAND as the step NAME. A
+# failure under errexit ends the script as usual; the EXIT trap records it.
+trace_step() {
+    local name="$1"
+    shift
+    if [[ -z "${STEP_TRACE:-}" ]]; then
+        "$@"
+        return
+    fi
+    _trace_begin "$name"
+    "$@"
+    local status=$?
+    _trace_end "$status"
+    return "$status"
+}
+
+# Per-step totals from a trace file, optionally next to a baseline run
+trace_summary() {
+    awk '
+        function field(line, key,    m) {
+            if (!match(line, "\\"" key "\\":(\\"([^\\"\\\\\\\\]|\\\\\\\\.)*\\"|-?[0-9]+)"))
+                return ""
+            m = substr(line, RSTART + length(key) + 3, RLENGTH - length(key) - 3)
+            if (m ~ /^"/) {
+                m = substr(m, 2, length(m) - 2)
+                gsub(/\\\\"/, "\\"", m)
+                gsub(/\\\\\\\\/, "\\\\", m)
+            }
+            return m
+        }
+        FNR == 1 { run++ }
+        /"ph":"X"/ {
+            name = field($0, "name")
+            if (!(name in seen)) { seen[name] = 1; order[++n] = name }
+            dur[run, name] += field($0, "dur")
+            if (field($0, "status") != 0) failed[run, name] = 1
+        }
+        function cell(r, name) {
+            if (!((r, name) in dur)) return sprintf("%10s ", "-")
+            return sprintf("%9.1fs", dur[r, name] / 1e6) (failed[r, name] ? "!" : " ")
+        }
+        END {
+            if (run > 1) printf "%-40s %11s %11s %8s\\n", "step", "baseline", "this run", "change"
+            else printf "%-40s %11s\\n", "step", "seconds"
+            for (i = 1; i <= n; i++) {
+                name = order[i]
+                if (run > 1) {
+                    change = ((2, name) in dur) && dur[2, name] > 0 && ((1, name) in dur) ? sprintf("%+7.0f%%", 100 * (dur[1, name] / dur[2, name] - 1)) : ""
+                    printf "%-40s %11s %11s %8s\\n", name, cell(2, name), cell(1, name), change
+                } else {
+                    printf "%-40s %11s\\n", name, cell(1, name)
+                }
+            }
+            print "(! = failed; nested steps are included in their parents)"
+        }
+    ' "$@"
+}
+
+if [[ "${BASH_SOURCE[0]}" == "$0" ]]; then
+    # Executed rather than sourced
+    case "${1:-}" in
+        run)
+            [[ $# -ge 3 ]] || { echo "usage: $0 run NAME COMMAND [ARGS...]" >&2; exit 2; }
+            shift
+            TRACE_SCRIPT="${TRACE_SCRIPT:-make}"
+            if [[ -n "${STEP_TRACE:-}" ]]; then
+                trap _trace_exit EXIT
+            fi
+            trace_step "$@"
+            ;;
+        summary)
+            [[ $# -ge 2 && $# -le 3 ]] || { echo "usage: $0 summary FILE [BASELINE_FILE]" >&2; exit 2; }
+            trace_summary "${@:2}"
+            ;;
+        *)
+            echo "usage: $0 run NAME COMMAND [ARGS...] | summary FILE [BASELINE_FILE]" >&2
+            exit 2
+            ;;
+    esac
+else
+    TRACE_SCRIPT="${TRACE_SCRIPT:-$(basename "$0")}"
+    if [[ -n "${STEP_TRACE:-}" ]]; then
+        trap _trace_exit EXIT
+    fi
+fi
+"""
+
+helm_release_script = """#!/usr/bin/env bash
+
+# helm-release.sh - Skip helm upgrades that would not change anything
+#
+#   source "$SCRIPT_DIR/helm-release.sh"
+#   helm_upgrade_if_changed kong-cp kong/kong kong --values values-cp.yaml
+#   wait_for_release kong-cp kong
+#
+# The chart is rendered locally with the same arguments and the manifest is
+# hashed together with the chart version. The hash is kept in the release's
+# description, so when the last revision is deployed with the same hash the
+# upgrade is skipped. FORCE=1 always upgrades. Upgrades do not --wait;
+# wait_for_release follows the rollout instead.
+
+_helm_release_sha256() {
+    if command -v sha256sum > /dev/null; then
+        sha256sum | cut -d' ' -f1
+    else
+        shasum -a 256 | cut -d' ' -f1
+    fi
+}
+
+# Hash of the rendered manifest and chart version for these arguments
+helm_manifest_hash() {
+    local release="$1" chart="$2" namespace="$3"
+    shift 3
+    local version_args=() i next
+    for ((i = 1; i <= $#; i++)); do
+        case "${!i}" in
+            --version=*) version_args=("${!i}") ;;
+            --version) next=$((i + 1)); version_args=(--version "${!next}") ;;
+        esac
+    done
+    {
+        helm show chart "$chart" ${version_args[@]+"${version_args[@]}"} | grep -E '^(name|version):'
+        helm template "$release" "$chart" --namespace "$namespace" "$@"
+    } | _helm_release_sha256
+}
+
+# helm upgrade --install RELEASE CHART -n NAMESPACE ARGS..., unless the
+# deployed revision was made from the same manifest
+helm_upgrade_if_changed() {
+    local release="$1" chart="$2" namespace="$3"
+    shift 3
+    local hash last
+    hash="$(helm_manifest_hash "$release" "$chart" "$namespace" "$@")"
+    if [[ -z "${FORCE:-}" ]]; then
+        last="$(helm history "$release" --namespace "$namespace" --max 1 -o json 2> /dev/null || true)"
+        if [[ "$last" == *'"status":"deployed"'* && "$last" == *"manifest sha256:$hash"* ]]; then
+            echo "⏭️  $release is up to date (manifest sha256:${hash:0:12}); skipping helm upgrade"
+            return 0
+        fi
+    fi
+    helm upgrade --install "$release" "$chart" --namespace "$namespace" "$@" \\
+        --description "manifest sha256:$hash"
+}
+
+# wait_for_release RELEASE NAMESPACE - block until the Deployments and
+# StatefulSets of exactly this release (app.kubernetes.io/instance) have
+# rolled out, for at most WAIT_TIMEOUT seconds (default 600). wait_ready.py
+# watches the API and returns the moment they are available; without
+# python3, kubectl rollout status is run for each workload.
+wait_for_release() {
+    local release="$1" namespace="$2" timeout="${WAIT_TIMEOUT:-600}"
+    local waiter workload
+    waiter="$(dirname "$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)")/wait_ready.py"
+    if command -v python3 > /dev/null && [[ -f "$waiter" ]]; then
+        python3 "$waiter" "$release" --namespace "$namespace" --timeout "$timeout"
+        return
+    fi
+    for workload in $(kubectl get deployment,statefulset -n "$namespace" \\
+            -l "app.kubernetes.io/instance=$release" -o name); do
+        kubectl rollout status "$workload" -n "$namespace" --timeout="${timeout}s" || return
+    done
+}
+"""
+
+helm_charts_script = """#!/usr/bin/env bash
+
+# helm-charts.sh - Pinned Helm charts vendored into a local chart directory
+#
+#   source "$SCRIPT_DIR/helm-charts.sh"
+#   charts_vendor                                  # instead of helm repo add/update
+#   helm upgrade --install kong-cp "$(chart_ref kong/kong)" ...
+#
+#   ./scripts/helm-charts.sh vendor                # fetch pinned charts not cached yet
+#   ./scripts/helm-charts.sh refresh [--latest]    # fetch every pin again (--latest: bump pins first)
+#   ./scripts/helm-charts.sh list
+#
+# charts/charts.lock (next to scripts/) pins each chart as NAME VERSION
+# REPOSITORY. Fetched archives are stored under charts/sha256/ by the
+# SHA-256 of their bytes and listed in charts/index as NAME VERSION
+# sha256:DIGEST. chart_ref resolves a chart to its verified archive, so
+# once a pin is cached no run talks to a chart repository again; only a
+# missing pin is fetched (with helm pull --repo, no helm repo add), and
+# cached ones only with refresh. Set CHARTS_OFFLINE=1 to fail instead of
+# fetching; CHARTS_DIR points at another chart directory.
+
+CHARTS_DIR="${CHARTS_DIR:-$(dirname "$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)")/charts}"
+CHARTS_LOCK="${CHARTS_LOCK:-$CHARTS_DIR/charts.lock}"
+
+_charts_sha256() {
+    if command -v sha256sum > /dev/null; then
+        sha256sum "$@" | cut -d' ' -f1
+    else
+        shasum -a 256 "$@" | cut -d' ' -f1
+    fi
+}
+
+# Pins as "NAME VERSION REPOSITORY" lines
+_charts_pins() {
+    if [[ ! -f "$CHARTS_LOCK" ]]; then
+        echo "❌ $CHARTS_LOCK not found" >&2
+        return 1
+    fi
+    awk '!/^[[:space:]]*(#|$)/ { print $1, $2, $3 }' "$CHARTS_LOCK"
+}
+
+_charts_pin() {
+    _charts_pins | awk -v name="$1" '$1 == name { print; exit }'
+}
+
+# Cached archive of NAME VERSION whose bytes still match the index
+_charts_cached() {
+    local name="$1" version="$2" digest file
+    digest="$(awk -v name="$name" -v version="$version" \\
+        '$1 == name && $2 == version { sub(/^sha256:/, "", $3); print $3; exit }' "$CHARTS_DIR/index" 2> /dev/null)"
+    file="$CHARTS_DIR/sha256/$digest.tgz"
+    if [[ -n "$digest" && -f "$file" && "$(_charts_sha256 "$file")" == "$digest" ]]; then
+        echo "$file"
+    else
+        return 1
+    fi
+}
+
+# helm pull NAME VERSION from REPOSITORY into the chart directory
+_charts_fetch() {
+    local name="$1" version="$2" repository="$3" chart="${1#*/}" tmp archive digest
+    tmp="$(mktemp -d)"
+    echo "⬇️  $name $version from $repository" >&2
+    if [[ "$repository" == oci://* ]]; then
+        helm pull "$repository/$chart" --version "$version" --destination "$tmp" > /dev/null
+    else
+        helm pull "$chart" --repo "$repository" --version "$version" --destination "$tmp" > /dev/null
+    fi || { rm -rf "$tmp"; return 1; }
+    archive="$tmp/${name##*/}-$version.tgz"
+    if [[ ! -f "$archive" ]]; then
+        echo "❌ helm pull did not write ${archive##*/} for $name $version" >&2
+        rm -rf "$tmp"
+        return 1
+    fi
+    digest="$(_charts_sha256 "$archive")"
+    mkdir -p "$CHARTS_DIR/sha256"
+    mv "$archive" "$CHARTS_DIR/sha256/$digest.tgz"
+    rm -rf "$tmp"
+    {
+        awk -v name="$name" -v version="$version" '!($1 == name && $2 == version)' "$CHARTS_DIR/index" 2> /dev/null
+        echo "$name $version sha256:$digest"
+    } | sort > "$CHARTS_DIR/index.tmp"
+    mv "$CHARTS_DIR/index.tmp" "$CHARTS_DIR/index"
+}
+
+# Fetch every pin that is not cached (or whose archive no longer verifies)
+charts_vendor() {
+    local name version repository pins
+    pins="$(_charts_pins)" || return
+    while read -r name version repository; do
+        if [[ -n "$name" ]] && ! _charts_cached "$name" "$version" > /dev/null; then
+            if [[ -n "${CHARTS_OFFLINE:-}" ]]; then
+                echo "❌ $name $version is not in $CHARTS_DIR and CHARTS_OFFLINE is set" >&2
+                return 1
+            fi
+            _charts_fetch "$name" "$version" "$repository" || return
+        fi
+    done <<< "$pins"
+}
+
+# Fetch every pin again, drop index entries and archives no pin uses;
+# with --latest, first move each pin to the newest version in its repository
+charts_refresh() {
+    local name version repository latest pins
+    pins="$(_charts_pins)" || return
+    if [[ "${1:-}" == "--latest" ]]; then
+        while read -r name version repository; do
+            [[ -n "$name" ]] || continue
+            if [[ "$repository" == oci://* ]]; then
+                latest="$(helm show chart "$repository/${name#*/}" | awk '/^version:/ { print $2 }')"
+            else
+                latest="$(helm show chart "${name#*/}" --repo "$repository" | awk '/^version:/ { print $2 }')"
+            fi
+            if [[ -n "$latest" && "$latest" != "$version" ]]; then
+                echo "📌 $name $version -> $latest" >&2
+                awk -v name="$name" -v from="$version" -v to="$latest" '
+                    !/^[[:space:]]*#/ && $1 == name && $2 == from {
+                        i = index($0, $1) + length($1); i += index(substr($0, i), from) - 1
+                        $0 = substr($0, 1, i - 1) to substr($0, i + length(from))
+                    }
+                    { print }' \\
+                    "$CHARTS_LOCK" > "$CHARTS_LOCK.tmp" && mv "$CHARTS_LOCK.tmp" "$CHARTS_LOCK"
+            fi
+        done <<< "$pins"
+        pins="$(_charts_pins)"
+    fi
+
+    while read -r name version repository; do
+        if [[ -n "$name" ]]; then
+            _charts_fetch "$name" "$version" "$repository" || return
+        fi
+    done <<< "$pins"
+
+    awk 'NR == FNR { pinned[$1 " " $2] = 1; next } ($1 " " $2) in pinned' \\
+        <(echo "$pins") "$CHARTS_DIR/index" > "$CHARTS_DIR/index.tmp"
+    mv "$CHARTS_DIR/index.tmp" "$CHARTS_DIR/index"
+    local file
+    for file in "$CHARTS_DIR"/sha256/*.tgz; do
+        if [[ -f "$file" ]] && ! grep -q "sha256:$(basename "$file" .tgz)\\$" "$CHARTS_DIR/index"; then
+            rm -f "$file"
+        fi
+    done
+}
+
+# Chart reference for helm upgrade/template: the verified archive of NAME's
+# pinned version, fetched first if it is not cached yet
+chart_ref() {
+    local name="$1" pin version repository file
+    pin="$(_charts_pin "$name")"
+    if [[ -z "$pin" ]]; then
+        echo "❌ $name is not pinned in $CHARTS_LOCK" >&2
+        return 1
+    fi
+    read -r name version repository <<< "$pin"
+    if ! file="$(_charts_cached "$name" "$version")"; then
+        if [[ -n "${CHARTS_OFFLINE:-}" ]]; then
+            echo "❌ $name $version is not in $CHARTS_DIR and CHARTS_OFFLINE is set" >&2
+            return 1
+        fi
+        _charts_fetch "$name" "$version" "$repository" || return
+        file="$(_charts_cached "$name" "$version")" || return
+    fi
+    echo "$file"
+}
+
+charts_list() {
+    local name version repository file pins
+    pins="$(_charts_pins)" || return
+    while read -r name version repository; do
+        [[ -n "$name" ]] || continue
+        file="$(_charts_cached "$name" "$version")" || file="(not cached)"
+        printf '%-20s %-10s %s\\n' "$name" "$version" "$file"
+    done <<< "$pins"
+}
+
+if [[ "${BASH_SOURCE[0]}" == "$0" ]]; then
+    set -euo pipefail
+    case "${1:-}" in
+        vendor) charts_vendor ;;
+        refresh) charts_refresh "${2:-}" ;;
+        list) charts_list ;;
+        *)
+            echo "usage: $0 vendor | refresh [--latest] | list" >&2
+            exit 2
+            ;;
+    esac
+fi
+"""
+
+charts_lock = """# charts.lock - Helm charts vendored into this directory (see scripts/helm-charts.sh)
+#
+# Bump a version here and run ./scripts/helm-charts.sh vendor, or move every
+# pin to its newest release with ./scripts/helm-charts.sh refresh --latest.
+#
+# name               version    repository
+kong/kong            2.38.0     https://charts.konghq.com
+bitnami/postgresql   12.12.10   oci://registry-1.docker.io/bitnamicharts
+"""
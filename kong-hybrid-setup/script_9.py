@@ -76,6 +76,26 @@ serverFiles:
             replacement: $1:$2
             target_label: __address__
             
+      # Per-phase plugin latency (phase_timer) from the DP status listener
+      - job_name: 'kong-plugin-phases'
+        metrics_path: '/api-version/phases'
+        kubernetes_sd_configs:
+          - role: pod
+            namespaces:
+              names: ['kong']
+        relabel_configs:
+          - source_labels: [__meta_kubernetes_pod_label_app_kubernetes_io_instance]
+            action: keep
+            regex: kong-dp
+          - source_labels: [__meta_kubernetes_pod_annotation_prometheus_io_scrape]
+            action: keep
+            regex: true
+          - source_labels: [__address__, __meta_kubernetes_pod_annotation_prometheus_io_port]
+            action: replace
+            regex: ([^:]+)(?::\\d+)?;(\\d+)
+            replacement: $1:$2
+            target_label: __address__
+
       # PostgreSQL metrics
       - job_name: 'postgresql'
         static_configs:
@@ -215,10 +235,6 @@ networkPolicy:
   enabled: false
 """
 
-# Create monitoring values
-with open("kong-hybrid-setup/monitoring/prometheus-values.yaml", "w") as f:
-    f.write(prometheus_values)
-
 # Create Grafana dashboard for Kong
 grafana_dashboard = """{
   "dashboard": {
@@ -344,14 +360,51 @@ grafana_dashboard = """{
           "x": 12,
           "y": 16
         }
+      },
+      {
+        "id": 6,
+        "title": "Plugin Phase Latency (p99)",
+        "type": "graph",
+        "targets": [
+          {
+            "expr": "histogram_quantile(0.99, sum by (plugin, phase, le) (rate(kong_plugin_phase_duration_ms_bucket[5m])))",
+            "legendFormat": "{{plugin}} {{phase}}"
+          }
+        ],
+        "yAxes": [
+          {
+            "label": "Latency (ms)"
+          }
+        ],
+        "gridPos": {
+          "h": 8,
+          "w": 12,
+          "x": 0,
+          "y": 24
+        }
+      },
+      {
+        "id": 7,
+        "title": "Plugin Phase Mean Time",
+        "type": "graph",
+        "targets": [
+          {
+            "expr": "sum by (plugin, phase) (rate(kong_plugin_phase_duration_ms_sum[5m])) / sum by (plugin, phase) (rate(kong_plugin_phase_duration_ms_count[5m]))",
+            "legendFormat": "{{plugin}} {{phase}}"
+          }
+        ],
+        "yAxes": [
+          {
+            "label": "Latency (ms)"
+          }
+        ],
+        "gridPos": {
+          "h": 8,
+          "w": 12,
+          "x": 12,
+          "y": 24
+        }
       }
     ]
   }
 }"""
-
-with open("kong-hybrid-setup/monitoring/kong-dashboard.json", "w") as f:
-    f.write(grafana_dashboard)
-
-print("Monitoring configuration created:")
-print("- prometheus-values.yaml: Prometheus setup with Kong scraping")
-print("- kong-dashboard.json: Grafana dashboard for Kong metrics")
\ No newline at end of file
@@ -0,0 +1,28 @@
+#!/bin/bash
+
+# deploy-cp.sh - Deploy Kong Control Plane only
+set -euo pipefail
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_ROOT="$(dirname "$SCRIPT_DIR")"
+NAMESPACE="kong"
+
+# Step timings when STEP_TRACE is set
+source "$SCRIPT_DIR/step-trace.sh"
+# helm_upgrade_if_changed (no-op redeploys skip helm upgrade), wait_for_release
+source "$SCRIPT_DIR/helm-release.sh"
+# chart_ref: pinned charts from the vendored charts/ directory
+source "$SCRIPT_DIR/helm-charts.sh"
+
+echo "🎛️  Deploying Kong Control Plane..."
+
+# Deploy Control Plane from the pinned chart (fetched only if not vendored yet)
+trace_step "vendor charts" charts_vendor
+CHART="$(chart_ref kong/kong)"
+trace_step "helm upgrade kong-cp" helm_upgrade_if_changed kong-cp "$CHART" "$NAMESPACE" \
+    --values "$PROJECT_ROOT/control-plane/values-cp.yaml"
+
+# Return as soon as this release's pods are available
+trace_step "wait kong-cp" wait_for_release kong-cp "$NAMESPACE"
+
+echo "✅ Kong Control Plane deployment completed!"
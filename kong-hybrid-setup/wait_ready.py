@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""Wait for a Helm release's workloads to become available, watching the API.
+
+The deployment scripts used to chain ``helm upgrade --wait`` (which polls
+the release every two seconds) with ``kubectl wait --timeout=300s`` on a pod
+label selector; for the Control Plane that selector was
+``app.kubernetes.io/name=kong``, which the Data Plane's pods match as well.
+This script selects exactly one release with ``app.kubernetes.io/instance``,
+watches its Deployments, StatefulSets, pods and pod events as streams, and
+returns the moment every workload has rolled out::
+
+    python kong-hybrid-setup/wait_ready.py kong-cp --namespace kong
+    python kong-hybrid-setup/wait_ready.py postgres -n postgres --timeout 600 --json
+
+It then prints how long each pod took to be scheduled, to pull its images
+and to become Ready. The API is reached through ``kubectl proxy``, so any
+kubeconfig credentials work, unless ``--api-server`` names a plain HTTP
+endpoint such as the simulated cluster of ``fake_apiserver.py``::
+
+    python kong-hybrid-setup/fake_apiserver.py --port 8001 &
+    python kong-hybrid-setup/wait_ready.py kong-cp -n kong --api-server http://127.0.0.1:8001
+
+Failed requests and dropped watches are retried with capped exponential
+backoff until the timeout. Exit status: 0 available, 1 timed out, 2 the
+rollout failed (progress deadline exceeded) or kubectl proxy did not start.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime
+from urllib.parse import urlencode, urlsplit
+
+INSTANCE_LABEL = "app.kubernetes.io/instance"
+
+# Collections watched for a release; events carry no labels and are matched by pod name
+WORKLOADS = {
+    "Deployment": "/apis/apps/v1/namespaces/{namespace}/deployments",
+    "StatefulSet": "/apis/apps/v1/namespaces/{namespace}/statefulsets",
+}
+PODS = "/api/v1/namespaces/{namespace}/pods"
+EVENTS = "/api/v1/namespaces/{namespace}/events"
+
+# Server-side lifetime of one watch request; it is simply re-established
+WATCH_SECONDS = 240
+
+# Container waiting reasons worth reporting while the rollout is stuck
+PROBLEMS = {"ErrImagePull", "ImagePullBackOff", "CrashLoopBackOff", "CreateContainerConfigError", "InvalidImageName"}
+
+DURATION_UNITS = {"h": 3600, "m": 60, "s": 1, "ms": 1e-3, "us": 1e-6, "µs": 1e-6, "ns": 1e-9}
+
+
+class APIError(Exception):
+    """A request to the API server failed."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class Gone(APIError):
+    """The watch's resourceVersion is too old; the collection must be listed again."""
+
+
+class RolloutFailed(Exception):
+    """A workload reported that its rollout cannot finish."""
+
+
+def parse_time(text):
+    """Seconds since the epoch of an RFC 3339 (Micro)Time, or None."""
+    if not text:
+        return None
+    return datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp()
+
+
+def parse_duration(text):
+    """Seconds in a Go duration such as ``1m2.5s`` or ``350ms``."""
+    return sum(float(value) * DURATION_UNITS[unit] for value, unit in re.findall(r"([\d.]+)(h|ms|m|s|µs|us|ns)", text))
+
+
+class Backoff:
+    """Capped exponential delays with jitter, reset after a success."""
+
+    def __init__(self, initial=0.25, maximum=8.0, rng=None):
+        self.initial = initial
+        self.maximum = maximum
+        self.rng = rng or random.Random()
+        self.attempts = 0
+
+    def next(self):
+        delay = min(self.maximum, self.initial * 2 ** self.attempts)
+        self.attempts += 1
+        return delay / 2 + self.rng.uniform(0, delay / 2)
+
+    def reset(self):
+        self.attempts = 0
+
+
+class Client:
+    """Just enough of the Kubernetes REST API: list, and watch as a stream."""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        if parts.scheme != "http":
+            raise ValueError(f"only plain http API endpoints are supported (use kubectl proxy): {base_url}")
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip("/")
+
+    async def _open(self, path, params):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        request = [
+            f"GET {self.prefix}{path}?{urlencode(params)} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Accept: application/json",
+            "User-Agent: kong-wait-ready/1.0",
+            "Connection: close",
+        ]
+        writer.write(("\r\n".join(request) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            status = int(lines[0].split(" ", 2)[1])
+        except (IndexError, ValueError):
+            writer.close()
+            raise APIError(f"bad status line {lines[0]!r}")
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return status, headers, reader, writer
+
+    async def _chunks(self, reader, headers):
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                line = await reader.readline()
+                if not line:
+                    raise APIError("connection closed mid-response")
+                size = int(line.split(b";")[0], 16)
+                if size == 0:
+                    return
+                yield (await reader.readexactly(size + 2))[:-2]
+        elif "content-length" in headers:
+            yield await reader.readexactly(int(headers["content-length"]))
+        else:
+            while chunk := await reader.read(65536):
+                yield chunk
+
+    async def _fail(self, status, headers, reader, path):
+        body = b"".join([chunk async for chunk in self._chunks(reader, headers)])
+        try:
+            message = json.loads(body).get("message") or body.decode("utf-8", "replace")
+        except (ValueError, AttributeError):
+            message = body.decode("utf-8", "replace")
+        error = Gone if status == 410 else APIError
+        raise error(f"GET {path}: HTTP {status}: {message.strip()[:200]}", status)
+
+    async def list(self, path, params):
+        status, headers, reader, writer = await self._open(path, params)
+        try:
+            if status != 200:
+                await self._fail(status, headers, reader, path)
+            return json.loads(b"".join([chunk async for chunk in self._chunks(reader, headers)]))
+        finally:
+            writer.close()
+
+    async def watch(self, path, params, resource_version):
+        """Yield ``(type, object)`` until the server ends the watch."""
+        params = dict(params, watch="1", resourceVersion=resource_version,
+                      timeoutSeconds=str(WATCH_SECONDS), allowWatchBookmarks="true")
+        status, headers, reader, writer = await self._open(path, params)
+        try:
+            if status != 200:
+                await self._fail(status, headers, reader, path)
+            buffer = b""
+            async for chunk in self._chunks(reader, headers):
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    event = json.loads(line)
+                    if event.get("type") == "ERROR":
+                        error = event.get("object") or {}
+                        kind = Gone if error.get("code") == 410 else APIError
+                        raise kind(f"watch {path}: {error.get('message', 'error')}", error.get("code"))
+                    yield event["type"], event["object"]
+        finally:
+            writer.close()
+
+
+def rollout_state(kind, obj):
+    """``(done, message)`` for one workload, following ``kubectl rollout status``."""
+    meta, spec, status = obj["metadata"], obj.get("spec") or {}, obj.get("status") or {}
+    name = f"{kind.lower()}/{meta['name']}"
+    if status.get("observedGeneration", 0) < meta.get("generation", 0):
+        return False, f"{name}: waiting for the controller to observe the new spec"
+    want = spec.get("replicas", 1)
+    updated = status.get("updatedReplicas", 0)
+
+    if kind == "Deployment":
+        for condition in status.get("conditions") or ():
+            if condition.get("type") == "Progressing" and condition.get("reason") == "ProgressDeadlineExceeded":
+                raise RolloutFailed(f"{name} exceeded its progress deadline: {condition.get('message', '')}".rstrip(": "))
+        available = status.get("availableReplicas", 0)
+        if updated < want:
+            return False, f"{name}: {updated} of {want} replicas updated"
+        if status.get("replicas", 0) > updated:
+            return False, f"{name}: {status['replicas'] - updated} old replicas pending termination"
+        if available < updated:
+            return False, f"{name}: {available} of {updated} updated replicas available"
+        return True, f"{name}: {available} of {want} replicas available"
+
+    ready = status.get("readyReplicas", 0)
+    if ready < want:
+        return False, f"{name}: {ready} of {want} replicas ready"
+    rolling = (spec.get("updateStrategy") or {}).get("type", "RollingUpdate") == "RollingUpdate"
+    if rolling and status.get("updateRevision") and status.get("updateRevision") != status.get("currentRevision"):
+        return False, f"{name}: {updated} of {want} replicas updated"
+    return True, f"{name}: {ready} of {want} replicas ready"
+
+
+class PodTiming:
+    """When a pod was created, scheduled and Ready, and its image pulls."""
+
+    def __init__(self, name):
+        self.name = name
+        self.node = None
+        self.created = None
+        self.scheduled = None
+        self.ready = None
+        self.terminating = False
+        self.problems = set()
+        self.pulling = {}  # image -> time of its Pulling event
+        self.pulls = {}  # image -> seconds the pull took (0 when already present)
+
+    def update(self, pod):
+        meta, spec, status = pod["metadata"], pod.get("spec") or {}, pod.get("status") or {}
+        self.node = spec.get("nodeName") or self.node
+        self.created = parse_time(meta.get("creationTimestamp"))
+        self.terminating = bool(meta.get("deletionTimestamp"))
+        conditions = {c.get("type"): c for c in status.get("conditions") or ()}
+        scheduled, ready = conditions.get("PodScheduled"), conditions.get("Ready")
+        if scheduled and scheduled.get("status") == "True":
+            self.scheduled = parse_time(scheduled.get("lastTransitionTime"))
+        self.ready = parse_time(ready.get("lastTransitionTime")) if ready and ready.get("status") == "True" else None
+        waiting = set()
+        for container in (status.get("initContainerStatuses") or []) + (status.get("containerStatuses") or []):
+            reason = ((container.get("state") or {}).get("waiting") or {}).get("reason")
+            if reason in PROBLEMS:
+                waiting.add(f"{container.get('name')}: {reason}")
+        new, self.problems = waiting - self.problems, waiting
+        return new
+
+    def event(self, event):
+        message = event.get("message") or ""
+        image = re.search(r'image "([^"]+)"', message)
+        image = image.group(1) if image else "?"
+        when = parse_time(event.get("eventTime") or event.get("lastTimestamp") or event.get("firstTimestamp"))
+        if event.get("reason") == "Pulling":
+            self.pulling[image] = when
+        elif event.get("reason") == "Pulled":
+            took = re.search(r" in ((?:[\d.]+(?:h|ms|m|s|µs|us|ns))+)", message)
+            if "already present" in message:
+                self.pulls[image] = 0.0
+            elif took:
+                self.pulls[image] = parse_duration(took.group(1))
+            elif when is not None and self.pulling.get(image) is not None:
+                self.pulls[image] = max(0.0, when - self.pulling[image])
+
+    def _since_created(self, when):
+        return when - self.created if when is not None and self.created is not None else None
+
+    def report(self):
+        return {
+            "pod": self.name,
+            "node": self.node,
+            "scheduled": self._since_created(self.scheduled),
+            "image_pull": sum(self.pulls.values()) if self.pulls else None,
+            "ready": self._since_created(self.ready),
+        }
+
+
+class Waiter:
+    """Follows a release's workloads, pods and pod events until it is available."""
+
+    def __init__(self, client, release, namespace, out=sys.stdout, quiet=False):
+        self.client = client
+        self.release = release
+        self.namespace = namespace
+        self.out = out
+        self.quiet = quiet
+        self.selector = {"labelSelector": f"{INSTANCE_LABEL}={release}"}
+        self.workloads = {kind: {} for kind in WORKLOADS}
+        self.synced = set()
+        self.pods = {}
+        self.pending_events = {}  # pod name -> events seen before the pod
+        self.changed = asyncio.Event()
+        self.started = None
+        self.finished = None
+        self.status = []
+        self.failure = None
+
+    def _say(self, line):
+        if not self.quiet:
+            self.out.write(f"[{time.monotonic() - self.started:6.1f}s] {line}\n")
+            self.out.flush()
+
+    def _pod(self, name):
+        if name not in self.pods:
+            self.pods[name] = PodTiming(name)
+            for event in self.pending_events.pop(name, ()):
+                self.pods[name].event(event)
+        return self.pods[name]
+
+    def _on_pod(self, kind, obj):
+        name = obj["metadata"]["name"]
+        if kind == "DELETED":
+            self.pods.pop(name, None)
+            return
+        timing = self._pod(name)
+        was_ready = timing.ready is not None
+        for problem in timing.update(obj):
+            self._say(f"⚠️  pod/{name} {problem}")
+        # Pods that were Ready before we started only show up in the summary
+        if timing.ready is not None and not was_ready and not timing.terminating and kind != "LISTED":
+            r = timing.report()
+            details = [f"{label} {r[key]:.1f}s" for label, key in (("scheduled", "scheduled"), ("image pull", "image_pull"))
+                       if r[key] is not None]
+            ready = f" after {r['ready']:.1f}s" if r["ready"] is not None else ""
+            self._say(f"pod/{name} ready{ready}" + (f" ({', '.join(details)})" if details else ""))
+
+    def _on_event(self, kind, obj):
+        involved = obj.get("involvedObject") or {}
+        if kind == "DELETED" or involved.get("kind") != "Pod" or obj.get("reason") not in ("Pulling", "Pulled"):
+            return
+        name = involved.get("name")
+        if name in self.pods:
+            self.pods[name].event(obj)
+        elif name:
+            self.pending_events.setdefault(name, []).append(obj)
+
+    def _apply(self, kind, type_, obj):
+        if kind == "Pod":
+            self._on_pod(type_, obj)
+        elif kind == "Event":
+            self._on_event(type_, obj)
+        elif type_ == "DELETED":
+            self.workloads[kind].pop(obj["metadata"]["name"], None)
+        else:
+            self.workloads[kind][obj["metadata"]["name"]] = obj
+        self.changed.set()
+
+    async def _follow(self, kind, path, params):
+        """List then watch one collection forever, recovering from API errors."""
+        backoff = Backoff()
+        resource_version = None
+        while True:
+            try:
+                if resource_version is None:
+                    listing = await self.client.list(path, params)
+                    if kind in self.workloads:
+                        self.workloads[kind] = {}
+                    for obj in listing.get("items") or ():
+                        self._apply(kind, "LISTED", obj)
+                    resource_version = listing["metadata"]["resourceVersion"]
+                    self.synced.add(kind)
+                    self.changed.set()
+                async for type_, obj in self.client.watch(path, params, resource_version):
+                    backoff.reset()
+                    resource_version = obj.get("metadata", {}).get("resourceVersion", resource_version)
+                    if type_ != "BOOKMARK":
+                        self._apply(kind, type_, obj)
+            except Gone:
+                resource_version = None
+            except (APIError, OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, KeyError) as e:
+                delay = backoff.next()
+                self._say(f"↻ {kind} {e or type(e).__name__}; retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def check(self):
+        """True once every workload of the release has rolled out."""
+        if self.synced < set(WORKLOADS):
+            return False
+        self.status = [rollout_state(kind, obj) for kind in WORKLOADS for obj in self.workloads[kind].values()]
+        return bool(self.status) and all(done for done, _ in self.status)
+
+    async def _until_ready(self):
+        while True:
+            await self.changed.wait()
+            self.changed.clear()
+            if self.check():
+                return
+
+    async def run(self, timeout):
+        """Wait up to ``timeout`` seconds; True when the release is available."""
+        self.started = time.monotonic()
+        follows = [(kind, path) for kind, path in WORKLOADS.items()] + [("Pod", PODS)]
+        tasks = [asyncio.ensure_future(self._follow(kind, path.format(namespace=self.namespace), self.selector))
+                 for kind, path in follows]
+        tasks.append(asyncio.ensure_future(self._follow(
+            "Event", EVENTS.format(namespace=self.namespace), {"fieldSelector": "involvedObject.kind=Pod"})))
+        try:
+            await asyncio.wait_for(self._until_ready(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        except RolloutFailed as e:
+            self.failure = str(e)
+            return False
+        finally:
+            self.finished = time.monotonic()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    def pod_reports(self):
+        return [self.pods[name].report() for name in sorted(self.pods) if not self.pods[name].terminating]
+
+    def summary(self):
+        rows = self.pod_reports()
+        if not rows:
+            return ""
+        width = max(len(r["pod"]) for r in rows)
+        cell = lambda value: f"{value:7.1f}s" if value is not None else f"{'-':>8}"
+        lines = [f"{'pod':<{width}}  {'scheduled':>9} {'image pull':>10} {'ready':>8}  node"]
+        for r in rows:
+            lines.append(f"{r['pod']:<{width}}  {cell(r['scheduled']):>9} {cell(r['image_pull']):>10} "
+                         f"{cell(r['ready'])}  {r['node'] or '-'}")
+        return "\n".join(lines)
+
+
+class KubectlProxy:
+    """``kubectl proxy`` on a free local port, so the kubeconfig handles auth."""
+
+    def __init__(self, context=None):
+        self.context = context
+        self.process = None
+
+    async def __aenter__(self):
+        command = ["kubectl", "proxy", "--port=0"] + ([f"--context={self.context}"] if self.context else [])
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                *command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        except FileNotFoundError:
+            raise APIError("kubectl is not installed")
+        try:
+            line = await asyncio.wait_for(self.process.stdout.readline(), 15)
+        except asyncio.TimeoutError:
+            line = b""
+        match = re.search(rb"127\.0\.0\.1:(\d+)", line)
+        if not match:
+            await self.__aexit__()
+            raise APIError(f"kubectl proxy did not start: {line.decode('utf-8', 'replace').strip() or 'no output'}")
+        return f"http://127.0.0.1:{match.group(1).decode()}"
+
+    async def __aexit__(self, *exc):
+        if self.process and self.process.returncode is None:
+            self.process.terminate()
+            await self.process.wait()
+
+
+async def wait(args):
+    if args.api_server:
+        waiter = Waiter(Client(args.api_server), args.release, args.namespace, quiet=args.json)
+        return waiter, await waiter.run(args.timeout)
+    async with KubectlProxy(args.context) as url:
+        waiter = Waiter(Client(url), args.release, args.namespace, quiet=args.json)
+        return waiter, await waiter.run(args.timeout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wait for a Helm release's workloads by watching the Kubernetes API")
+    parser.add_argument("release", help=f"Helm release name (matched on the {INSTANCE_LABEL} label)")
+    parser.add_argument("-n", "--namespace", default="default", help="namespace of the release (default: default)")
+    parser.add_argument("-t", "--timeout", type=float, default=600, help="seconds to wait (default: 600)")
+    parser.add_argument("--api-server", help="plain HTTP API endpoint instead of a kubectl proxy (e.g. a fake server)")
+    parser.add_argument("--context", help="kubeconfig context for kubectl proxy")
+    parser.add_argument("--json", action="store_true", help="print a JSON report instead of progress and a table")
+    args = parser.parse_args(argv)
+    if args.timeout <= 0:
+        parser.error("--timeout must be positive")
+
+    try:
+        waiter, ready = asyncio.run(wait(args))
+    except (APIError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        return 130
+
+    if args.json:
+        report = {
+            "release": args.release,
+            "namespace": args.namespace,
+            "ready": ready,
+            "elapsed": round(waiter.elapsed, 3),
+            "workloads": [message for _, message in waiter.status],
+            "pods": waiter.pod_reports(),
+        }
+        if waiter.failure:
+            report["error"] = waiter.failure
+        print(json.dumps(report, indent=2))
+    else:
+        table = waiter.summary()
+        if table:
+            print(table)
+
+    if waiter.failure:
+        print(f"❌ {args.release}: {waiter.failure}", file=sys.stderr)
+        return 2
+    if not ready:
+        pending = [message for done, message in waiter.status if not done] or ["no Deployment or StatefulSet found"]
+        print(f"❌ {args.release} not available after {args.timeout:g}s: " + "; ".join(pending), file=sys.stderr)
+        return 1
+    if not args.json:
+        print(f"✅ {args.release} available after {waiter.elapsed:.1f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())